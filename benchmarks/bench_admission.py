@@ -0,0 +1,180 @@
+"""
+Overload simulation: the graph with and without admission control.
+
+    python -m benchmarks.bench_admission --llm-ms 100 --llm-concurrency 8 --overload 2
+
+Runs the corrective graph on fake backends, with at most
+``--llm-concurrency`` fake LLM calls of ``--llm-ms`` at a time (the provider's
+capacity). The closed-loop throughput of that setup is measured first; then
+questions arrive at ``--overload`` times that rate (Poisson) for
+``--duration`` seconds:
+
+    interactive  30% of the arrivals, from 20 tenants, deadline --interactive-s
+    batch        70%, from 2 tenants, deadline --batch-s
+
+"none" lets every question into the graph at once, each cancelled at its
+deadline (what the HTTP service does without admission control).
+"admission" puts graph.admission in front, with ``--max-concurrency`` runs
+and ``--max-queue`` queued. Reported per priority: questions answered within
+their deadline per second of arrivals (goodput), p50/p99 latency of those,
+and the share timed out (cancelled at the deadline, after using capacity)
+or rejected (answered 503 without using any).
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+os.environ.setdefault("RAG_LLM_PROVIDER", "fake")
+
+from graph import fakes  # noqa: E402
+from graph.admission import (  # noqa: E402
+    BATCH,
+    INTERACTIVE,
+    PRIORITIES,
+    AdmissionController,
+    AdmissionRejected,
+)
+from graph.builder import build_graph  # noqa: E402
+from graph.chains.llm import get_llm  # noqa: E402
+from graph.consts import CORRECTIVE  # noqa: E402
+from graph.limits import LLM, ProviderLimits, use_limits  # noqa: E402
+
+Outcome = Tuple[str, str, float]  # priority, "ok" / "timeout" / "rejected", seconds
+
+
+def use_fake_backends() -> None:
+    retriever = fakes.fake_retriever(n_docs=50)
+    search = fakes.FakeSearchTool()
+    importlib.import_module("graph.nodes.retrieve").get_retriever = lambda: retriever
+    importlib.import_module("graph.search.providers").get_web_search_tool = lambda: search
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else float("nan")
+
+
+async def ask(
+    app,
+    controller: Optional[AdmissionController],
+    i: int,
+    priority: str,
+    tenant: str,
+    deadline_s: float,
+) -> Outcome:
+    start = time.perf_counter()
+    config = {"configurable": {"thread_id": str(i)}}
+    run = app.ainvoke({"question": f"agent memory {i}"}, config)
+    try:
+        if controller is None:
+            await asyncio.wait_for(run, deadline_s)
+        else:
+            try:
+                async with controller.slot(tenant, priority, deadline_s):
+                    remaining_s = deadline_s - (time.perf_counter() - start)
+                    await asyncio.wait_for(run, remaining_s)
+            finally:
+                run.close()
+    except AdmissionRejected:
+        return priority, "rejected", time.perf_counter() - start
+    except asyncio.TimeoutError:
+        return priority, "timeout", time.perf_counter() - start
+    return priority, "ok", time.perf_counter() - start
+
+
+async def capacity(app, seconds: float, clients: int) -> float:
+    done = 0
+    stop = time.perf_counter() + seconds
+
+    async def client(c: int) -> None:
+        nonlocal done
+        i = 0
+        while time.perf_counter() < stop:
+            config = {"configurable": {"thread_id": f"capacity-{c}-{i}"}}
+            await app.ainvoke({"question": f"agent memory {i}"}, config)
+            done += 1
+            i += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(clients)))
+    return done / (time.perf_counter() - start)
+
+
+async def overload(
+    app, controller: Optional[AdmissionController], rate: float, args: argparse.Namespace
+) -> List[Outcome]:
+    rng = random.Random(args.seed)
+    tasks = []
+    stop = time.perf_counter() + args.duration
+    i = 0
+    while time.perf_counter() < stop:
+        if rng.random() < 0.3:
+            request = (INTERACTIVE, f"user-{rng.randrange(20)}", args.interactive_s)
+        else:
+            request = (BATCH, f"batch-{rng.randrange(2)}", args.batch_s)
+        tasks.append(asyncio.ensure_future(ask(app, controller, i, *request)))
+        i += 1
+        await asyncio.sleep(rng.expovariate(rate))
+    return await asyncio.gather(*tasks)
+
+
+def report(label: str, outcomes: List[Outcome], seconds: float) -> None:
+    for priority in (*PRIORITIES, "all"):
+        mine = [(outcome, t) for p, outcome, t in outcomes if priority in (p, "all")]
+        ok = [t for outcome, t in mine if outcome == "ok"]
+        share: Dict[str, float] = {
+            outcome: sum(o == outcome for o, _ in mine) / max(1, len(mine))
+            for outcome in ("timeout", "rejected")
+        }
+        print(
+            f"{label:<10} {priority:<12} {len(mine):>6} {len(ok) / seconds:>9.1f} "
+            f"{percentile(ok, 0.5) * 1000:>7.0f} {percentile(ok, 0.99) * 1000:>7.0f} "
+            f"{share['timeout']:>8.0%} {share['rejected']:>9.0%}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-ms", type=float, default=100.0)
+    parser.add_argument("--llm-concurrency", type=int, default=8)
+    parser.add_argument("--overload", type=float, default=2.0)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--interactive-s", type=float, default=2.0)
+    parser.add_argument("--batch-s", type=float, default=20.0)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    use_fake_backends()
+    get_llm().latency_s = args.llm_ms / 1000
+    app = build_graph(CORRECTIVE)
+
+    async def run() -> None:
+        with use_limits(ProviderLimits({LLM: args.llm_concurrency})):
+            rate = await capacity(app, seconds=5, clients=4 * args.llm_concurrency)
+            print(
+                f"capacity {rate:.1f} questions/s; offering {args.overload * rate:.1f}/s "
+                f"for {args.duration:.0f}s\n"
+            )
+            print(
+                f"{'mode':<10} {'priority':<12} {'asked':>6} {'goodput/s':>9} {'p50_ms':>7} "
+                f"{'p99_ms':>7} {'timeout':>8} {'rejected':>9}"
+            )
+            for label, controller in (
+                ("none", None),
+                ("admission", AdmissionController(args.max_concurrency, args.max_queue)),
+            ):
+                outcomes = await overload(app, controller, args.overload * rate, args)
+                report(label, outcomes, args.duration)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Concurrent requests per process: async graph execution vs a thread pool.
+
+    python -m benchmarks.bench_async --llm-ms 50 --concurrency 8,64,256,1024 --pool 64
+
+Runs the corrective graph offline (fake LLM with a fixed ``--llm-ms``
+latency per call, in-memory retriever, fake web search) with N requests in
+flight:
+
+    threaded  app.invoke on a ThreadPoolExecutor of min(N, --pool) workers,
+              the way a sync server serves concurrent users
+    async     app.ainvoke, N tasks on one event loop
+
+Reports throughput, p50/p99 request latency and the peak number of OS
+threads. Each request makes 8 LLM calls, so the ideal latency is 8 x llm-ms.
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+os.environ.setdefault("RAG_LLM_PROVIDER", "fake")
+
+from graph import fakes  # noqa: E402
+from graph.builder import build_graph  # noqa: E402
+from graph.chains.llm import get_llm  # noqa: E402
+from graph.consts import CORRECTIVE  # noqa: E402
+
+
+def use_fake_backends() -> None:
+    retriever = fakes.fake_retriever(n_docs=50)
+    search = fakes.FakeSearchTool()
+    importlib.import_module("graph.nodes.retrieve").get_retriever = lambda: retriever
+    importlib.import_module("graph.search.providers").get_web_search_tool = lambda: search
+
+
+class ThreadPeak:
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self) -> "ThreadPeak":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def request(i: int) -> Tuple[dict, dict]:
+    return {"question": f"agent memory {i}"}, {"configurable": {"thread_id": f"r-{i}"}}
+
+
+def summarize(latencies: List[float], elapsed: float, threads: int) -> Tuple[float, ...]:
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return len(latencies) / elapsed, p50 * 1000, p99 * 1000, threads
+
+
+def run_threaded(app, requests: int, workers: int) -> Tuple[float, ...]:
+    def run(i: int) -> float:
+        start = time.perf_counter()
+        app.invoke(*request(i))
+        return time.perf_counter() - start
+
+    with ThreadPeak() as threads:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(run, range(requests)))
+        elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed, threads.peak)
+
+
+def run_async(app, requests: int, concurrency: int) -> Tuple[float, ...]:
+    async def main() -> Tuple[List[float], float]:
+        limit = asyncio.Semaphore(concurrency)
+
+        async def run(i: int) -> float:
+            async with limit:
+                start = time.perf_counter()
+                await app.ainvoke(*request(i))
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(run(i) for i in range(requests)))
+        return latencies, time.perf_counter() - start
+
+    with ThreadPeak() as threads:
+        latencies, elapsed = asyncio.run(main())
+    return summarize(latencies, elapsed, threads.peak)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-ms", type=float, default=50.0)
+    parser.add_argument("--concurrency", default="8,64,256,1024")
+    parser.add_argument("--pool", type=int, default=64, help="max threads for the threaded runs")
+    parser.add_argument("--rounds", type=int, default=2, help="requests per slot of concurrency")
+    args = parser.parse_args()
+
+    use_fake_backends()
+    get_llm().latency_s = args.llm_ms / 1000
+    app = build_graph(CORRECTIVE)
+    app.invoke(*request(-1))  # warm up chains, retriever and token counting
+
+    print(f"{'mode':<9} {'inflight':>8} {'req/s':>8} {'p50_ms':>8} {'p99_ms':>8} {'threads':>8}")
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        requests = concurrency * args.rounds
+        rows = [
+            ("threaded", run_threaded(app, requests, min(concurrency, args.pool))),
+            ("async", run_async(app, requests, concurrency)),
+        ]
+        for mode, (rps, p50, p99, threads) in rows:
+            print(f"{mode:<9} {concurrency:>8} {rps:>8.1f} {p50:>8.0f} {p99:>8.0f} {threads:>8}")
+
+
+if __name__ == "__main__":
+    main()
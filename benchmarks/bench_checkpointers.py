@@ -0,0 +1,147 @@
+"""
+Checkpoint write rate and graph throughput per checkpointer.
+
+    python -m benchmarks.bench_checkpointers --threads 8 --writes 500 --requests 200
+
+Options compared:
+    memory          MemorySaver
+    sqlite-default  SqliteSaver on a bare ``sqlite3.connect`` (the tutorial setup)
+    sqlite          graph.checkpointers SQLite (WAL, synchronous=NORMAL, busy timeout)
+    async_sqlite    graph.checkpointers AsyncSqliteSaver, driven with ainvoke
+
+"writes/s" puts small checkpoints from ``--threads`` concurrent threads (or
+tasks); "graph req/s" runs the self-RAG graph offline (fake LLM with
+``--llm-ms`` latency per call, in-memory retriever, fake web search) with the
+same concurrency.
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("RAG_LLM_PROVIDER", "fake")
+
+from langgraph.checkpoint.base import empty_checkpoint  # noqa: E402
+from langgraph.checkpoint.memory import MemorySaver  # noqa: E402
+from langgraph.checkpoint.sqlite import SqliteSaver  # noqa: E402
+
+from graph import fakes  # noqa: E402
+from graph.builder import build_graph  # noqa: E402
+from graph.chains.llm import get_llm  # noqa: E402
+from graph.checkpointers import (  # noqa: E402
+    ASYNC_SQLITE,
+    SQLITE,
+    acreate_checkpointer,
+    create_checkpointer,
+)
+from graph.consts import SELF_RAG  # noqa: E402
+
+
+def use_fake_backends() -> None:
+    retriever = fakes.fake_retriever(n_docs=50)
+    search = fakes.FakeSearchTool()
+    importlib.import_module("graph.nodes.retrieve").get_retriever = lambda: retriever
+    importlib.import_module("graph.search.providers").get_web_search_tool = lambda: search
+
+
+def checkpoint(i: int):
+    ckpt = empty_checkpoint()
+    ckpt["channel_values"] = {"question": f"question {i}", "generation": "x" * 500}
+    return ckpt
+
+
+def write_config(i: int):
+    return {"configurable": {"thread_id": f"writes-{i % 64}", "checkpoint_ns": ""}}
+
+
+def sync_writes(saver, writes: int, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda i: saver.put(write_config(i), checkpoint(i), {}, {}), range(writes)))
+    return writes / (time.perf_counter() - start)
+
+
+def sync_graph(saver, requests: int, threads: int) -> float:
+    app = build_graph(SELF_RAG, checkpointer=saver)
+
+    def run(i: int) -> None:
+        app.invoke({"question": f"agent memory {i}"}, {"configurable": {"thread_id": f"g-{i}"}})
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(run, range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def async_run(path: str, writes: int, requests: int, concurrency: int):
+    saver = await acreate_checkpointer(ASYNC_SQLITE, path)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def put(i: int) -> None:
+        async with limit:
+            await saver.aput(write_config(i), checkpoint(i), {}, {})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(put(i) for i in range(writes)))
+    writes_per_s = writes / (time.perf_counter() - start)
+
+    app = build_graph(SELF_RAG, checkpointer=saver)
+
+    async def run(i: int) -> None:
+        async with limit:
+            config = {"configurable": {"thread_id": f"g-{i}"}}
+            await app.ainvoke({"question": f"agent memory {i}"}, config)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(i) for i in range(requests)))
+    requests_per_s = requests / (time.perf_counter() - start)
+    await saver.conn.close()
+    return writes_per_s, requests_per_s
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--llm-ms", type=float, default=5.0)
+    parser.add_argument("--dir", help="directory for the SQLite files (default: a temp dir)")
+    args = parser.parse_args()
+
+    use_fake_backends()
+    get_llm().latency_s = args.llm_ms / 1000
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        savers = {
+            "memory": lambda: MemorySaver(),
+            "sqlite-default": lambda: SqliteSaver(
+                sqlite3.connect(os.path.join(tmp, "default.sqlite"), check_same_thread=False)
+            ),
+            "sqlite": lambda: create_checkpointer(SQLITE, os.path.join(tmp, "tuned.sqlite")),
+        }
+        rows = []
+        for name, make in savers.items():
+            saver = make()
+            rows.append(
+                (
+                    name,
+                    sync_writes(saver, args.writes, args.threads),
+                    sync_graph(saver, args.requests, args.threads),
+                )
+            )
+        writes, requests = asyncio.run(
+            async_run(os.path.join(tmp, "async.sqlite"), args.writes, args.requests, args.threads)
+        )
+        rows.append((ASYNC_SQLITE, writes, requests))
+
+    print(f"{'checkpointer':<15} {'writes/s':>9} {'graph req/s':>12}")
+    for name, writes, requests in rows:
+        print(f"{name:<15} {writes:>9.0f} {requests:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
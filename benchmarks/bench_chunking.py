@@ -0,0 +1,132 @@
+"""
+Chunking and retrieval parameter sweep.
+
+    python -m benchmarks.bench_chunking
+    python -m benchmarks.bench_chunking --corpus ./docs --questions ./docs/questions.jsonl \
+        --chunk-sizes 100 250 500 --overlaps 0 50 --ks 2 4 8
+
+Builds one index per (chunk_size, chunk_overlap) over a fixed local corpus,
+then runs a labelled question set through retrieval for every k. Chunk sizes
+are in tokens, like ``ingestion.py``. Without ``--corpus`` a synthetic corpus
+with planted facts is generated. Embeddings are the deterministic
+``HashingEmbeddings`` stand-in so results are reproducible and free.
+
+Reported per configuration:
+    chunks        number of chunks in the index
+    index_kb      text + vector bytes held by the index
+    build_s       split + embed + insert time
+    query_ms      mean / p95 retrieval latency per question
+    ctx_tokens    mean tokens across the k retrieved chunks (prompt size that
+                  reaches grade_documents and generate)
+    hit_rate      share of questions whose answer appears in a retrieved chunk
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from langchain_core.vectorstores import InMemoryVectorStore
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from graph.fakes import HashingEmbeddings, make_qa_corpus
+from graph.loaders import discover_files, load_file
+from graph.tokens import count_tokens
+
+
+def load_questions(path: str) -> List[Dict[str, str]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def sweep(docs, questions, chunk_sizes, overlaps, ks, embedding_size) -> List[Dict]:
+    rows = []
+    for chunk_size in chunk_sizes:
+        for overlap in overlaps:
+            if overlap >= chunk_size:
+                continue
+            splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=overlap,
+                length_function=count_tokens,
+            )
+            start = time.perf_counter()
+            chunks = splitter.split_documents(docs)
+            store = InMemoryVectorStore(HashingEmbeddings(size=embedding_size))
+            store.add_documents(chunks)
+            build_s = time.perf_counter() - start
+            index_bytes = sum(
+                len(d["text"].encode()) + 4 * len(d["vector"]) for d in store.store.values()
+            )
+
+            for k in ks:
+                retriever = store.as_retriever(search_kwargs={"k": k})
+                latencies, ctx_tokens, hits = [], [], 0
+                for q in questions:
+                    t0 = time.perf_counter()
+                    found = retriever.invoke(q["question"])
+                    latencies.append(time.perf_counter() - t0)
+                    ctx_tokens.append(sum(count_tokens(d.page_content) for d in found))
+                    hits += any(q["answer"] in d.page_content for d in found)
+                latencies.sort()
+                rows.append(
+                    {
+                        "chunk_size": chunk_size,
+                        "overlap": overlap,
+                        "k": k,
+                        "chunks": len(chunks),
+                        "index_kb": index_bytes / 1024,
+                        "build_s": build_s,
+                        "query_ms": 1000 * statistics.fmean(latencies),
+                        "p95_ms": 1000 * latencies[int(0.95 * (len(latencies) - 1))],
+                        "ctx_tokens": statistics.fmean(ctx_tokens),
+                        "hit_rate": hits / len(questions),
+                    }
+                )
+    return rows
+
+
+def print_table(rows: List[Dict]) -> None:
+    header = (
+        f"{'size':>5} {'ovl':>4} {'k':>3} {'chunks':>7} {'index_kb':>9} {'build_s':>8} "
+        f"{'query_ms':>9} {'p95_ms':>7} {'ctx_tokens':>10} {'hit_rate':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(
+            f"{r['chunk_size']:>5} {r['overlap']:>4} {r['k']:>3} {r['chunks']:>7} "
+            f"{r['index_kb']:>9.0f} {r['build_s']:>8.2f} {r['query_ms']:>9.2f} "
+            f"{r['p95_ms']:>7.2f} {r['ctx_tokens']:>10.0f} {r['hit_rate']:>8.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="directory of documents (default: synthetic)")
+    parser.add_argument("--questions", help="JSONL of {question, answer} rows")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[100, 250, 500, 1000])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[0, 50])
+    parser.add_argument("--ks", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--embedding-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            corpus = args.corpus
+            questions = load_questions(args.questions or f"{corpus}/questions.jsonl")
+        else:
+            corpus = tmp
+            questions = make_qa_corpus(tmp)
+        docs = [page for path in discover_files(corpus) for page in load_file(str(path))]
+        print(f"corpus: {len(docs)} pages, {len(questions)} questions")
+        rows = sweep(
+            docs, questions, args.chunk_sizes, args.overlaps, args.ks, args.embedding_size
+        )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
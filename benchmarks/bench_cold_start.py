@@ -0,0 +1,82 @@
+"""
+Cold start of a worker process: time to import the graph's chains and nodes.
+
+    python -m benchmarks.bench_cold_start --runs 5
+
+Each measurement is a fresh interpreter with no API keys. "lazy" is the
+current import path; "first build" additionally constructs every chain with
+the offline fake model. "eager imports" imports the modules the old
+import-time construction pulled in (OpenAI SDK, Tavily tool, LangChain hub,
+Chroma when installed) without any network round trip, i.e. a lower bound
+for the previous cold start, which also blocked on ``hub.pull``.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+LAZY = """
+import graph.nodes, graph.chains.router, graph.chains.answer_grader, graph.chains.hallucination_grader
+"""
+
+FIRST_BUILD = LAZY + """
+from graph.chains.answer_grader import get_answer_grader
+from graph.chains.generation import get_generation_chain
+from graph.chains.hallucination_grader import get_hallucination_grader
+from graph.chains.retrieval_grader import get_retrieval_grader
+from graph.chains.router import get_question_router
+for build in (get_answer_grader, get_generation_chain, get_hallucination_grader,
+              get_retrieval_grader, get_question_router):
+    build()
+"""
+
+EAGER_IMPORTS = LAZY + """
+import langchain_openai
+from langchain import hub
+from langchain.schema import Document
+from langchain_community.tools.tavily_search import TavilySearchResults
+try:
+    import langchain_chroma
+except ImportError:
+    pass
+"""
+
+TIMED = "import time; _t = time.perf_counter()\n{body}\nprint(time.perf_counter() - _t)"
+
+
+def measure(body: str, runs: int) -> list:
+    env = {k: v for k, v in os.environ.items() if k not in ("OPENAI_API_KEY", "TAVILY_API_KEY")}
+    env["RAG_LLM_PROVIDER"] = "fake"
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", TIMED.format(body=body)],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    for label, body in (
+        ("lazy import", LAZY),
+        ("lazy import + first build", FIRST_BUILD),
+        ("eager imports (old lower bound)", EAGER_IMPORTS),
+    ):
+        samples = measure(body, args.runs)
+        print(
+            f"{label:<34} median {statistics.median(samples) * 1000:7.0f} ms   "
+            f"max {max(samples) * 1000:7.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
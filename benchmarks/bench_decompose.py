@@ -0,0 +1,211 @@
+"""
+Compound questions: one retrieval vs sub-question decomposition.
+
+    python -m benchmarks.bench_decompose --questions 20 --llm-ms 100 --search-ms 400
+
+The corpus has two documents per topic (a made-up word plus filler) and
+"distractor" documents about comparing things in general. A question like
+"How does X compare with Y and Z?" shares more words with the distractors
+than with any one topic, so a single retrieval returns mostly distractors;
+the fake grader accepts a document only if it is about a topic the question
+names, so any distractor sends the question to web search. The fake
+decomposer splits the question into "What is X?" per topic.
+
+    single      RAG_DECOMPOSE_QUESTIONS off: retrieve -> grade -> (web search)
+    sequential  decomposition with the sub-question tasks forced to run one at a time
+    parallel    decomposition as shipped, every sub-question in the same step
+
+Reports p50/max latency through invoke and ainvoke, the share of questions
+that fell back to web search and LLM calls per question. The distractors
+make the fallback numbers a property of this corpus, not a general rate.
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import random
+import re
+import statistics
+import threading
+import time
+from typing import List
+
+os.environ.setdefault("RAG_LLM_PROVIDER", "fake")
+
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+from langchain_core.vectorstores import InMemoryVectorStore  # noqa: E402
+
+from graph import fakes  # noqa: E402
+from graph.builder import build_graph  # noqa: E402
+from graph.chains.llm import get_llm  # noqa: E402
+from graph.config import get_settings  # noqa: E402
+from graph.consts import SELF_RAG  # noqa: E402
+
+
+def make_topics(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    topics: List[str] = []
+    while len(topics) < n:
+        word = "".join(rng.choice("bcdfghklmnprstvz") + rng.choice("aeiou") for _ in range(3))
+        if word not in topics:
+            topics.append(word)
+    return topics
+
+
+def make_store(topics: List[str], distractors: int) -> InMemoryVectorStore:
+    store = InMemoryVectorStore(fakes.HashingEmbeddings(size=1024))
+    docs = [
+        Document(page_content=f"{topic} {fakes.lorem(60, seed=i * 2 + j)}")
+        for i, topic in enumerate(topics)
+        for j in range(2)
+    ]
+    docs += [
+        Document(
+            page_content="How does one compare with another and with a third "
+            + fakes.lorem(60, seed=10_000 + i)
+        )
+        for i in range(distractors)
+    ]
+    store.add_documents(docs)
+    return store
+
+
+def use_fake_backends(store: InMemoryVectorStore, retriever_s: float, search_s: float) -> None:
+    inner = store.as_retriever(search_kwargs={"k": 4})
+
+    def retrieve(query):
+        time.sleep(retriever_s)
+        return inner.invoke(query)
+
+    async def aretrieve(query):
+        await asyncio.sleep(retriever_s)
+        return await inner.ainvoke(query)
+
+    retriever = RunnableLambda(retrieve, afunc=aretrieve)
+    search = fakes.FakeSearchTool(latency_s=search_s)
+    importlib.import_module("graph.nodes.retrieve").get_retriever = lambda: retriever
+    importlib.import_module("graph.search.providers").get_web_search_tool = lambda: search
+
+
+def responder(topics: List[str]):
+    def topics_in(text: str) -> List[str]:
+        words = set(re.findall(r"\w+", text.lower()))
+        return [t for t in topics if t in words]
+
+    def respond(schema, prompt: str):
+        response = fakes.default_structured_response(schema, prompt)
+        if schema.__name__ == "SubQuestions":
+            question = prompt.rsplit("Human: ", 1)[-1]
+            response.sub_questions = [f"What is {t}?" for t in topics_in(question)]
+        elif schema.__name__ == "GradeDocuments":
+            document, question = prompt.rsplit("User question:", 1)
+            relevant = set(topics_in(question)) & set(topics_in(document))
+            response.binary_score = "yes" if relevant else "no"
+        return response
+
+    return respond
+
+
+def serialize_sub_questions() -> None:
+    """Make the sub-question tasks of a step take turns, as a sequential loop would."""
+    builder = importlib.import_module("graph.builder")
+    func, afunc = builder.retrieve_sub_question, builder.aretrieve_sub_question
+    lock = threading.Lock()
+    alocks = {}
+
+    def retrieve_sub_question(state):
+        with lock:
+            return func(state)
+
+    async def aretrieve_sub_question(state):
+        alock = alocks.setdefault(asyncio.get_running_loop(), asyncio.Lock())
+        async with alock:
+            return await afunc(state)
+
+    builder.retrieve_sub_question = retrieve_sub_question
+    builder.aretrieve_sub_question = aretrieve_sub_question
+
+
+def questions(topics: List[str], n: int) -> List[str]:
+    rng = random.Random(1)
+    out = []
+    for i in range(n):
+        a, b, c = rng.sample(topics, 3)
+        out.append(f"How does {a} compare with {b}?" if i % 2 else f"Compare {a}, {b} and {c}")
+    return out
+
+
+def measure(mode: str, asked: List[str]) -> dict:
+    os.environ["RAG_DECOMPOSE_QUESTIONS"] = "false" if mode == "single" else "true"
+    get_settings.cache_clear()
+    builder = importlib.import_module("graph.builder")
+    originals = builder.retrieve_sub_question, builder.aretrieve_sub_question
+    if mode == "sequential":
+        serialize_sub_questions()
+    app = build_graph(SELF_RAG)
+    builder.retrieve_sub_question, builder.aretrieve_sub_question = originals
+    # Each pass starts cold, so a fallback always pays for the search.
+    cached_search = importlib.import_module("graph.nodes.web_search").get_cached_search
+    llm = get_llm()
+    results = {}
+
+    cached_search.cache_clear()
+    calls, latencies, fallbacks = len(llm.calls), [], 0
+    for i, question in enumerate(asked):
+        start = time.perf_counter()
+        state = app.invoke({"question": question}, {"configurable": {"thread_id": f"s{i}"}})
+        latencies.append(time.perf_counter() - start)
+        fallbacks += bool(state["web_search"])
+    results["invoke"] = (latencies, (len(llm.calls) - calls) / len(asked), fallbacks / len(asked))
+
+    async def run_async():
+        latencies, fallbacks = [], 0
+        for i, question in enumerate(asked):
+            config = {"configurable": {"thread_id": f"a{i}"}}
+            start = time.perf_counter()
+            state = await app.ainvoke({"question": question}, config)
+            latencies.append(time.perf_counter() - start)
+            fallbacks += bool(state["web_search"])
+        return latencies, fallbacks
+
+    cached_search.cache_clear()
+    calls = len(llm.calls)
+    latencies, fallbacks = asyncio.run(run_async())
+    results["ainvoke"] = (latencies, (len(llm.calls) - calls) / len(asked), fallbacks / len(asked))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--topics", type=int, default=12)
+    parser.add_argument("--distractors", type=int, default=8)
+    parser.add_argument("--llm-ms", type=float, default=100.0)
+    parser.add_argument("--retriever-ms", type=float, default=150.0)
+    parser.add_argument("--search-ms", type=float, default=400.0)
+    args = parser.parse_args()
+
+    topics = make_topics(args.topics)
+    store = make_store(topics, args.distractors)
+    use_fake_backends(store, args.retriever_ms / 1000, args.search_ms / 1000)
+    llm = get_llm()
+    llm.latency_s = args.llm_ms / 1000
+    llm.structured_responder = responder(topics)
+    asked = questions(topics, args.questions)
+
+    print(
+        f"{'retrieval':<11} {'mode':<8} {'p50_ms':>7} {'max_ms':>7} "
+        f"{'fallback':>9} {'llm calls':>10}"
+    )
+    for mode in ("single", "sequential", "parallel"):
+        for run, (latencies, calls, fallback) in measure(mode, asked).items():
+            print(
+                f"{mode:<11} {run:<8} {statistics.median(latencies) * 1000:>7.0f} "
+                f"{max(latencies) * 1000:>7.0f} {fallback:>9.0%} {calls:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
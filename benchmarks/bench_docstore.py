@@ -0,0 +1,105 @@
+"""
+Checkpoint size and serialization time with and without the document store.
+
+    python -m benchmarks.bench_docstore --requests 20 --loops 2
+
+Runs the self-RAG graph offline (fake LLM, in-memory retriever, fake web
+search) on a SqliteSaver, with every answer graded "not useful" ``--loops``
+times so web search and generate repeat. "inline" keeps whole documents in
+the state (RAG_STATE_DOCUMENT_REFS=false, the old behaviour); "refs" keeps
+document ids and the text in graph.docstore.
+
+Reported per request: checkpoint + pending-write bytes stored by the saver
+and time spent in the checkpoint serializer.
+"""
+
+import argparse
+import importlib
+import os
+import sqlite3
+import statistics
+import time
+
+os.environ.setdefault("RAG_LLM_PROVIDER", "fake")
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer  # noqa: E402
+from langgraph.checkpoint.sqlite import SqliteSaver  # noqa: E402
+
+from graph import fakes  # noqa: E402
+from graph.builder import build_graph  # noqa: E402
+from graph.chains.answer_grader import GradeAnswer  # noqa: E402
+from graph.chains.llm import get_llm  # noqa: E402
+from graph.config import get_settings  # noqa: E402
+from graph.consts import SELF_RAG  # noqa: E402
+
+
+class TimedSerializer(JsonPlusSerializer):
+    seconds = 0.0
+
+    def dumps_typed(self, obj):
+        start = time.perf_counter()
+        try:
+            return super().dumps_typed(obj)
+        finally:
+            TimedSerializer.seconds += time.perf_counter() - start
+
+
+def use_fake_backends(words_per_result: int) -> None:
+    retriever = fakes.fake_retriever(n_docs=50)
+    search = fakes.FakeSearchTool(words_per_result=words_per_result)
+    importlib.import_module("graph.nodes.retrieve").get_retriever = lambda: retriever
+    importlib.import_module("graph.search.providers").get_web_search_tool = lambda: search
+
+
+def stored_bytes(conn: sqlite3.Connection) -> int:
+    checkpoints = conn.execute(
+        "SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints"
+    ).fetchone()[0]
+    writes = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes").fetchone()[0]
+    return checkpoints + writes
+
+
+def run(refs: bool, requests: int, loops: int):
+    os.environ["RAG_STATE_DOCUMENT_REFS"] = "true" if refs else "false"
+    get_settings.cache_clear()
+    graded = {}
+
+    def responder(schema, prompt):
+        if schema is GradeAnswer:
+            graded[prompt] = graded.get(prompt, 0) + 1
+            return GradeAnswer(binary_score=sum(graded.values()) % (loops + 1) == 0)
+        return fakes.default_structured_response(schema, prompt)
+
+    get_llm().structured_responder = responder
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    saver = SqliteSaver(conn, serde=TimedSerializer())
+    saver.setup()
+    app = build_graph(SELF_RAG, checkpointer=saver)
+    sizes, serde_ms = [], []
+    for i in range(requests):
+        before, TimedSerializer.seconds = stored_bytes(conn), 0.0
+        config = {"configurable": {"thread_id": f"bench-{i}"}, "recursion_limit": 100}
+        app.invoke({"question": f"how do agents use memory {i}"}, config)
+        sizes.append(stored_bytes(conn) - before)
+        serde_ms.append(1000 * TimedSerializer.seconds)
+    return sizes, serde_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--loops", type=int, default=2)
+    parser.add_argument("--words-per-result", type=int, default=400)
+    args = parser.parse_args()
+
+    use_fake_backends(args.words_per_result)
+    for name, refs in (("inline", False), ("refs", True)):
+        sizes, serde_ms = run(refs, args.requests, args.loops)
+        print(
+            f"{name:<7} checkpoint KiB/request {statistics.fmean(sizes) / 1024:8.1f}   "
+            f"serialize ms/request {statistics.fmean(serde_ms):6.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
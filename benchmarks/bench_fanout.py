@@ -0,0 +1,115 @@
+"""
+Latency of questions that need web search: sequential routing vs fan-out.
+
+    python -m benchmarks.bench_fanout --questions 20 --llm-ms 100 --retriever-ms 150 --search-ms 400
+
+The fake router sends every question to the vectorstore with low
+confidence, and the fake grader only accepts documents containing the
+question, which none of the retrieved ones do. So the sequential graph
+always takes retrieve -> grade -> web search -> generate, the worst case.
+With ``RAG_ROUTE_FANOUT=uncertain`` the same questions run retrieval and web
+search in parallel and grade the union once.
+
+Each question runs alone (latency, not throughput), through invoke and
+through ainvoke.
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import statistics
+import time
+
+os.environ.setdefault("RAG_LLM_PROVIDER", "fake")
+
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+
+from graph import fakes  # noqa: E402
+from graph.builder import build_graph  # noqa: E402
+from graph.chains.llm import get_llm  # noqa: E402
+from graph.config import get_settings  # noqa: E402
+from graph.consts import CORRECTIVE, FANOUT_NEVER, FANOUT_UNCERTAIN  # noqa: E402
+
+
+def use_fake_backends(retriever_s: float, search_s: float) -> None:
+    inner = fakes.fake_retriever(n_docs=50)
+
+    def retrieve(query):
+        time.sleep(retriever_s)
+        return inner.invoke(query)
+
+    async def aretrieve(query):
+        await asyncio.sleep(retriever_s)
+        return await inner.ainvoke(query)
+
+    retriever = RunnableLambda(retrieve, afunc=aretrieve)
+    search = fakes.FakeSearchTool(latency_s=search_s)
+    importlib.import_module("graph.nodes.retrieve").get_retriever = lambda: retriever
+    importlib.import_module("graph.search.providers").get_web_search_tool = lambda: search
+
+
+def respond(schema, prompt: str):
+    response = fakes.default_structured_response(schema, prompt)
+    if schema.__name__ == "RouteQuery":
+        response.confidence = 0.3
+    elif schema.__name__ == "GradeDocuments":
+        question = prompt.rsplit("User question:", 1)[-1].strip()
+        document = prompt.rsplit("User question:", 1)[0]
+        response.binary_score = "yes" if question in document else "no"
+    return response
+
+
+def measure(policy: str, questions: int) -> dict:
+    os.environ["RAG_ROUTE_FANOUT"] = policy
+    get_settings.cache_clear()
+    app = build_graph(CORRECTIVE)
+    llm = get_llm()
+    results = {}
+
+    sync, calls = [], len(llm.calls)
+    for i in range(questions):
+        start = time.perf_counter()
+        app.invoke({"question": f"{policy} question {i}"}, {"configurable": {"thread_id": f"s{i}"}})
+        sync.append(time.perf_counter() - start)
+    results["invoke"] = (sync, (len(llm.calls) - calls) / questions)
+
+    async def run_async():
+        latencies = []
+        for i in range(questions):
+            config = {"configurable": {"thread_id": f"a{i}"}}
+            start = time.perf_counter()
+            await app.ainvoke({"question": f"{policy} async question {i}"}, config)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    calls = len(llm.calls)
+    results["ainvoke"] = (asyncio.run(run_async()), (len(llm.calls) - calls) / questions)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--llm-ms", type=float, default=100.0)
+    parser.add_argument("--retriever-ms", type=float, default=150.0)
+    parser.add_argument("--search-ms", type=float, default=400.0)
+    args = parser.parse_args()
+
+    use_fake_backends(args.retriever_ms / 1000, args.search_ms / 1000)
+    llm = get_llm()
+    llm.latency_s = args.llm_ms / 1000
+    llm.structured_responder = respond
+
+    rows = []
+    for policy in (FANOUT_NEVER, FANOUT_UNCERTAIN):
+        for mode, (latencies, calls) in measure(policy, args.questions).items():
+            rows.append((policy, mode, statistics.median(latencies), max(latencies), calls))
+
+    print(f"{'fanout':<10} {'mode':<8} {'p50_ms':>7} {'max_ms':>7} {'llm calls':>10}")
+    for policy, mode, p50, worst, calls in rows:
+        print(f"{policy:<10} {mode:<8} {p50 * 1000:>7.0f} {worst * 1000:>7.0f} {calls:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Connection reuse of the shared HTTP client under concurrent load.
+
+    python -m benchmarks.bench_http_clients --threads 16 --calls 400
+
+Runs the five chains' calls round-robin from a thread pool against a local
+OpenAI-compatible stand-in (graph.fakes.FakeOpenAIServer) and reports the
+number of TCP connections the server accepted, and call latency, for:
+
+    per-call    a new ChatOpenAI (and connection pool) for every call
+    per-chain   one ChatOpenAI per chain with its own pool (the old layout)
+    shared      every chain on the process-wide client from graph.clients
+"""
+
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_openai import ChatOpenAI
+
+from graph.chains.answer_grader import GradeAnswer, answer_prompt
+from graph.chains.hallucination_grader import GradeHallucinations, hallucination_prompt
+from graph.chains.prompts import rag_prompt
+from graph.chains.retrieval_grader import GradeDocuments, grade_prompt
+from graph.chains.router import RouteQuery, route_prompt
+from graph.clients import openai_client_kwargs, reset_clients
+from graph.config import get_settings
+from graph.fakes import FakeOpenAIServer
+
+INPUTS = [
+    {"question": "agent memory"},
+    {"question": "q", "document": "d"},
+    {"context": "c", "question": "q"},
+    {"documents": "d", "generation": "g"},
+    {"question": "q", "generation": "g"},
+]
+
+
+def make_chain(i: int, llm):
+    return [
+        lambda: route_prompt | llm.with_structured_output(RouteQuery),
+        lambda: grade_prompt | llm.with_structured_output(GradeDocuments),
+        lambda: rag_prompt | llm | StrOutputParser(),
+        lambda: hallucination_prompt | llm.with_structured_output(GradeHallucinations),
+        lambda: answer_prompt | llm.with_structured_output(GradeAnswer),
+    ][i % len(INPUTS)]()
+
+
+def run(mode: str, base_url: str, threads: int, calls: int, server: FakeOpenAIServer) -> None:
+    reset_clients()
+    if mode == "shared":
+        shared = ChatOpenAI(**openai_client_kwargs())
+        chains = [make_chain(i, shared) for i in range(len(INPUTS))]
+    else:
+        chains = [make_chain(i, ChatOpenAI(base_url=base_url)) for i in range(len(INPUTS))]
+
+    def one(i: int) -> float:
+        chain = chains[i % len(chains)]
+        if mode == "per-call":
+            chain = make_chain(i, ChatOpenAI(base_url=base_url))
+        t0 = time.perf_counter()
+        chain.invoke(INPUTS[i % len(INPUTS)])
+        return time.perf_counter() - t0
+
+    before = server.connections
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(one, range(calls)))
+    wall = time.perf_counter() - start
+    print(
+        f"{mode:<10} connections {server.connections - before:>5}   "
+        f"mean {1000 * statistics.fmean(latencies):6.1f} ms   "
+        f"p99 {1000 * latencies[int(0.99 * (len(latencies) - 1))]:6.1f} ms   "
+        f"{calls / wall:7.1f} calls/sec"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(latency_s=args.latency_ms / 1000) as server:
+        os.environ.setdefault("OPENAI_API_KEY", "bench")
+        os.environ["RAG_OPENAI_BASE_URL"] = server.base_url
+        get_settings.cache_clear()
+        for mode in ("per-call", "per-chain", "shared"):
+            run(mode, server.base_url, args.threads, args.calls, server)
+
+
+if __name__ == "__main__":
+    main()
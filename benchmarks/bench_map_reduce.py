@@ -0,0 +1,117 @@
+"""
+Generation over contexts larger than the model window: one prompt vs map-reduce.
+
+    python -m benchmarks.bench_map_reduce --context-tokens 3000,12000,24000,48000 --window 16000
+
+For each size, documents of about 500 tokens of filler are fed to the
+``generate`` node and then to the hallucination/answer grading edge, as the
+graph does. The fake LLM takes ``--llm-ms`` plus ``--ms-per-1k-tokens`` per
+prompt token (prefill) and fails any prompt over ``--window`` tokens, like a
+real model's context_length_exceeded error.
+
+    single      RAG_GENERATION_CONTEXT_TOKEN_BUDGET above every size: one prompt
+    map_reduce  the budget set to --budget: concurrent batches, then a combine
+
+Reports p50 latency of generate and of grading, failed runs and LLM calls.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("RAG_LLM_PROVIDER", "fake")
+
+from langchain_core.documents import Document  # noqa: E402
+
+from graph import fakes  # noqa: E402
+from graph.chains.llm import get_llm  # noqa: E402
+from graph.config import get_settings  # noqa: E402
+from graph.edges import (  # noqa: E402
+    agrade_generation_grounded_in_documents_and_question,
+    grade_generation_grounded_in_documents_and_question,
+)
+from graph.nodes.generate import agenerate, generate  # noqa: E402
+from graph.tokens import count_tokens  # noqa: E402
+
+
+def make_documents(context_tokens: int, seed: int):
+    documents, tokens = [], 0
+    while tokens < context_tokens:
+        text = fakes.lorem(400, seed=seed * 1000 + len(documents))
+        documents.append(Document(page_content=text, metadata={"source": f"doc_{len(documents)}"}))
+        tokens += count_tokens(text)
+    return documents
+
+
+def run_sync(state):
+    start = time.perf_counter()
+    state = {**state, **generate(state)}
+    generated = time.perf_counter()
+    grade_generation_grounded_in_documents_and_question(state)
+    return generated - start, time.perf_counter() - generated
+
+
+def run_async(state):
+    async def run():
+        start = time.perf_counter()
+        update = await agenerate(state)
+        generated = time.perf_counter()
+        await agrade_generation_grounded_in_documents_and_question({**state, **update})
+        return generated - start, time.perf_counter() - generated
+
+    return asyncio.run(run())
+
+
+def measure(budget: int, context_tokens: int, runs: int, mode: str):
+    os.environ["RAG_GENERATION_CONTEXT_TOKEN_BUDGET"] = str(budget)
+    get_settings.cache_clear()
+    llm = get_llm()
+    generate_s, grade_s, failures, calls = [], [], 0, len(llm.calls)
+    for i in range(runs):
+        state = {"question": "agent memory", "documents": make_documents(context_tokens, i)}
+        try:
+            gen, grade = (run_async if mode == "ainvoke" else run_sync)(state)
+        except fakes.ContextWindowExceeded:
+            failures += 1
+            continue
+        generate_s.append(gen)
+        grade_s.append(grade)
+    return generate_s, grade_s, failures, (len(llm.calls) - calls) / runs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--context-tokens", default="3000,12000,24000,48000")
+    parser.add_argument("--budget", type=int, default=6000)
+    parser.add_argument("--window", type=int, default=16000)
+    parser.add_argument("--llm-ms", type=float, default=300.0)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=100.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    llm = get_llm()
+    llm.latency_s = args.llm_ms / 1000
+    llm.latency_per_token_s = args.ms_per_1k_tokens / 1000 / 1000
+    llm.context_window = args.window
+
+    def ms(values):
+        return f"{statistics.median(values) * 1000:.0f}" if values else "-"
+
+    print(
+        f"{'context':>8} {'strategy':<11} {'mode':<8} {'generate_ms':>11} "
+        f"{'grade_ms':>9} {'failed':>7} {'llm calls':>10}"
+    )
+    for context_tokens in (int(t) for t in args.context_tokens.split(",")):
+        for strategy, budget in (("single", 10**9), ("map_reduce", args.budget)):
+            for mode in ("invoke", "ainvoke"):
+                gen, grade, failed, calls = measure(budget, context_tokens, args.runs, mode)
+                print(
+                    f"{context_tokens:>8} {strategy:<11} {mode:<8} {ms(gen):>11} "
+                    f"{ms(grade):>9} {failed:>4}/{args.runs:<2} {calls:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Memory and cold start of pre-forked workers versus independent processes.
+
+    python -m benchmarks.bench_prefork --workers 4 --docs 5000 --requests 50
+
+Every worker holds the corrective graph on fake backends (offline fake LLM,
+fake web search, an in-memory index of ``--docs`` generated documents
+embedded with HashingEmbeddings), answers ``--requests`` questions, and then
+reports how long it took from process start (or fork) to its first answer.
+Three ways to get N such workers:
+
+    independent      N fresh interpreters, each importing and warming alone
+    prefork          graph.prefork: one master warms with the collector
+                     disabled, gc.freeze(), then forks the N workers
+    prefork-nofreeze the same without gc.freeze(), so collections in the
+                     workers write to the shared objects
+
+Memory is read from /proc/<pid>/smaps_rollup once every worker is done:
+USS (private pages, freed if the worker exits) and PSS (private plus its
+share of shared pages); "total PSS" adds up the workers and the master,
+i.e. the memory the whole server actually uses. Linux only.
+
+The fake index is an InMemoryVectorStore: every query reads every stored
+vector as Python floats, and the reference counting writes to (and so copies)
+all of their pages in each worker. Chroma keeps its HNSW index in native
+memory, which queries only read; run with a small ``--docs`` to see the
+workers' private memory without that effect.
+"""
+
+import argparse
+import asyncio
+import gc
+import importlib
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import types
+from functools import partial
+from typing import Dict, List
+
+os.environ.setdefault("RAG_LLM_PROVIDER", "fake")
+
+from graph import fakes  # noqa: E402
+
+MIB = 1024 * 1024
+
+
+def use_fake_backends(n_docs: int) -> None:
+    retriever = fakes.fake_retriever(n_docs=n_docs)
+    search = fakes.FakeSearchTool()
+    importlib.import_module("graph.nodes.retrieve").get_retriever = lambda: retriever
+    importlib.import_module("graph.search.providers").get_web_search_tool = lambda: search
+
+
+def memory(pid: int) -> Dict[str, int]:
+    """Rss, Pss and Uss of ``pid`` in bytes."""
+    values: Dict[str, int] = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if rest.strip().endswith("kB"):
+                values[name] = int(rest.split()[0]) * 1024
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "uss": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+def report(fd: int, line: str) -> None:
+    # One write per line, shorter than PIPE_BUF: lines from workers sharing
+    # the pipe never interleave.
+    os.write(fd, f"{line}\n".encode())
+
+
+def answer(app, requests: int, started: float, fd: int) -> None:
+    """Answer ``requests`` questions and report the time to the first answer."""
+
+    async def run() -> None:
+        for i in range(requests):
+            config = {"configurable": {"thread_id": str(i)}}
+            await app.graph.ainvoke({"question": f"agent memory {i}"}, config)
+            if i == 0:
+                report(fd, f"first {os.getpid()} {time.monotonic() - started}")
+
+    asyncio.run(run())
+    report(fd, f"done {os.getpid()}")
+
+
+def worker(args: argparse.Namespace) -> None:
+    from graph.prefork import warm
+
+    use_fake_backends(args.docs)
+    answer(warm(), args.requests, args.started, args.report_fd)
+    sys.stdin.read()
+
+
+def master(args: argparse.Namespace) -> None:
+    from graph import prefork
+
+    gc.disable()
+    use_fake_backends(args.docs)
+    app = prefork.warm()
+    if args.mode == "prefork-nofreeze":
+        prefork.gc = types.SimpleNamespace(freeze=lambda: None, enable=gc.enable)
+        gc.enable()
+
+    class Timed(prefork.PreforkServer):
+        def spawn(self) -> int:
+            self.forked_at = time.monotonic()
+            return super().spawn()
+
+    def serve(app, sock, max_requests) -> None:
+        answer(app, args.requests, server.forked_at, args.report_fd)
+        signal.pause()
+
+    server = Timed(app, sock=None, workers=args.workers, serve=serve)
+    server.run()
+
+
+def measure(mode: str, args: argparse.Namespace) -> Dict[str, float]:
+    command = [sys.executable, "-m", "benchmarks.bench_prefork", "--docs", str(args.docs)]
+    read_fd, write_fd = os.pipe()
+    command += ["--requests", str(args.requests), "--mode", mode, "--report-fd", str(write_fd)]
+    # The nodes' progress output goes nowhere; reports come back on the pipe.
+    spawn = partial(
+        subprocess.Popen, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, pass_fds=(write_fd,)
+    )
+    if mode == "independent":
+        procs = [
+            spawn(command + ["--role", "worker", "--started", str(time.monotonic())])
+            for _ in range(args.workers)
+        ]
+    else:
+        procs = [spawn(command + ["--role", "master", "--workers", str(args.workers)])]
+    os.close(write_fd)
+
+    cold: List[float] = []
+    workers: List[int] = []
+    with os.fdopen(read_fd) as reports:
+        while len(workers) < args.workers:
+            line = reports.readline()
+            if not line:
+                raise RuntimeError(f"{mode}: a worker exited early")
+            kind, pid, *rest = line.split()
+            if kind == "first":
+                cold.append(float(rest[0]))
+            else:
+                workers.append(int(pid))
+    usage = [memory(pid) for pid in workers]
+    total_pss = sum(u["pss"] for u in usage)
+    if mode != "independent":
+        total_pss += memory(procs[0].pid)["pss"]
+        procs[0].send_signal(signal.SIGTERM)
+    for proc in procs:
+        proc.stdin.close()
+        proc.wait()
+    return {
+        "cold_ms": statistics.median(cold) * 1000,
+        "uss": statistics.mean(u["uss"] for u in usage) / MIB,
+        "pss": statistics.mean(u["pss"] for u in usage) / MIB,
+        "rss": statistics.mean(u["rss"] for u in usage) / MIB,
+        "total_pss": total_pss / MIB,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--mode", default="independent,prefork,prefork-nofreeze")
+    parser.add_argument("--role", default="bench", help=argparse.SUPPRESS)
+    parser.add_argument("--started", type=float, default=0.0, help=argparse.SUPPRESS)
+    parser.add_argument("--report-fd", type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.role == "worker":
+        return worker(args)
+    if args.role == "master":
+        return master(args)
+
+    print(
+        f"{'mode':<17} {'workers':>7} {'cold_ms':>8} {'rss_mib':>8} {'uss_mib':>8} "
+        f"{'pss_mib':>8} {'total_pss_mib':>13}"
+    )
+    for mode in args.mode.split(","):
+        r = measure(mode, args)
+        print(
+            f"{mode:<17} {args.workers:>7} {r['cold_ms']:>8.0f} {r['rss']:>8.1f} "
+            f"{r['uss']:>8.1f} {r['pss']:>8.1f} {r['total_pss']:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
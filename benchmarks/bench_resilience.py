@@ -0,0 +1,119 @@
+"""
+LLM calls against a provider that rate limits: SDK retries versus graph.resilience.
+
+    python -m benchmarks.bench_resilience --clients 16 --capacity 20 --duration 20
+
+``--clients`` tasks call ChatOpenAI back to back for ``--duration`` seconds
+against a local OpenAI-compatible stand-in (graph.fakes.FakeOpenAIServer)
+that accepts ``--capacity`` requests a second and answers 429 with
+"Retry-After: 1" beyond that, plus to ``--rate-limit-prob`` of the others;
+``--spike-prob`` of the requests take ``--spike-s`` longer. Three clients,
+each allowed the same three attempts per call:
+
+    sdk          the OpenAI SDK's own retries (max_retries=2), on a client of
+                 its own; it sleeps exactly the Retry-After it was given
+    guard        the shared clients of graph.clients: retries with jitter
+                 in the transport, no client-side rate limit
+    guard+limit  the same with RAG_LLM_REQUESTS_PER_MIN at ``--limit-share``
+                 of the capacity, so calls wait locally instead of collecting
+                 429s
+
+Reported per client: successful calls per second, the share of calls that
+failed (after all their attempts), the share of requests the server answered
+with 429, requests sent per successful call, and p50/p99 latency of the
+successful calls.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Dict, List
+
+from langchain_openai import ChatOpenAI
+
+from graph.clients import openai_client_kwargs, reset_clients
+from graph.config import get_settings
+from graph.fakes import FakeOpenAIServer
+
+MODES = ("sdk", "guard", "guard+limit")
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else float("nan")
+
+
+def make_llm(mode: str, server: FakeOpenAIServer, args: argparse.Namespace) -> ChatOpenAI:
+    os.environ["RAG_OPENAI_BASE_URL"] = server.base_url
+    os.environ["RAG_RETRY_MAX_ATTEMPTS"] = "3"
+    os.environ["RAG_LLM_REQUESTS_PER_MIN"] = (
+        str(args.capacity * args.limit_share * 60) if mode == "guard+limit" else "0"
+    )
+    get_settings.cache_clear()
+    reset_clients()
+    if mode == "sdk":
+        return ChatOpenAI(base_url=server.base_url, max_retries=2)
+    return ChatOpenAI(**openai_client_kwargs())
+
+
+async def load(llm: ChatOpenAI, args: argparse.Namespace) -> Dict[str, List[float]]:
+    outcomes: Dict[str, List[float]] = {"ok": [], "failed": []}
+    stop = time.perf_counter() + args.duration
+
+    async def client() -> None:
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                await llm.ainvoke("agent memory")
+                outcomes["ok"].append(time.perf_counter() - start)
+            except Exception:
+                outcomes["failed"].append(time.perf_counter() - start)
+
+    await asyncio.gather(*(client() for _ in range(args.clients)))
+    # Close the connections from this loop, before asyncio.run closes it.
+    await llm.root_async_client.close()
+    return outcomes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--capacity", type=float, default=20.0)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--rate-limit-prob", type=float, default=0.02)
+    parser.add_argument("--spike-prob", type=float, default=0.05)
+    parser.add_argument("--spike-s", type=float, default=1.0)
+    parser.add_argument("--limit-share", type=float, default=0.9)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--mode", default=",".join(MODES))
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    print(
+        f"{'mode':<12} {'calls':>6} {'ok/s':>6} {'failed':>7} {'429s':>6} "
+        f"{'req/ok':>7} {'p50_ms':>7} {'p99_ms':>7}"
+    )
+    for mode in args.mode.split(","):
+        server = FakeOpenAIServer(
+            latency_s=args.latency_ms / 1000,
+            requests_per_s=args.capacity,
+            rate_limit_prob=args.rate_limit_prob,
+            spike_prob=args.spike_prob,
+            spike_s=args.spike_s,
+        )
+        with server:
+            outcomes = asyncio.run(load(make_llm(mode, server, args), args))
+        ok, failed = outcomes["ok"], outcomes["failed"]
+        calls = len(ok) + len(failed)
+        print(
+            f"{mode:<12} {calls:>6} {len(ok) / args.duration:>6.1f} "
+            f"{len(failed) / max(1, calls):>7.1%} "
+            f"{server.rate_limited / max(1, server.requests):>6.0%} "
+            f"{server.requests / max(1, len(ok)):>7.2f} "
+            f"{percentile(ok, 0.5) * 1000:>7.0f} {percentile(ok, 0.99) * 1000:>7.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Database size and write latency over a long synthetic load, with and
+without checkpoint retention.
+
+    python -m benchmarks.bench_retention --requests 20000 --window 2000
+
+Every request is a new thread with ``--steps`` checkpoints (~4 KB each) plus
+one pending write per step, written through SqliteSaver on a tuned file
+from graph.checkpointers. With retention a RetentionWorker prunes to
+``--keep-last`` checkpoints per thread and ``--ttl-s`` of history and
+releases pages incrementally, concurrently with the writes. Reported per
+window of requests: file size (db + WAL), checkpoint rows, and p50/p99
+latency of a single checkpoint write.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from graph.checkpointers import connect_sqlite
+from graph.retention import RetentionWorker
+
+
+def file_mb(path: str) -> float:
+    return sum(
+        os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p)
+    ) / (1024 * 1024)
+
+
+def run(path: str, args, retention: bool) -> None:
+    saver = SqliteSaver(connect_sqlite(path))
+    saver.setup()
+    worker = None
+    if retention:
+        worker = RetentionWorker(
+            path, keep_last=args.keep_last, ttl_s=args.ttl_s, interval_s=args.interval_s
+        ).start()
+    payload = os.urandom(2000).hex()
+    latencies = []
+    print(f"\n{'with' if retention else 'without'} retention")
+    print(f"{'requests':>9} {'file_mb':>8} {'rows':>7} {'p50_ms':>7} {'p99_ms':>7}")
+    for r in range(1, args.requests + 1):
+        config = {"configurable": {"thread_id": f"request-{r}", "checkpoint_ns": ""}}
+        for step in range(args.steps):
+            checkpoint = empty_checkpoint()
+            checkpoint["channel_values"] = {"generation": payload, "step": step}
+            start = time.perf_counter()
+            config = saver.put(config, checkpoint, {"step": step}, {})
+            latencies.append(time.perf_counter() - start)
+            saver.put_writes(config, [("generation", payload[:500])], task_id=f"task-{step}")
+        if r % args.window == 0:
+            latencies.sort()
+            rows = saver.conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+            print(
+                f"{r:>9} {file_mb(path):>8.1f} {rows:>7} "
+                f"{1000 * statistics.median(latencies):>7.3f} "
+                f"{1000 * latencies[int(0.99 * (len(latencies) - 1))]:>7.3f}"
+            )
+            latencies = []
+    if worker is not None:
+        worker.stop()
+    saver.conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--window", type=int, default=2000)
+    parser.add_argument("--keep-last", type=int, default=2)
+    parser.add_argument("--ttl-s", type=float, default=5.0)
+    parser.add_argument("--interval-s", type=float, default=1.0)
+    parser.add_argument("--dir", help="directory for the SQLite files (default: a temp dir)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        run(os.path.join(tmp, "unbounded.sqlite"), args, retention=False)
+        run(os.path.join(tmp, "retention.sqlite"), args, retention=True)
+
+
+if __name__ == "__main__":
+    main()
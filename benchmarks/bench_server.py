@@ -0,0 +1,111 @@
+"""
+Load test of the HTTP service (graph.server), offline.
+
+    python -m benchmarks.bench_server --llm-ms 100 --concurrency 1,16,64,256
+
+Runs the corrective graph on fake backends (fake LLM with ``--llm-ms`` per
+call, in-memory retriever, fake web search) behind ``GraphService`` and
+sends it N concurrent clients through ``httpx.ASGITransport``: the HTTP
+layer, JSON and SSE encoding, timeouts and the graph are all exercised,
+the socket and the ASGI server are not. Each client sends its next request
+as soon as the previous one is answered, with a new thread_id every time.
+
+Reports requests/sec and p50/p95/p99 latency for /invoke and /stream (for
+/stream, until the ``end`` event), plus the share of failed requests. The
+transport buffers responses, so time to the first streamed token is not
+measured here.
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import time
+from typing import List, Tuple
+
+os.environ.setdefault("RAG_LLM_PROVIDER", "fake")
+
+import httpx  # noqa: E402
+
+from graph import fakes  # noqa: E402
+from graph.builder import build_graph  # noqa: E402
+from graph.chains.llm import get_llm  # noqa: E402
+from graph.consts import CORRECTIVE  # noqa: E402
+from graph.server import GraphService  # noqa: E402
+
+
+def use_fake_backends() -> None:
+    retriever = fakes.fake_retriever(n_docs=50)
+    search = fakes.FakeSearchTool()
+    importlib.import_module("graph.nodes.retrieve").get_retriever = lambda: retriever
+    importlib.import_module("graph.search.providers").get_web_search_tool = lambda: search
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def load(
+    service: GraphService, path: str, concurrency: int, requests: int
+) -> Tuple[List[float], int, float]:
+    transport = httpx.ASGITransport(app=service)
+    latencies: List[float] = []
+    failures = 0
+    remaining = iter(range(requests))
+
+    async def client(http: httpx.AsyncClient) -> None:
+        nonlocal failures
+        for i in remaining:
+            body = {"question": f"agent memory {i}", "thread_id": f"{path}-{concurrency}-{i}"}
+            start = time.perf_counter()
+            response = await http.post(path, json=body)
+            ok = response.status_code == 200 and (
+                path != "/stream" or "event: end" in response.text
+            )
+            latencies.append(time.perf_counter() - start)
+            failures += not ok
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, failures, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-ms", type=float, default=100.0)
+    parser.add_argument("--concurrency", default="1,16,64,256")
+    parser.add_argument("--rounds", type=int, default=3, help="requests per client")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    use_fake_backends()
+    get_llm().latency_s = args.llm_ms / 1000
+    service = GraphService(
+        graph=build_graph(CORRECTIVE), variant=CORRECTIVE, request_timeout_s=args.timeout
+    )
+
+    print(
+        f"{'path':<8} {'clients':>7} {'req/s':>7} {'p50_ms':>7} {'p95_ms':>7} "
+        f"{'p99_ms':>7} {'failed':>7}"
+    )
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        for path in ("/invoke", "/stream"):
+            latencies, failures, elapsed = asyncio.run(
+                load(service, path, concurrency, concurrency * args.rounds)
+            )
+            print(
+                f"{path:<8} {concurrency:>7} {len(latencies) / elapsed:>7.1f} "
+                f"{percentile(latencies, 0.5) * 1000:>7.0f} "
+                f"{percentile(latencies, 0.95) * 1000:>7.0f} "
+                f"{percentile(latencies, 0.99) * 1000:>7.0f} "
+                f"{failures / len(latencies):>7.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Prompt size and latency with ranked web passages vs one concatenated document.
+
+    python -m benchmarks.bench_web_ranking --questions 50
+
+For every question a fixture of three Tavily-shaped results (~1000 words
+each, one containing the answer sentence) is generated deterministically.
+"concatenated" is the old behaviour (every result joined into a single
+Document); "ranked" is graph.search.rank with the default settings.
+Latency covers ranking plus the generate and hallucination-grader calls on
+the fake LLM, whose latency grows with prompt tokens (--ms-per-1k-tokens)
+to model prefill cost.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("RAG_LLM_PROVIDER", "fake")
+
+from langchain_core.documents import Document  # noqa: E402
+
+from graph.chains.generation import get_generation_chain  # noqa: E402
+from graph.chains.hallucination_grader import get_hallucination_grader  # noqa: E402
+from graph.chains.llm import get_llm  # noqa: E402
+from graph.chains.prompts import rag_prompt  # noqa: E402
+from graph.config import get_settings  # noqa: E402
+from graph.fakes import lorem  # noqa: E402
+from graph.search.rank import rank_results  # noqa: E402
+from graph.tokens import count_tokens  # noqa: E402
+
+
+def fixture(i: int):
+    rng = random.Random(i)
+    thing, lab = f"engine{i}x", f"lab{i}k"
+    results = [
+        {"url": f"https://example.com/{i}/{r}", "content": lorem(1000, seed=i * 10 + r)}
+        for r in range(3)
+    ]
+    target = rng.randrange(3)
+    words = results[target]["content"].split()
+    words.insert(rng.randrange(len(words)), f"\n\nThe {thing} was built by {lab}.\n\n")
+    results[target]["content"] = " ".join(words)
+    return f"Who built the {thing}?", lab, results
+
+
+def run(mode: str, questions: int):
+    settings = get_settings()
+    tokens, latencies, kept = [], [], 0
+    for i in range(questions):
+        question, answer, results = fixture(i)
+        start = time.perf_counter()
+        if mode == "ranked":
+            documents = rank_results(
+                question,
+                results,
+                chunk_tokens=settings.web_search_chunk_tokens,
+                token_budget=settings.web_search_token_budget,
+                max_passages=settings.web_search_max_passages,
+            )
+        else:
+            documents = [Document(page_content="\n".join(r["content"] for r in results))]
+        generation = get_generation_chain().invoke({"context": documents, "question": question})
+        get_hallucination_grader().invoke({"documents": documents, "generation": generation})
+        latencies.append(time.perf_counter() - start)
+        prompt = rag_prompt.format(context=documents, question=question)
+        tokens.append(count_tokens(prompt))
+        kept += any(answer in d.page_content for d in documents)
+    return tokens, latencies, kept
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=50.0)
+    args = parser.parse_args()
+
+    get_llm().latency_per_token_s = args.ms_per_1k_tokens / 1000 / 1000
+    for mode in ("concatenated", "ranked"):
+        tokens, latencies, kept = run(mode, args.questions)
+        print(
+            f"{mode:<13} prompt tokens mean {statistics.fmean(tokens):7.0f}   "
+            f"latency mean {1000 * statistics.fmean(latencies):6.1f} ms   "
+            f"answer kept {kept}/{args.questions}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Web search tail latency with deadlines, hedging and provider fan-out.
+
+    python -m benchmarks.bench_web_search --queries 400 --concurrency 20
+
+Fake providers answer in ~``median`` (log-normal) but stall for ``tail`` with
+probability ``tail-prob``. Reports p50/p99/max and the number of provider
+calls (after a 100-query warm-up) for a single provider, the same provider with hedging at p90, and a
+race between two independent providers.
+"""
+
+import argparse
+import asyncio
+import time
+
+from graph.fakes import FakeSearchProvider
+from graph.search.client import WebSearchClient, WebSearchTimeout
+
+
+async def run(client: WebSearchClient, queries: int, concurrency: int):
+    limit = asyncio.Semaphore(concurrency)
+    latencies, timeouts = [], 0
+
+    async def one(i: int) -> None:
+        nonlocal timeouts
+        async with limit:
+            start = time.perf_counter()
+            try:
+                await client.asearch(f"question {i}")
+            except WebSearchTimeout:
+                timeouts += 1
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(queries)))
+    return sorted(latencies), timeouts
+
+
+def pct(values, q: float) -> float:
+    return 1000 * values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--median", type=float, default=0.05)
+    parser.add_argument("--tail", type=float, default=1.5)
+    parser.add_argument("--tail-prob", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=3.0)
+    args = parser.parse_args()
+
+    def provider(name: str, seed: int) -> FakeSearchProvider:
+        return FakeSearchProvider(
+            name, median_s=args.median, tail_prob=args.tail_prob, tail_s=args.tail, seed=seed
+        )
+
+    setups = {
+        "single": lambda: WebSearchClient(
+            [provider("a", 1)], timeout_s=args.timeout, hedge_quantile=None
+        ),
+        "single + hedge p90": lambda: WebSearchClient(
+            [provider("a", 1)], timeout_s=args.timeout, hedge_quantile=0.9
+        ),
+        "race 2 providers": lambda: WebSearchClient(
+            [provider("a", 1), provider("b", 2)], timeout_s=args.timeout, hedge_quantile=None
+        ),
+    }
+    for label, make in setups.items():
+        client = make()
+        # Warm up so hedging has latency samples, as in a long-running process.
+        asyncio.run(run(client, 100, args.concurrency))
+        warmup_calls = sum(p.calls for p in client.providers)
+        latencies, timeouts = asyncio.run(run(client, args.queries, args.concurrency))
+        calls = sum(p.calls for p in client.providers) - warmup_calls
+        print(
+            f"{label:<20} p50 {pct(latencies, 0.5):7.1f} ms   p99 {pct(latencies, 0.99):7.1f} ms   "
+            f"max {1000 * latencies[-1]:7.1f} ms   provider calls {calls:5d}   timeouts {timeouts}"
+        )
+
+
+if __name__ == "__main__":
+    main()
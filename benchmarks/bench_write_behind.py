@@ -0,0 +1,97 @@
+"""
+Per-step latency and durability window of write-behind checkpointing.
+
+    python -m benchmarks.bench_write_behind --requests 100 --synchronous FULL
+
+Runs the self-RAG graph offline (fake LLM, in-memory retriever, fake web
+search) one request at a time on a SQLite file, first with the plain tuned
+SqliteSaver and then wrapped in WriteBehindSaver. Reported: mean request
+and per-step latency (request latency / checkpoints written), SQLite
+transactions, and for write-behind the enqueue-to-commit lag, i.e. how long
+a checkpoint could be lost if the process died.
+"""
+
+import argparse
+import importlib
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("RAG_LLM_PROVIDER", "fake")
+
+from langgraph.checkpoint.sqlite import SqliteSaver  # noqa: E402
+
+from graph import fakes  # noqa: E402
+from graph.builder import build_graph  # noqa: E402
+from graph.chains.llm import get_llm  # noqa: E402
+from graph.checkpointers import connect_sqlite  # noqa: E402
+from graph.consts import SELF_RAG  # noqa: E402
+from graph.write_behind import (  # noqa: E402
+    WriteBehindSaver,
+    write_batches,
+    write_lag,
+    writes_behind,
+)
+
+
+def use_fake_backends() -> None:
+    retriever = fakes.fake_retriever(n_docs=50)
+    search = fakes.FakeSearchTool()
+    importlib.import_module("graph.nodes.retrieve").get_retriever = lambda: retriever
+    importlib.import_module("graph.search.providers").get_web_search_tool = lambda: search
+
+
+def run(saver, requests: int):
+    app = build_graph(SELF_RAG, checkpointer=saver)
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        app.invoke({"question": f"agent memory {i}"}, {"configurable": {"thread_id": f"r-{i}"}})
+        latencies.append(time.perf_counter() - start)
+    if isinstance(saver, WriteBehindSaver):
+        saver.flush()
+        conn = saver.inner.conn
+    else:
+        conn = saver.conn
+    steps = conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0] / requests
+    return latencies, steps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--synchronous", default="NORMAL", help="SQLite synchronous pragma")
+    parser.add_argument("--llm-ms", type=float, default=0.0)
+    parser.add_argument("--dir", help="directory for the SQLite files (default: a temp dir)")
+    args = parser.parse_args()
+
+    os.environ["RAG_SQLITE_SYNCHRONOUS"] = args.synchronous
+    use_fake_backends()
+    get_llm().latency_s = args.llm_ms / 1000
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        plain = SqliteSaver(connect_sqlite(os.path.join(tmp, "plain.sqlite")))
+        behind = WriteBehindSaver(SqliteSaver(connect_sqlite(os.path.join(tmp, "behind.sqlite"))))
+        print(f"synchronous={args.synchronous}")
+        for name, saver in (("sqlite", plain), ("write-behind", behind)):
+            batches = write_batches.value()
+            latencies, steps = run(saver, args.requests)
+            mean = statistics.fmean(latencies)
+            commits = (
+                f"{write_batches.value() - batches:.0f}" if saver is behind else "per write"
+            )
+            print(
+                f"{name:<13} request {1000 * mean:6.2f} ms   step {1000 * mean / steps:5.2f} ms"
+                f"   transactions {commits}"
+            )
+        ops = writes_behind.value(kind="put") + writes_behind.value(kind="writes")
+        lag_ms = 1000 * write_lag.sum() / write_lag.count()
+        print(
+            f"write-behind {ops:.0f} writes, lag mean {lag_ms:.2f} ms, "
+            f"max {1000 * behind.max_lag_s:.2f} ms"
+        )
+        behind.close()
+
+
+if __name__ == "__main__":
+    main()
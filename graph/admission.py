@@ -0,0 +1,219 @@
+"""
+Admission control in front of the compiled graph.
+
+At most ``max_concurrency`` requests run the graph at once; the others wait
+in a bounded queue. Waiting requests are served
+
+    by priority    every ``interactive`` request before any ``batch`` one
+    by tenant      within a priority, tenants take turns (one request each),
+                   so one tenant's burst does not delay everybody else
+    by arrival     within a tenant, first come first served
+
+A request is rejected with ``AdmissionRejected`` instead of queued when
+
+    queue_full  the queue holds ``max_queue`` requests (an interactive
+                request first displaces the newest batch request of the
+                tenant with the most queued, which is rejected as "shed")
+    deadline    its estimated wait plus the estimated run time exceeds its
+                deadline; both come from the recent run times, so nothing
+                is rejected this way before the first run has finished
+    expired     its deadline passes while it is still queued
+
+so under overload the requests that can still finish in time get the
+capacity, and the rest learn at once (with a Retry-After estimate) rather
+than timing out after queueing. ``max_concurrency`` should match what the
+providers sustain, e.g. ``RAG_LLM_MAX_CONCURRENCY`` divided by the LLM calls
+a run makes at once. The queues, like graph.limits' semaphores, are kept per
+event loop.
+"""
+
+import asyncio
+import math
+import time
+import weakref
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from graph.metrics import counter, histogram
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+# In the order they are served.
+PRIORITIES = (INTERACTIVE, BATCH)
+
+admission_requests = counter(
+    "admission_requests_total", "Admission decisions by priority and outcome"
+)
+admission_wait = histogram("admission_wait_seconds", "Time queued before admission")
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after_s: float):
+        super().__init__(f"request rejected ({reason}), retry after {retry_after_s:.0f}s")
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+class _Waiter:
+    def __init__(self, tenant: str, priority: str):
+        self.tenant = tenant
+        self.priority = priority
+        self.admitted: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class _Queues:
+    def __init__(self):
+        self.running = 0
+        self.size = 0
+        # priority -> tenant -> waiters; the first tenant is served next.
+        self.tenants: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {
+            priority: OrderedDict() for priority in PRIORITIES
+        }
+
+    def push(self, waiter: _Waiter) -> None:
+        self.tenants[waiter.priority].setdefault(waiter.tenant, deque()).append(waiter)
+        self.size += 1
+
+    def pop(self) -> Optional[_Waiter]:
+        for tenants in self.tenants.values():
+            if tenants:
+                tenant, waiters = next(iter(tenants.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    tenants.move_to_end(tenant)
+                else:
+                    del tenants[tenant]
+                self.size -= 1
+                return waiter
+        return None
+
+    def remove(self, waiter: _Waiter) -> bool:
+        waiters = self.tenants[waiter.priority].get(waiter.tenant)
+        if waiters is None or waiter not in waiters:
+            return False
+        waiters.remove(waiter)
+        if not waiters:
+            del self.tenants[waiter.priority][waiter.tenant]
+        self.size -= 1
+        return True
+
+    def ahead_of(self, tenant: str, priority: str) -> int:
+        """Queued requests a new one from ``tenant`` would wait for, taking turns."""
+        ahead = 0
+        for p in PRIORITIES:
+            tenants = self.tenants[p]
+            if p == priority:
+                own = len(tenants.get(tenant, ()))
+                return ahead + sum(min(len(waiters), own + 1) for waiters in tenants.values())
+            ahead += sum(len(waiters) for waiters in tenants.values())
+        return ahead
+
+    def newest_batch(self) -> Optional[_Waiter]:
+        tenants = self.tenants[BATCH]
+        if not tenants:
+            return None
+        return max(tenants.values(), key=len)[-1]
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency: int, max_queue: int, smoothing: float = 0.2):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.smoothing = smoothing
+        # Exponentially weighted mean run time; None until a run finishes.
+        self.run_time_s: Optional[float] = None
+        self._queues: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def _state(self) -> _Queues:
+        loop = asyncio.get_running_loop()
+        if loop not in self._queues:
+            self._queues[loop] = _Queues()
+        return self._queues[loop]
+
+    def estimated_wait(self, tenant: str = "default", priority: str = INTERACTIVE) -> float:
+        """Seconds a request arriving now would queue, from the recent run times."""
+        state = self._state()
+        ahead = state.ahead_of(tenant, priority)
+        if self.run_time_s is None or (state.running < self.max_concurrency and not ahead):
+            return 0.0
+        return (ahead + 1) * self.run_time_s / self.max_concurrency
+
+    def _reject(self, reason: str, priority: str, retry_after_s: float) -> AdmissionRejected:
+        admission_requests.inc(priority=priority, outcome=reason)
+        return AdmissionRejected(reason, max(1.0, math.ceil(retry_after_s)))
+
+    def _release(self, state: _Queues, run_time_s: Optional[float] = None) -> None:
+        if run_time_s is not None:
+            previous = run_time_s if self.run_time_s is None else self.run_time_s
+            self.run_time_s = previous + self.smoothing * (run_time_s - previous)
+        state.running -= 1
+        while state.running < self.max_concurrency:
+            waiter = state.pop()
+            if waiter is None:
+                return
+            if not waiter.admitted.done():
+                state.running += 1
+                waiter.admitted.set_result(None)
+
+    async def _admit(self, tenant: str, priority: str, deadline_s: Optional[float]) -> None:
+        if priority not in PRIORITIES:
+            raise ValueError(f"unknown priority {priority!r}, expected one of {PRIORITIES}")
+        state = self._state()
+        if state.running < self.max_concurrency and not state.size:
+            state.running += 1
+            admission_requests.inc(priority=priority, outcome="admitted")
+            admission_wait.observe(0.0, priority=priority)
+            return
+        wait = self.estimated_wait(tenant, priority)
+        if deadline_s is not None and wait + (self.run_time_s or 0.0) > deadline_s:
+            raise self._reject("deadline", priority, wait)
+        if state.size >= self.max_queue:
+            shed = state.newest_batch() if priority == INTERACTIVE else None
+            if shed is None:
+                raise self._reject("queue_full", priority, wait)
+            state.remove(shed)
+            shed.admitted.set_exception(self._reject("shed", BATCH, wait))
+
+        waiter = _Waiter(tenant, priority)
+        state.push(waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.admitted), deadline_s)
+        except asyncio.TimeoutError:
+            state.remove(waiter)
+            if not waiter.admitted.done():
+                waiter.admitted.cancel()
+            elif not waiter.admitted.cancelled() and waiter.admitted.exception() is None:
+                # Admitted just as the deadline passed: give the slot back.
+                self._release(state)
+            raise self._reject("expired", priority, self.estimated_wait(tenant, priority))
+        except asyncio.CancelledError:
+            state.remove(waiter)
+            if waiter.admitted.done() and not waiter.admitted.cancelled():
+                if waiter.admitted.exception() is None:
+                    self._release(state)
+            else:
+                waiter.admitted.cancel()
+            raise
+        admission_requests.inc(priority=priority, outcome="admitted")
+        admission_wait.observe(time.perf_counter() - start, priority=priority)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        tenant: str = "default",
+        priority: str = INTERACTIVE,
+        deadline_s: Optional[float] = None,
+    ) -> AsyncIterator[None]:
+        """Wait for a turn to run, at most ``deadline_s`` seconds (None: no deadline)."""
+        await self._admit(tenant, priority, deadline_s)
+        state = self._state()
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            # Failed or cancelled runs say nothing about how long a run takes.
+            self._release(state)
+            raise
+        self._release(state, time.perf_counter() - start)
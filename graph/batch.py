@@ -0,0 +1,187 @@
+"""
+Answer a JSONL file of questions.
+
+    python -m graph.batch questions.jsonl answers.jsonl --concurrency 64 --llm-concurrency 16
+
+Each input line is ``{"question": ..., "id": ...}``; ``id`` defaults to the
+line number. Up to ``--concurrency`` questions run at once through the
+async graph, with the provider limits of graph.limits applied across all of
+them. Every result is appended to the output as soon as it is ready, in
+completion order::
+
+    {"id": ..., "question": ..., "generation": ..., "seconds": ...}
+    {"id": ..., "question": ..., "error": "...", "seconds": ...}
+
+Rerunning with the same output file skips the ids already answered, so an
+interrupted batch resumes where it stopped; failed questions run again.
+Input is read lazily, so the batch size is bounded by disk, not memory.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, TextIO
+
+from graph.config import get_settings
+from graph.consts import CORRECTIVE
+from graph.limits import (
+    LLM,
+    PROVIDERS,
+    RETRIEVER,
+    WEB_SEARCH,
+    ProviderLimits,
+    get_limits,
+    provider_call_counts,
+    use_limits,
+)
+
+
+@dataclass
+class BatchStats:
+    answered: int = 0
+    failed: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+    provider_calls: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def per_minute(self) -> float:
+        done = self.answered + self.failed
+        return done * 60 / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        calls = ", ".join(f"{p} {n}" for p, n in self.provider_calls.items())
+        return (
+            f"answered {self.answered}, failed {self.failed}, skipped {self.skipped} "
+            f"in {self.seconds:.1f}s: {self.per_minute:.0f} questions/min\n"
+            f"provider calls: {calls}"
+        )
+
+
+def read_questions(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, start=1):
+            if line.strip():
+                item = json.loads(line)
+                yield {**item, "id": str(item.get("id", n))}
+
+
+def answered_ids(path: str) -> Set[str]:
+    """Ids with a successful result in ``path``; a torn last line is ignored."""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "error" not in record:
+                done.add(str(record["id"]))
+    return done
+
+
+def _open_output(path: str) -> TextIO:
+    out = open(path, "a+", encoding="utf-8")
+    # A crash mid-write leaves a line without its newline; start a fresh one.
+    if out.tell() > 0:
+        out.seek(out.tell() - 1)
+        if out.read(1) != "\n":
+            out.write("\n")
+    return out
+
+
+async def run_batch(
+    app,
+    questions: Iterable[Dict[str, Any]],
+    output_path: str,
+    concurrency: int = 32,
+    limits: Optional[ProviderLimits] = None,
+) -> BatchStats:
+    stats = BatchStats()
+    done = answered_ids(output_path)
+    calls_before = provider_call_counts()
+    pending = iter(questions)
+    start = time.perf_counter()
+
+    async def answer(item: Dict[str, Any]) -> Dict[str, Any]:
+        record: Dict[str, Any] = {"id": item["id"], "question": item["question"]}
+        begin = time.perf_counter()
+        try:
+            config = {"configurable": {"thread_id": f"batch-{item['id']}"}}
+            result = await app.ainvoke({"question": item["question"]}, config)
+            record["generation"] = result.get("generation")
+            stats.answered += 1
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            stats.failed += 1
+        record["seconds"] = round(time.perf_counter() - begin, 3)
+        return record
+
+    async def worker(out: TextIO) -> None:
+        # Workers share one iterator, so input is only read as slots free up.
+        for item in pending:
+            if item["id"] in done:
+                stats.skipped += 1
+                continue
+            out.write(json.dumps(await answer(item)) + "\n")
+            out.flush()
+
+    with _open_output(output_path) as out, use_limits(limits or get_limits()):
+        await asyncio.gather(*(worker(out) for _ in range(concurrency)))
+
+    stats.seconds = time.perf_counter() - start
+    calls_after = provider_call_counts()
+    stats.provider_calls = {p: calls_after[p] - calls_before[p] for p in PROVIDERS}
+    return stats
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions.")
+    parser.add_argument("questions")
+    parser.add_argument("output")
+    parser.add_argument("--variant", default=CORRECTIVE)
+    parser.add_argument("--concurrency", type=int, default=settings.batch_concurrency)
+    parser.add_argument("--llm-concurrency", type=int, default=settings.llm_max_concurrency)
+    parser.add_argument(
+        "--retriever-concurrency", type=int, default=settings.retriever_max_concurrency
+    )
+    parser.add_argument(
+        "--web-search-concurrency", type=int, default=settings.web_search_max_concurrency
+    )
+    args = parser.parse_args()
+
+    limits = ProviderLimits(
+        {
+            LLM: args.llm_concurrency,
+            RETRIEVER: args.retriever_concurrency,
+            WEB_SEARCH: args.web_search_concurrency,
+        }
+    )
+
+    async def run() -> BatchStats:
+        from graph.builder import abuild_graph
+        from graph.checkpointers import aclose_checkpointers
+
+        try:
+            app = await abuild_graph(args.variant)
+            return await run_batch(
+                app, read_questions(args.questions), args.output, args.concurrency, limits
+            )
+        finally:
+            # An open async SQLite connection keeps the interpreter alive.
+            await aclose_checkpointers()
+
+    print(asyncio.run(run()).summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+In-memory checkpointer with a cap on threads and bytes.
+
+``MemorySaver`` keeps every checkpoint of every thread for the life of the
+process. ``BoundedMemorySaver`` tracks threads in LRU order, with the
+serialized size of each, and evicts whole least-recently-used threads once
+``max_threads`` or ``max_bytes`` is exceeded. With ``keep_history=False``
+only a thread's latest checkpoint is kept (plus its parent's pending writes,
+which carry pending ``Send``s). An optional ``spill`` saver, usually SQLite,
+receives evicted threads; a later read of such a thread loads its latest
+checkpoint back into memory, so the conversation continues where it left off.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Set, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+from graph.metrics import counter
+
+evicted_threads = counter(
+    "checkpoint_memory_evicted_threads_total",
+    "Threads evicted from the bounded in-memory checkpointer, by destination",
+)
+spill_loads = counter(
+    "checkpoint_memory_spill_loads_total", "Threads loaded back from the spill checkpointer"
+)
+
+WriteKey = Tuple[str, str, str]
+
+
+class BoundedMemorySaver(MemorySaver):
+    def __init__(
+        self,
+        max_threads: int = 10_000,
+        max_bytes: int = 256 * 1024 * 1024,
+        keep_history: bool = True,
+        spill: Optional[BaseCheckpointSaver] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.keep_history = keep_history
+        self.spill = spill
+        self.total_bytes = 0
+        # thread_id -> serialized bytes held, least recently used first
+        self._threads: "OrderedDict[str, int]" = OrderedDict()
+        self._write_keys: Dict[str, Set[WriteKey]] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def thread_count(self) -> int:
+        # Not __len__: an empty saver must stay truthy, or LangGraph treats
+        # the graph as having no checkpointer.
+        return len(self._threads)
+
+    # bookkeeping
+
+    def _touch(self, thread_id: str, delta: int = 0) -> None:
+        self._threads[thread_id] = self._threads.get(thread_id, 0) + delta
+        self._threads.move_to_end(thread_id)
+        self.total_bytes += delta
+
+    def _evict(self, keep: str) -> None:
+        while len(self._threads) > 1 and (
+            len(self._threads) > self.max_threads or self.total_bytes > self.max_bytes
+        ):
+            thread_id = next(iter(self._threads))
+            if thread_id == keep:
+                self._threads.move_to_end(thread_id)
+                continue
+            if self.spill is not None:
+                self._spill(thread_id)
+            self._drop(thread_id)
+            evicted_threads.inc(to="spill" if self.spill is not None else "dropped")
+
+    def _drop_writes(self, thread_id: str, checkpoint_ns: str, checkpoints: Dict) -> None:
+        # MemorySaver reads create empty ``writes`` entries for a checkpoint
+        # and its parent, so clear those as well as the ones put_writes made.
+        for checkpoint_id, (_, _, parent_id) in checkpoints.items():
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            self.writes.pop((thread_id, checkpoint_ns, parent_id), None)
+
+    def _drop(self, thread_id: str) -> None:
+        for checkpoint_ns, checkpoints in self.storage.pop(thread_id, {}).items():
+            self._drop_writes(thread_id, checkpoint_ns, checkpoints)
+        for key in self._write_keys.pop(thread_id, ()):
+            self.writes.pop(key, None)
+        self.total_bytes -= self._threads.pop(thread_id, 0)
+
+    @staticmethod
+    def _parent_config(saved: CheckpointTuple) -> RunnableConfig:
+        configurable = saved.config["configurable"]
+        return saved.parent_config or {
+            "configurable": {
+                "thread_id": configurable["thread_id"],
+                "checkpoint_ns": configurable["checkpoint_ns"],
+            }
+        }
+
+    def _spill(self, thread_id: str) -> None:
+        config = {"configurable": {"thread_id": thread_id}}
+        # Oldest first, so the spill saver sees parents before children.
+        for saved in reversed(list(super().list(config))):
+            self.spill.put(self._parent_config(saved), saved.checkpoint, saved.metadata, {})
+            self._put_pending_writes(self.spill, saved)
+
+    @staticmethod
+    def _put_pending_writes(saver: BaseCheckpointSaver, saved: CheckpointTuple) -> None:
+        by_task: Dict[str, list] = {}
+        for task_id, channel, value in saved.pending_writes or ():
+            by_task.setdefault(task_id, []).append((channel, value))
+        for task_id, writes in by_task.items():
+            saver.put_writes(saved.config, writes, task_id)
+
+    def _load_spilled(self, config: RunnableConfig) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        if self.spill is None or thread_id in self._threads:
+            return
+        saved = self.spill.get_tuple(config)
+        if saved is None:
+            return
+        spill_loads.inc()
+        self.put(self._parent_config(saved), saved.checkpoint, saved.metadata, {})
+        self._put_pending_writes(self, saved)
+
+    def _truncate(self, thread_id: str, checkpoint_ns: str, keep_id: str, parent_id) -> None:
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        dropped = {c: checkpoints.pop(c) for c in [c for c in checkpoints if c != keep_id]}
+        freed = sum(len(saved[0][1]) + len(saved[1][1]) for saved in dropped.values())
+        keys = self._write_keys.get(thread_id, set())
+        for key in [k for k in keys if k[1] == checkpoint_ns and k[2] not in (keep_id, parent_id)]:
+            keys.discard(key)
+            freed += sum(len(w[2][1]) for w in self.writes.pop(key, {}).values())
+        self._drop_writes(
+            thread_id, checkpoint_ns, {c: v for c, v in dropped.items() if c != parent_id}
+        )
+        self._touch(thread_id, -freed)
+
+    # saver API
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._load_spilled(config)
+            if thread_id not in self._threads:
+                # MemorySaver's defaultdicts would otherwise keep an empty entry.
+                return None
+            self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            if config is not None:
+                self._load_spilled(config)
+                if config["configurable"]["thread_id"] not in self._threads:
+                    return iter(())
+            return iter(list(super().list(config, filter=filter, before=before, limit=limit)))
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        config = {"configurable": {**config["configurable"], "checkpoint_ns": checkpoint_ns}}
+        with self._lock:
+            saved_config = super().put(config, checkpoint, metadata, new_versions)
+            saved = self.storage[thread_id][checkpoint_ns][checkpoint["id"]]
+            self._touch(thread_id, len(saved[0][1]) + len(saved[1][1]))
+            if not self.keep_history:
+                self._truncate(
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                )
+            self._evict(keep=thread_id)
+            return saved_config
+
+    def put_writes(
+        self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        key = (
+            thread_id,
+            config["configurable"].get("checkpoint_ns", ""),
+            config["configurable"]["checkpoint_id"],
+        )
+        with self._lock:
+            before = sum(len(w[2][1]) for w in self.writes.get(key, {}).values())
+            super().put_writes(config, writes, task_id)
+            after = sum(len(w[2][1]) for w in self.writes[key].values())
+            self._write_keys.setdefault(thread_id, set()).add(key)
+            self._touch(thread_id, after - before)
+            self._evict(keep=thread_id)
+
+    # MemorySaver's async methods run the sync ones on a worker thread. With
+    # nothing to spill to there is no I/O, so run them on the event loop.
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        if self.spill is not None:
+            return await super().aget_tuple(config)
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if self.spill is not None:
+            async for saved in super().alist(config, filter=filter, before=before, limit=limit):
+                yield saved
+            return
+        for saved in self.list(config, filter=filter, before=before, limit=limit):
+            yield saved
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        if self.spill is not None:
+            return await super().aput(config, checkpoint, metadata, new_versions)
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str
+    ) -> None:
+        if self.spill is not None:
+            return await super().aput_writes(config, writes, task_id)
+        self.put_writes(config, writes, task_id)
@@ -0,0 +1,232 @@
+"""
+One builder for every RAG variant in this repo.
+
+    corrective  graph/graph.py: the router picks retrieval or web search as the
+                entry point, then grade -> (web search) -> generate -> self-check
+    self_rag    self_rag_graph.py: always starts with retrieval
+    adaptive    adaptive_rag_graph.py: like corrective, with the routing
+                decision drawn as its own node
+
+With ``RAG_ROUTE_FANOUT`` set, a routed question the router is unsure about
+(or every routed question) runs retrieval and web search in parallel; the
+two branches join in one grading step over the union of their documents and
+go straight to generation, instead of retrieve -> grade -> web search.
+
+With ``RAG_DECOMPOSE_QUESTIONS`` the vectorstore path starts by splitting
+the question into sub-questions, each retrieved and graded by its own task
+in one parallel step; their documents are reduced into one deduplicated
+context, with web search only for sub-questions nothing was found for
+(see graph.nodes.decompose).
+
+Graphs are compiled on first request and cached per process, so several
+variants can be served side by side. Every node and edge has a sync and an
+async implementation: ``invoke``/``stream`` call the sync ones, while
+``ainvoke``/``astream`` await the async ones, so no request holds a thread
+while it waits on the LLM, the retriever or web search. The checkpointer is chosen by
+``RAG_CHECKPOINTER`` (see graph.checkpointers). Nothing here renders
+diagrams; see ``python -m graph.render`` for that.
+"""
+
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from langgraph.graph import END, StateGraph
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.utils.runnable import RunnableCallable
+
+from graph.checkpointers import acreate_checkpointer, create_checkpointer
+from graph.config import get_settings
+from graph.consts import (
+    ADAPTIVE,
+    CORRECTIVE,
+    DECOMPOSE,
+    FANOUT_NEVER,
+    GENERATE,
+    GRADE_DOCUMENTS,
+    GRADE_UNION,
+    REDUCE_SUB_QUESTIONS,
+    RETRIEVE,
+    RETRIEVE_PARALLEL,
+    RETRIEVE_SUB_QUESTION,
+    ROUTE,
+    SELF_RAG,
+    WEBSEARCH,
+    WEBSEARCH_PARALLEL,
+)
+from graph.edges import (
+    adecide_to_generate,
+    agrade_generation_grounded_in_documents_and_question,
+    amap_sub_questions,
+    aroute_question,
+    decide_to_generate,
+    grade_generation_grounded_in_documents_and_question,
+    map_sub_questions,
+    route_question,
+)
+from graph.nodes import (
+    adecompose,
+    agenerate,
+    agrade_documents,
+    areduce_sub_questions,
+    aretrieve,
+    aretrieve_parallel,
+    aretrieve_sub_question,
+    aweb_search,
+    aweb_search_parallel,
+    decompose,
+    generate,
+    grade_documents,
+    reduce_sub_questions,
+    retrieve,
+    retrieve_parallel,
+    retrieve_sub_question,
+    web_search,
+    web_search_parallel,
+)
+from graph.state import GraphState
+from graph.write_behind import flush_after_runs
+
+
+@dataclass(frozen=True)
+class GraphOptions:
+    # Let the LLM router choose between retrieval and web search up front
+    route_question: bool = True
+    # Draw the routing decision as its own node instead of a conditional entry point
+    route_node: bool = False
+
+
+VARIANTS: Dict[str, GraphOptions] = {
+    CORRECTIVE: GraphOptions(route_question=True),
+    SELF_RAG: GraphOptions(route_question=False),
+    ADAPTIVE: GraphOptions(route_question=True, route_node=True),
+}
+
+
+def get_options(variant: str = CORRECTIVE, **overrides: Any) -> GraphOptions:
+    if variant not in VARIANTS:
+        raise ValueError(f"unknown graph variant {variant!r}, expected one of {list(VARIANTS)}")
+    return replace(VARIANTS[variant], **overrides)
+
+
+def route_node(state: GraphState) -> Dict[str, Any]:
+    # The decision itself is made by the conditional edge leaving this node.
+    return {"question": state["question"]}
+
+
+async def aroute_node(state: GraphState) -> Dict[str, Any]:
+    return route_node(state)
+
+
+def node(name: str, func, afunc) -> RunnableCallable:
+    # Given only ``func``, LangGraph would run it on a worker thread under ainvoke.
+    return RunnableCallable(func, afunc, name=name, trace=False)
+
+
+def edge(func, afunc) -> RunnableCallable:
+    return RunnableCallable(func, afunc, name=func.__name__)
+
+
+def build_workflow(options: GraphOptions) -> StateGraph:
+    settings = get_settings()
+    workflow = StateGraph(GraphState)
+    workflow.add_node(GENERATE, node(GENERATE, generate, agenerate))
+    workflow.add_node(WEBSEARCH, node(WEBSEARCH, web_search, aweb_search))
+    grade_decision = edge(decide_to_generate, adecide_to_generate)
+    if settings.decompose_questions:
+        retrieval = DECOMPOSE
+        workflow.add_node(DECOMPOSE, node(DECOMPOSE, decompose, adecompose))
+        workflow.add_node(
+            RETRIEVE_SUB_QUESTION,
+            node(RETRIEVE_SUB_QUESTION, retrieve_sub_question, aretrieve_sub_question),
+        )
+        workflow.add_node(
+            REDUCE_SUB_QUESTIONS,
+            node(REDUCE_SUB_QUESTIONS, reduce_sub_questions, areduce_sub_questions),
+        )
+        workflow.add_conditional_edges(
+            DECOMPOSE, edge(map_sub_questions, amap_sub_questions), [RETRIEVE_SUB_QUESTION]
+        )
+        # Triggered once, after every sub-question task of the step has finished.
+        workflow.add_edge(RETRIEVE_SUB_QUESTION, REDUCE_SUB_QUESTIONS)
+        workflow.add_conditional_edges(
+            REDUCE_SUB_QUESTIONS, grade_decision, {WEBSEARCH: WEBSEARCH, GENERATE: GENERATE}
+        )
+    else:
+        retrieval = RETRIEVE
+        workflow.add_node(RETRIEVE, node(RETRIEVE, retrieve, aretrieve))
+        workflow.add_node(
+            GRADE_DOCUMENTS, node(GRADE_DOCUMENTS, grade_documents, agrade_documents)
+        )
+        workflow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
+        workflow.add_conditional_edges(
+            GRADE_DOCUMENTS, grade_decision, {WEBSEARCH: WEBSEARCH, GENERATE: GENERATE}
+        )
+    router = edge(route_question, aroute_question)
+
+    route_map = {
+        WEBSEARCH: WEBSEARCH,
+        RETRIEVE: retrieval,
+    }
+    if options.route_question and settings.route_fanout != FANOUT_NEVER:
+        # Added in this order so retrieval's reset of the documents is applied
+        # before web search's additions (see graph.nodes.fanout).
+        workflow.add_node(
+            RETRIEVE_PARALLEL, node(RETRIEVE_PARALLEL, retrieve_parallel, aretrieve_parallel)
+        )
+        workflow.add_node(
+            WEBSEARCH_PARALLEL, node(WEBSEARCH_PARALLEL, web_search_parallel, aweb_search_parallel)
+        )
+        workflow.add_node(GRADE_UNION, node(GRADE_UNION, grade_documents, agrade_documents))
+        workflow.add_edge([RETRIEVE_PARALLEL, WEBSEARCH_PARALLEL], GRADE_UNION)
+        workflow.add_edge(GRADE_UNION, GENERATE)
+        route_map[RETRIEVE_PARALLEL] = RETRIEVE_PARALLEL
+        route_map[WEBSEARCH_PARALLEL] = WEBSEARCH_PARALLEL
+    if not options.route_question:
+        workflow.set_entry_point(retrieval)
+    elif options.route_node:
+        workflow.add_node(ROUTE, node(ROUTE, route_node, aroute_node))
+        workflow.set_entry_point(ROUTE)
+        workflow.add_conditional_edges(ROUTE, router, route_map)
+    else:
+        workflow.set_conditional_entry_point(router, route_map)
+
+    workflow.add_edge(WEBSEARCH, GENERATE)
+    workflow.add_conditional_edges(
+        GENERATE,
+        edge(
+            grade_generation_grounded_in_documents_and_question,
+            agrade_generation_grounded_in_documents_and_question,
+        ),
+        {
+            "not supported": GENERATE,
+            "useful": END,
+            "not useful": WEBSEARCH,
+        },
+    )
+    return workflow
+
+
+def build_graph(
+    variant: str = CORRECTIVE, checkpointer: Optional[Any] = None, **overrides: Any
+) -> CompiledStateGraph:
+    """Build and compile a fresh graph; prefer ``get_app`` outside of tests."""
+    options = get_options(variant, **overrides)
+    if checkpointer is None:
+        checkpointer = create_checkpointer()
+    return flush_after_runs(build_workflow(options).compile(checkpointer=checkpointer))
+
+
+async def abuild_graph(
+    variant: str = CORRECTIVE, checkpointer: Optional[Any] = None, **overrides: Any
+) -> CompiledStateGraph:
+    """``build_graph`` for async callers; supports the async_sqlite checkpointer."""
+    if checkpointer is None:
+        checkpointer = await acreate_checkpointer()
+    return build_graph(variant, checkpointer=checkpointer, **overrides)
+
+
+@lru_cache(maxsize=None)
+def get_app(variant: str = CORRECTIVE) -> CompiledStateGraph:
+    """The compiled graph for ``variant``, compiled once per process."""
+    return build_graph(variant)
@@ -0,0 +1,20 @@
+def reset_chains() -> None:
+    """Drop every cached chain and model so the next call rebuilds them from settings."""
+    from graph.chains import (
+        answer_grader,
+        decomposer,
+        generation,
+        hallucination_grader,
+        llm,
+        retrieval_grader,
+        router,
+    )
+
+    llm.get_llm.cache_clear()
+    answer_grader.get_answer_grader.cache_clear()
+    decomposer.get_question_decomposer.cache_clear()
+    generation.get_generation_chain.cache_clear()
+    generation.get_combine_chain.cache_clear()
+    hallucination_grader.get_hallucination_grader.cache_clear()
+    retrieval_grader.get_retrieval_grader.cache_clear()
+    router.get_question_router.cache_clear()
@@ -1,7 +1,11 @@
+from functools import lru_cache
+
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from langchain_core.runnables import RunnableSequence
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable
+
+from graph.chains.llm import get_llm
+from graph.singleflight import coalesce
 
 
 class GradeAnswer(BaseModel):
@@ -11,9 +15,6 @@ class GradeAnswer(BaseModel):
     )
 
 
-llm = ChatOpenAI(temperature=0)
-structured_llm_grader = llm.with_structured_output(GradeAnswer)
-
 system = """You are a grader assessing whether an answer addresses / resolves a question \n 
      Give a binary score 'yes' or 'no'. Yes' means that the answer resolves the question."""
 answer_prompt = ChatPromptTemplate.from_messages(
@@ -23,4 +24,15 @@ answer_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-answer_grader: RunnableSequence = answer_prompt | structured_llm_grader
+
+@lru_cache(maxsize=None)
+def get_answer_grader() -> Runnable:
+    structured_llm_grader = get_llm().with_structured_output(GradeAnswer)
+    return coalesce(answer_prompt | structured_llm_grader, "answer_grader")
+
+
+def __getattr__(name):
+    # Kept for `from graph.chains.answer_grader import answer_grader`; built on first access.
+    if name == "answer_grader":
+        return get_answer_grader()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
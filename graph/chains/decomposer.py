@@ -0,0 +1,38 @@
+from functools import lru_cache
+from typing import List
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel, Field
+
+from graph.chains.llm import get_llm
+from graph.singleflight import coalesce
+
+
+class SubQuestions(BaseModel):
+    """Sub-questions that together answer a user question."""
+
+    sub_questions: List[str] = Field(
+        default_factory=list,
+        description="Self-contained questions, each answerable from one document lookup.",
+    )
+
+
+system = """You split a user question into sub-questions for a vectorstore lookup.
+A compound question (comparing things, asking about several topics) becomes one
+self-contained sub-question per part, each naming its subject explicitly.
+A simple question is returned unchanged as the only sub-question.
+Return at most {max_sub_questions} sub-questions."""
+
+decompose_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        ("human", "{question}"),
+    ]
+)
+
+
+@lru_cache(maxsize=None)
+def get_question_decomposer() -> Runnable:
+    structured_llm_decomposer = get_llm().with_structured_output(SubQuestions)
+    return coalesce(decompose_prompt | structured_llm_decomposer, "decomposer")
@@ -1,8 +1,35 @@
-from langchain import hub
+from functools import lru_cache
+
 from langchain_core.output_parsers import StrOutputParser
-from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableSequence
+
+from graph.chains.llm import get_llm
+from graph.chains.prompts import get_rag_prompt
+
+
+@lru_cache(maxsize=None)
+def get_generation_chain() -> RunnableSequence:
+    return get_rag_prompt() | get_llm() | StrOutputParser()
+
+
+COMBINE_PROMPT_TEMPLATE = """You are an assistant for question-answering tasks. The context for the question was too long to read at once, so it was split into parts and each part was used to answer the question separately. Combine the partial answers below into one answer. Use only what they say; ignore parts that did not know the answer, and if none did, just say that you don't know. Use three sentences maximum and keep the answer concise.
+Question: {question}
+Partial answers:
+{answers}
+Answer:"""
+
+combine_prompt = ChatPromptTemplate.from_messages([("human", COMBINE_PROMPT_TEMPLATE)])
+
+
+@lru_cache(maxsize=None)
+def get_combine_chain() -> RunnableSequence:
+    """Reduce step of map-reduce generation: partial answers in, one answer out."""
+    return combine_prompt | get_llm() | StrOutputParser()
 
-llm = ChatOpenAI(temperature=0)
-prompt = hub.pull("rlm/rag-prompt")
 
-generation_chain = prompt | llm | StrOutputParser()
+def __getattr__(name):
+    # Kept for `from graph.chains.generation import generation_chain`; built on first access.
+    if name == "generation_chain":
+        return get_generation_chain()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
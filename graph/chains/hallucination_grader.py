@@ -1,9 +1,11 @@
+from functools import lru_cache
+
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from langchain_core.runnables import RunnableSequence
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable
 
-llm = ChatOpenAI(temperature=0)
+from graph.chains.llm import get_llm
+from graph.singleflight import coalesce
 
 
 class GradeHallucinations(BaseModel):
@@ -14,8 +16,6 @@ class GradeHallucinations(BaseModel):
     )
 
 
-structured_llm_grader = llm.with_structured_output(GradeHallucinations)
-
 system = """You are a grader assessing whether an LLM generation is grounded in / supported by a set of retrieved facts. \n 
      Give a binary score 'yes' or 'no'. 'Yes' means that the answer is grounded in / supported by the set of facts."""
 hallucination_prompt = ChatPromptTemplate.from_messages(
@@ -25,4 +25,15 @@ hallucination_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-hallucination_grader: RunnableSequence = hallucination_prompt | structured_llm_grader
+
+@lru_cache(maxsize=None)
+def get_hallucination_grader() -> Runnable:
+    structured_llm_grader = get_llm().with_structured_output(GradeHallucinations)
+    return coalesce(hallucination_prompt | structured_llm_grader, "hallucination_grader")
+
+
+def __getattr__(name):
+    # Kept for `from graph.chains.hallucination_grader import hallucination_grader`.
+    if name == "hallucination_grader":
+        return get_hallucination_grader()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
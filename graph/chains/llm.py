@@ -0,0 +1,25 @@
+from functools import lru_cache
+
+from langchain_core.language_models import BaseChatModel
+
+from graph.clients import openai_client_kwargs
+from graph.config import get_settings
+
+
+@lru_cache(maxsize=None)
+def get_llm() -> BaseChatModel:
+    """The chat model shared by every chain, built on first use from settings."""
+    settings = get_settings()
+    if settings.llm_provider == "fake":
+        from graph.fakes import FakeChatModel
+
+        return FakeChatModel()
+
+    # Imported here: the OpenAI SDK alone takes over a second to import.
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=settings.llm_model,
+        temperature=settings.llm_temperature,
+        **openai_client_kwargs(),
+    )
@@ -0,0 +1,60 @@
+"""
+Vendored prompts, so building the chains never needs the LangChain hub.
+
+``rag_prompt`` is a copy of ``rlm/rag-prompt``. With ``RAG_RAG_PROMPT_SOURCE=hub``
+the hub version is pulled instead, cached on disk and refreshed at most once
+per ``prompt_cache_ttl_s``; when the hub is unreachable the cached copy (even
+if stale) or the vendored prompt is used.
+"""
+
+import os
+import time
+
+from langchain_core.load import dumps, loads
+from langchain_core.prompts import ChatPromptTemplate
+
+from graph.config import get_settings
+
+RAG_PROMPT_TEMPLATE = """You are an assistant for question-answering tasks. Use the following pieces of retrieved context to answer the question. If you don't know the answer, just say that you don't know. Use three sentences maximum and keep the answer concise.
+Question: {question} 
+Context: {context} 
+Answer:"""
+
+rag_prompt = ChatPromptTemplate.from_messages([("human", RAG_PROMPT_TEMPLATE)])
+
+
+def _cache_path(name: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, name.replace("/", "__") + ".json")
+
+
+def pull_cached(name: str, cache_dir: str, ttl_s: float, fallback: ChatPromptTemplate):
+    path = _cache_path(name, cache_dir)
+    cached = None
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            cached = loads(f.read())
+        if time.time() - os.path.getmtime(path) < ttl_s:
+            return cached
+    try:
+        from langchain import hub
+
+        prompt = hub.pull(name)
+    except Exception as e:
+        print(f"---PROMPT: HUB PULL OF {name} FAILED ({e}), USING CACHED COPY---")
+        return cached or fallback
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(dumps(prompt))
+    return prompt
+
+
+def get_rag_prompt() -> ChatPromptTemplate:
+    settings = get_settings()
+    if settings.rag_prompt_source == "hub":
+        return pull_cached(
+            settings.rag_prompt_name,
+            settings.prompt_cache_dir,
+            settings.prompt_cache_ttl_s,
+            fallback=rag_prompt,
+        )
+    return rag_prompt
@@ -1,8 +1,11 @@
+from functools import lru_cache
+
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable
 from pydantic import BaseModel, Field
 
-llm = ChatOpenAI(temperature=0)
+from graph.chains.llm import get_llm
+from graph.singleflight import coalesce
 
 
 # This is NOT a state - this is a Base Model used to put a structure to output
@@ -14,8 +17,6 @@ class GradeDocuments(BaseModel):
     )
 
 
-structured_llm_grader = llm.with_structured_output(GradeDocuments)
-
 system = """You are a grader assessing relevance of a retrieved document to a user question. \n 
     If the document contains keyword(s) or semantic meaning related to the question, grade it as relevant. \n
     Give a binary score 'yes' or 'no' score to indicate whether the document is relevant to the question."""
@@ -26,5 +27,16 @@ grade_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-# This object calsl upon an LLM defined to grade the documents retrieved
-retrieval_grader = grade_prompt | structured_llm_grader
+
+# This object calls upon an LLM defined to grade the documents retrieved
+@lru_cache(maxsize=None)
+def get_retrieval_grader() -> Runnable:
+    structured_llm_grader = get_llm().with_structured_output(GradeDocuments)
+    return coalesce(grade_prompt | structured_llm_grader, "retrieval_grader")
+
+
+def __getattr__(name):
+    # Kept for `from graph.chains.retrieval_grader import retrieval_grader`.
+    if name == "retrieval_grader":
+        return get_retrieval_grader()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,12 @@
+from functools import lru_cache
 from typing import Literal
 
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
+
+from graph.chains.llm import get_llm
+from graph.singleflight import coalesce
 
 
 class RouteQuery(BaseModel):
@@ -12,14 +16,18 @@ class RouteQuery(BaseModel):
         ...,
         description="Given a user question choose to route it to web search or a vectorstore.",
     )
+    confidence: float = Field(
+        default=1.0,
+        ge=0.0,
+        le=1.0,
+        description="How sure you are of the choice, from 0 (a guess) to 1 (certain).",
+    )
 
 
-llm = ChatOpenAI(temperature=0)
-structured_llm_router = llm.with_structured_output(RouteQuery)
-
 system = """You are an expert at routing a user question to a vectorstore or web search.
 The vectorstore contains documents related to agents, prompt engineering, and adversarial attacks.
-Use the vectorstore for questions on these topics. For all else, use web-search."""
+Use the vectorstore for questions on these topics. For all else, use web-search.
+Also say how confident you are in the choice."""
 
 route_prompt = ChatPromptTemplate.from_messages(
     [
@@ -28,4 +36,15 @@ route_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-question_router = route_prompt | structured_llm_router
+
+@lru_cache(maxsize=None)
+def get_question_router() -> Runnable:
+    structured_llm_router = get_llm().with_structured_output(RouteQuery)
+    return coalesce(route_prompt | structured_llm_router, "router")
+
+
+def __getattr__(name):
+    # Kept for `from graph.chains.router import question_router`; built on first access.
+    if name == "question_router":
+        return get_question_router()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
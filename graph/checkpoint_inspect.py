@@ -0,0 +1,308 @@
+"""
+Inspect a SQLite checkpoint file and find what makes it big.
+
+    python -m graph.checkpoint_inspect threads --limit 20
+    python -m graph.checkpoint_inspect channels [--thread ID] [--all-checkpoints]
+    python -m graph.checkpoint_inspect largest --channel documents --limit 10
+    python -m graph.checkpoint_inspect show THREAD_ID [--limit 5] [--before CHECKPOINT_ID]
+
+The file is opened read-only, so it is safe against a live database. Rows
+are streamed with keyset paging on the savers' primary keys (never
+``SELECT *`` into memory) and sizes come from ``LENGTH(...)`` where SQL
+can answer; checkpoint blobs are only decoded, with the saver's own
+serializer, to split their size by channel.
+
+    threads   checkpoints, last step and stored bytes per thread, biggest first
+    channels  bytes per channel in checkpoints (latest per thread by
+              default) and in pending writes
+    largest   the largest single stored values
+    show      a page of one thread's checkpoints and writes, newest first, decoded
+"""
+
+import argparse
+import heapq
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from graph.config import get_settings
+
+serde = JsonPlusSerializer()
+
+COLUMNS = (
+    "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata"
+)
+CheckpointRow = Tuple[str, str, str, Optional[str], str, bytes, bytes]
+
+
+@dataclass
+class ThreadStats:
+    thread_id: str
+    checkpoints: int = 0
+    last_step: int = -1
+    checkpoint_bytes: int = 0
+    write_bytes: int = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self.checkpoint_bytes + self.write_bytes
+
+
+@dataclass
+class ChannelStats:
+    channel: str
+    count: int = 0
+    bytes: int = 0
+    max_bytes: int = 0
+    threads: int = 0
+
+    def add(self, size: int) -> None:
+        self.count += 1
+        self.bytes += size
+        self.max_bytes = max(self.max_bytes, size)
+
+
+def open_readonly(path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+
+def iter_checkpoints(
+    conn: sqlite3.Connection, thread_id: Optional[str] = None, page_size: int = 500
+) -> Iterator[CheckpointRow]:
+    """All checkpoint rows in primary key order, ``page_size`` rows per query."""
+    last: Optional[Tuple[str, str, str]] = None
+    while True:
+        where, params = [], []
+        if thread_id is not None:
+            where.append("thread_id = ?")
+            params.append(thread_id)
+        if last is not None:
+            where.append("(thread_id, checkpoint_ns, checkpoint_id) > (?, ?, ?)")
+            params.extend(last)
+        query = f"SELECT {COLUMNS} FROM checkpoints"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id LIMIT ?"
+        rows = conn.execute(query, (*params, page_size)).fetchall()
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1][:3]
+
+
+def recent_checkpoints(
+    conn: sqlite3.Connection, thread_id: str, limit: int = 5, before: Optional[str] = None
+) -> List[CheckpointRow]:
+    """A page of one thread's checkpoints, newest first; page on with ``before``."""
+    query = f"SELECT {COLUMNS} FROM checkpoints WHERE thread_id = ?"
+    params: Tuple = (thread_id,)
+    if before is not None:
+        query += " AND checkpoint_id < ?"
+        params += (before,)
+    query += " ORDER BY checkpoint_id DESC LIMIT ?"
+    return conn.execute(query, (*params, limit)).fetchall()
+
+
+def decode_checkpoint(row: CheckpointRow) -> Dict[str, Any]:
+    return serde.loads_typed((row[4], row[5]))
+
+
+def decode_metadata(row: CheckpointRow) -> Dict[str, Any]:
+    return serde.loads(row[6]) if row[6] else {}
+
+
+def thread_stats(conn: sqlite3.Connection) -> List[ThreadStats]:
+    stats: Dict[str, ThreadStats] = {}
+    # Both aggregates walk the primary key index in order.
+    for thread_id, n, last_step, size in conn.execute(
+        "SELECT thread_id, COUNT(*), MAX(json_extract(CAST(metadata AS TEXT), '$.step')), "
+        "SUM(LENGTH(checkpoint) + LENGTH(metadata)) FROM checkpoints GROUP BY thread_id"
+    ):
+        stats[thread_id] = ThreadStats(
+            thread_id, n, last_step if last_step is not None else -1, size or 0
+        )
+    for thread_id, size in conn.execute(
+        "SELECT thread_id, SUM(LENGTH(value)) FROM writes GROUP BY thread_id"
+    ):
+        stats.setdefault(thread_id, ThreadStats(thread_id)).write_bytes = size or 0
+    return sorted(stats.values(), key=lambda s: s.total_bytes, reverse=True)
+
+
+def _latest_checkpoints(
+    conn: sqlite3.Connection, thread_id: Optional[str]
+) -> Iterator[CheckpointRow]:
+    query = "SELECT thread_id, checkpoint_ns, MAX(checkpoint_id) FROM checkpoints"
+    params: Tuple = ()
+    if thread_id is not None:
+        query += " WHERE thread_id = ?"
+        params = (thread_id,)
+    for key in conn.execute(query + " GROUP BY thread_id, checkpoint_ns", params).fetchall():
+        if key[2] is None:
+            continue
+        row = conn.execute(
+            f"SELECT {COLUMNS} FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            key,
+        ).fetchone()
+        if row is not None:
+            yield row
+
+
+def channel_stats(
+    conn: sqlite3.Connection,
+    thread_id: Optional[str] = None,
+    all_checkpoints: bool = False,
+    page_size: int = 500,
+) -> Tuple[Dict[str, ChannelStats], Dict[str, ChannelStats]]:
+    """Per-channel sizes as (in checkpoints, in pending writes)."""
+    in_checkpoints: Dict[str, ChannelStats] = {}
+    seen: Dict[str, set] = {}
+    rows = (
+        iter_checkpoints(conn, thread_id, page_size)
+        if all_checkpoints
+        else _latest_checkpoints(conn, thread_id)
+    )
+    for row in rows:
+        for channel, value in decode_checkpoint(row).get("channel_values", {}).items():
+            size = len(serde.dumps_typed(value)[1])
+            in_checkpoints.setdefault(channel, ChannelStats(channel)).add(size)
+            seen.setdefault(channel, set()).add(row[0])
+    for channel, thread_ids in seen.items():
+        in_checkpoints[channel].threads = len(thread_ids)
+
+    in_writes: Dict[str, ChannelStats] = {}
+    query = "SELECT channel, COUNT(*), SUM(LENGTH(value)), MAX(LENGTH(value)), "
+    query += "COUNT(DISTINCT thread_id) FROM writes"
+    params: Tuple = ()
+    if thread_id is not None:
+        query += " WHERE thread_id = ?"
+        params = (thread_id,)
+    for channel, n, size, largest, threads in conn.execute(query + " GROUP BY channel", params):
+        in_writes[channel] = ChannelStats(channel, n, size or 0, largest or 0, threads)
+    return in_checkpoints, in_writes
+
+
+def largest_values(
+    conn: sqlite3.Connection, channel: Optional[str] = None, limit: int = 10
+) -> List[Tuple[int, str, str, str, str]]:
+    """(bytes, thread_id, checkpoint_id, channel, task_id) of the largest values."""
+    query = "SELECT LENGTH(value), thread_id, checkpoint_id, channel, task_id FROM writes"
+    params: Tuple = ()
+    if channel is not None:
+        query += " WHERE channel = ?"
+        params = (channel,)
+    writes = conn.execute(query + " ORDER BY LENGTH(value) DESC LIMIT ?", (*params, limit))
+    found = list(writes)
+    # Checkpoint blobs hold every channel; split the biggest ones by channel.
+    biggest = conn.execute(
+        f"SELECT {COLUMNS} FROM checkpoints ORDER BY LENGTH(checkpoint) DESC LIMIT ?", (limit,)
+    )
+    for row in biggest:
+        for name, value in decode_checkpoint(row).get("channel_values", {}).items():
+            if channel is None or name == channel:
+                size = len(serde.dumps_typed(value)[1])
+                found.append((size, row[0], row[2], name, "(checkpoint)"))
+    return heapq.nlargest(limit, found)
+
+
+def _short(value: Any, width: int) -> str:
+    text = repr(value)
+    return text if len(text) <= width else text[: width - 3] + "..."
+
+
+def _kib(n: int) -> str:
+    return f"{n / 1024:.1f}"
+
+
+def print_threads(conn: sqlite3.Connection, limit: int) -> None:
+    stats = thread_stats(conn)
+    print(f"{len(stats)} threads, {_kib(sum(s.total_bytes for s in stats))} KiB")
+    print(f"{'thread_id':<40} {'ckpts':>6} {'step':>6} {'ckpt_kib':>9} {'writes_kib':>10}")
+    for s in stats[:limit]:
+        print(
+            f"{s.thread_id[:40]:<40} {s.checkpoints:>6} {s.last_step:>6} "
+            f"{_kib(s.checkpoint_bytes):>9} {_kib(s.write_bytes):>10}"
+        )
+
+
+def print_channels(
+    conn: sqlite3.Connection, thread_id: Optional[str], all_checkpoints: bool
+) -> None:
+    in_checkpoints, in_writes = channel_stats(conn, thread_id, all_checkpoints)
+    scope = "all checkpoints" if all_checkpoints else "latest checkpoint per thread"
+    for title, stats in ((f"checkpoints ({scope})", in_checkpoints), ("writes", in_writes)):
+        print(f"\n{title}")
+        print(f"{'channel':<24} {'values':>8} {'threads':>8} {'kib':>10} {'max_kib':>9}")
+        for s in sorted(stats.values(), key=lambda s: s.bytes, reverse=True):
+            print(
+                f"{s.channel[:24]:<24} {s.count:>8} {s.threads:>8} "
+                f"{_kib(s.bytes):>10} {_kib(s.max_bytes):>9}"
+            )
+
+
+def print_largest(conn: sqlite3.Connection, channel: Optional[str], limit: int) -> None:
+    print(f"{'kib':>9} {'channel':<16} {'task':<14} {'thread_id':<36} checkpoint_id")
+    for size, thread_id, checkpoint_id, name, task_id in largest_values(conn, channel, limit):
+        print(
+            f"{_kib(size):>9} {name[:16]:<16} {task_id[:14]:<14} "
+            f"{thread_id[:36]:<36} {checkpoint_id}"
+        )
+
+
+def print_thread(
+    conn: sqlite3.Connection, thread_id: str, limit: int, before: Optional[str], width: int
+) -> None:
+    rows = recent_checkpoints(conn, thread_id, limit, before)
+    for row in rows:
+        metadata = decode_metadata(row)
+        print(
+            f"\n{row[2]}  step {metadata.get('step')}  source {metadata.get('source')}  "
+            f"{_kib(len(row[5]))} KiB"
+        )
+        for channel, value in decode_checkpoint(row).get("channel_values", {}).items():
+            print(f"  {channel:<16} {_short(value, width)}")
+        for task_id, channel, type_, value in conn.execute(
+            "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ? "
+            "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            row[:3],
+        ):
+            decoded = serde.loads_typed((type_, value))
+            print(f"  write {channel:<10} {_short(decoded, width)}  [{task_id[:8]}]")
+    if len(rows) == limit:
+        print(f"\nolder: show {thread_id} --before {rows[-1][2]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect a SQLite checkpoint file.")
+    parser.add_argument("--path", default=get_settings().checkpoint_path)
+    commands = parser.add_subparsers(dest="command", required=True)
+    threads = commands.add_parser("threads")
+    threads.add_argument("--limit", type=int, default=20)
+    channels = commands.add_parser("channels")
+    channels.add_argument("--thread")
+    channels.add_argument("--all-checkpoints", action="store_true")
+    largest = commands.add_parser("largest")
+    largest.add_argument("--channel")
+    largest.add_argument("--limit", type=int, default=10)
+    show = commands.add_parser("show")
+    show.add_argument("thread_id")
+    show.add_argument("--limit", type=int, default=5)
+    show.add_argument("--before", help="checkpoint id to page back from")
+    show.add_argument("--width", type=int, default=120)
+    args = parser.parse_args()
+
+    conn = open_readonly(args.path)
+    if args.command == "threads":
+        print_threads(conn, args.limit)
+    elif args.command == "channels":
+        print_channels(conn, args.thread, args.all_checkpoints)
+    elif args.command == "largest":
+        print_largest(conn, args.channel, args.limit)
+    else:
+        print_thread(conn, args.thread_id, args.limit, args.before, args.width)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Checkpointers for the compiled graphs, selected by ``RAG_CHECKPOINTER``.
+
+    memory        BoundedMemorySaver, one per graph (the default); an LRU
+                  over threads, optionally spilling to SQLite
+    sqlite        SqliteSaver on ``checkpoint_path``; ``acreate_checkpointer``
+                  returns an AsyncSqliteSaver on the same file instead, as
+                  SqliteSaver has no async methods
+    async_sqlite  AsyncSqliteSaver on ``checkpoint_path``, for ``ainvoke`` /
+                  ``astream``; created inside the running event loop with
+                  ``acreate_checkpointer``
+
+SQLite connections are tuned for many short write transactions: WAL
+journal, ``synchronous=NORMAL`` (durable across application crashes, may
+lose the last commits on power loss), a busy timeout instead of immediate
+"database is locked" errors, and a larger page cache. One connection and
+saver is shared per file; SqliteSaver serializes access to it with its own
+lock, so it can be used from any thread. With ``checkpoint_write_behind``
+the sync SQLite saver is wrapped in graph.write_behind.WriteBehindSaver, and
+a retention policy (graph.retention) runs in the background when configured.
+
+Each async saver owns an aiosqlite connection, whose worker thread keeps the
+interpreter from exiting until it is closed: ``aclose_checkpointers`` (or
+``close_checkpointers`` outside an event loop) closes them.
+"""
+
+import asyncio
+import atexit
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from graph.bounded_memory import BoundedMemorySaver
+from graph.config import get_settings
+from graph.retention import RetentionWorker
+from graph.write_behind import WriteBehindSaver
+
+MEMORY = "memory"
+SQLITE = "sqlite"
+ASYNC_SQLITE = "async_sqlite"
+CHECKPOINTERS = (MEMORY, SQLITE, ASYNC_SQLITE)
+
+# The savers' primary keys serve their per-thread lookups; this index serves
+# scans across threads in checkpoint (time) order, e.g. for retention.
+INDEXES = "CREATE INDEX IF NOT EXISTS checkpoints_by_id ON checkpoints (checkpoint_id);"
+
+_savers: Dict[str, BaseCheckpointSaver] = {}
+_retention: Dict[str, RetentionWorker] = {}
+# aiosqlite connections of the async savers, closed by aclose_checkpointers
+_async_conns: List = []
+_savers_lock = threading.Lock()
+
+
+def sqlite_pragmas() -> str:
+    settings = get_settings()
+    return (
+        # Only takes effect on a new file; lets graph.retention release pages.
+        "PRAGMA auto_vacuum=INCREMENTAL;"
+        "PRAGMA journal_mode=WAL;"
+        f"PRAGMA synchronous={settings.sqlite_synchronous};"
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms};"
+        f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib};"
+        "PRAGMA temp_store=MEMORY;"
+        # Truncate the WAL back to 64 MiB after checkpoints instead of keeping
+        # its high-water mark.
+        "PRAGMA journal_size_limit=67108864;"
+    )
+
+
+def _ensure_parent(path: str) -> None:
+    parent = os.path.dirname(os.path.abspath(path))
+    if path != ":memory:":
+        os.makedirs(parent, exist_ok=True)
+
+
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    """A tuned SQLite connection that may be shared between threads."""
+    _ensure_parent(path)
+    conn = sqlite3.connect(
+        path,
+        check_same_thread=False,
+        timeout=get_settings().sqlite_busy_timeout_ms / 1000,
+    )
+    conn.executescript(sqlite_pragmas())
+    return conn
+
+
+def _sqlite_saver(path: str) -> BaseCheckpointSaver:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    saver = SqliteSaver(connect_sqlite(path))
+    saver.setup()
+    saver.conn.executescript(INDEXES)
+    settings = get_settings()
+    if settings.checkpoint_write_behind:
+        return WriteBehindSaver(
+            saver,
+            max_queue=settings.checkpoint_write_queue_size,
+            batch_size=settings.checkpoint_write_batch_size,
+        )
+    return saver
+
+
+def _start_retention(path: str) -> None:
+    settings = get_settings()
+    if path in _retention or not (settings.checkpoint_keep_last or settings.checkpoint_ttl_s):
+        return
+    _retention[path] = RetentionWorker(
+        path,
+        keep_last=settings.checkpoint_keep_last,
+        ttl_s=settings.checkpoint_ttl_s,
+        interval_s=settings.checkpoint_retention_interval_s,
+    ).start()
+
+
+def _check_kind(kind: str) -> None:
+    if kind not in CHECKPOINTERS:
+        raise ValueError(f"unknown checkpointer {kind!r}, expected one of {list(CHECKPOINTERS)}")
+
+
+def create_checkpointer(
+    kind: Optional[str] = None, path: Optional[str] = None
+) -> BaseCheckpointSaver:
+    """
+    The checkpointer for ``kind`` (default: settings). Memory savers are new
+    on every call; SQLite savers are shared per file.
+    """
+    settings = get_settings()
+    kind = kind or settings.checkpointer
+    _check_kind(kind)
+    if kind == MEMORY:
+        return BoundedMemorySaver(
+            max_threads=settings.memory_max_threads,
+            max_bytes=settings.memory_max_bytes,
+            keep_history=settings.memory_keep_history,
+            spill=create_checkpointer(SQLITE, settings.memory_spill_path)
+            if settings.memory_spill_path
+            else None,
+        )
+    if kind == ASYNC_SQLITE:
+        raise ValueError(
+            "the async_sqlite checkpointer needs a running event loop; "
+            "use acreate_checkpointer() or graph.builder.abuild_graph()"
+        )
+    path = path or settings.checkpoint_path
+    with _savers_lock:
+        saver = _savers.get(path)
+        if saver is None:
+            saver = _savers[path] = _sqlite_saver(path)
+            _start_retention(path)
+        return saver
+
+
+async def acreate_checkpointer(
+    kind: Optional[str] = None, path: Optional[str] = None
+) -> BaseCheckpointSaver:
+    """
+    Like ``create_checkpointer``, but both SQLite kinds get a new
+    AsyncSqliteSaver with its own connection, on the running loop.
+    """
+    settings = get_settings()
+    kind = kind or settings.checkpointer
+    _check_kind(kind)
+    if kind == MEMORY:
+        return create_checkpointer(kind, path)
+
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    path = path or settings.checkpoint_path
+    _ensure_parent(path)
+    conn = await aiosqlite.connect(path, timeout=settings.sqlite_busy_timeout_ms / 1000)
+    with _savers_lock:
+        _async_conns.append(conn)
+        _start_retention(path)
+    await conn.executescript(sqlite_pragmas())
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    await conn.executescript(INDEXES)
+    return saver
+
+
+async def _close_async_conns() -> None:
+    with _savers_lock:
+        conns = list(_async_conns)
+        _async_conns.clear()
+    for conn in conns:
+        await conn.close()
+
+
+async def aclose_checkpointers() -> None:
+    """``close_checkpointers`` from inside an event loop, async savers included."""
+    await _close_async_conns()
+    close_checkpointers()
+
+
+def close_checkpointers() -> None:
+    """
+    Flush and close the shared SQLite savers (tests, shutdown). The async
+    savers' connections are closed too unless an event loop is running in
+    this thread; there, use ``aclose_checkpointers``.
+    """
+    if _async_conns:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # aiosqlite runs each connection on a thread of its own, so it can
+            # be closed from a new loop.
+            asyncio.run(_close_async_conns())
+    with _savers_lock:
+        for worker in _retention.values():
+            worker.stop()
+        _retention.clear()
+        for saver in _savers.values():
+            if isinstance(saver, WriteBehindSaver):
+                saver.close()
+                saver = saver.inner
+            saver.conn.close()
+        _savers.clear()
+
+
+atexit.register(close_checkpointers)
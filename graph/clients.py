@@ -0,0 +1,96 @@
+"""
+Process-wide HTTP clients shared by every LLM and embedding call.
+
+Each ``ChatOpenAI`` / ``OpenAIEmbeddings`` instance otherwise creates its own
+httpx client and therefore its own connection pool; passing these shared
+clients lets concurrent graph runs reuse warm keep-alive connections. Pool
+size, keep-alive and HTTP/2 come from ``graph.config.Settings``. Every
+request goes through the rate limit, retries and circuit breaker of its model
+(graph.resilience).
+
+The async client belongs to the event loop that first uses it: long-lived
+servers should keep a single loop, and code that starts a new loop per call
+(``asyncio.run``) should call ``reset_clients()`` between loops.
+"""
+
+import importlib.util
+import threading
+from typing import Optional
+
+import httpx
+
+from graph.config import get_settings
+from graph.resilience import AsyncGuardedTransport, GuardedTransport, get_guard
+
+
+def _client_kwargs() -> dict:
+    settings = get_settings()
+    http2 = settings.http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("---HTTP: h2 IS NOT INSTALLED (pip install 'httpx[http2]'), USING HTTP/1.1---")
+        http2 = False
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_s,
+        ),
+        "http2": http2,
+    }
+
+
+def _timeout() -> httpx.Timeout:
+    settings = get_settings()
+    return httpx.Timeout(settings.http_timeout_s, connect=settings.http_connect_timeout_s)
+
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+
+
+# Not lru_cache: concurrent first calls must not each create their own pool.
+def get_http_client() -> httpx.Client:
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            # With a transport given, the client ignores limits / http2: the
+            # pool is configured on the transport the guard wraps.
+            transport = GuardedTransport(httpx.HTTPTransport(**_client_kwargs()))
+            _http_client = httpx.Client(transport=transport, timeout=_timeout())
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None:
+            transport = AsyncGuardedTransport(httpx.AsyncHTTPTransport(**_client_kwargs()))
+            _async_http_client = httpx.AsyncClient(transport=transport, timeout=_timeout())
+        return _async_http_client
+
+
+def reset_clients() -> None:
+    """Close the shared clients; the next call creates fresh ones (and guards) from settings."""
+    global _http_client, _async_http_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+        # The async client can only be closed from its own loop; dropping it is enough.
+        _http_client = _async_http_client = None
+        get_guard.cache_clear()
+
+
+def openai_client_kwargs() -> dict:
+    """Keyword arguments wiring ChatOpenAI / OpenAIEmbeddings to the shared clients."""
+    settings = get_settings()
+    kwargs = {
+        "http_client": get_http_client(),
+        "http_async_client": get_async_http_client(),
+        "timeout": settings.http_timeout_s,
+        # Retries happen in the transports' guards (graph.resilience).
+        "max_retries": 0,
+    }
+    if settings.openai_base_url:
+        kwargs["base_url"] = settings.openai_base_url
+    return kwargs
@@ -0,0 +1,187 @@
+"""
+Runtime settings for the graph, read from environment variables.
+
+Every setting has a default matching the original hard-coded behaviour, so an
+empty environment (plus OPENAI_API_KEY / TAVILY_API_KEY) still works. Values
+are read once, on first use, after ``load_dotenv()`` has populated the env.
+"""
+
+import os
+from dataclasses import dataclass, fields
+from functools import lru_cache
+
+ENV_PREFIX = "RAG_"
+
+
+@dataclass(frozen=True)
+class Settings:
+    # "openai" for the real models, "fake" for the offline stand-in in graph.fakes
+    llm_provider: str = "openai"
+    llm_model: str = "gpt-3.5-turbo"
+    llm_temperature: float = 0.0
+
+    # "local" uses the vendored RAG prompt, "hub" refreshes it from the
+    # LangChain hub into prompt_cache_dir at most once per prompt_cache_ttl_s
+    rag_prompt_source: str = "local"
+    rag_prompt_name: str = "rlm/rag-prompt"
+    prompt_cache_dir: str = ".cache/prompts"
+    prompt_cache_ttl_s: float = 24 * 3600
+
+    # Shared HTTP connection pool used by every OpenAI chat / embedding client
+    openai_base_url: str = ""
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_s: float = 30.0
+    http_timeout_s: float = 60.0
+    http_connect_timeout_s: float = 5.0
+    http2: bool = False
+
+    # "memory", "sqlite" or "async_sqlite", see graph.checkpointers
+    checkpointer: str = "memory"
+    # The memory checkpointer evicts least recently used threads beyond these
+    # caps, optionally to SQLite at memory_spill_path (graph.bounded_memory)
+    memory_max_threads: int = 10_000
+    memory_max_bytes: int = 256 * 1024 * 1024
+    memory_keep_history: bool = True
+    memory_spill_path: str = ""
+    checkpoint_path: str = "./.checkpoints/checkpoints.sqlite"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 16 * 1024
+    # Retention for the SQLite checkpointer (graph.retention): keep the newest
+    # keep_last checkpoints per thread and none older than ttl_s; 0 disables
+    checkpoint_keep_last: int = 0
+    checkpoint_ttl_s: float = 0.0
+    checkpoint_retention_interval_s: float = 300.0
+    # Commit SQLite checkpoints from a background writer, batch_size per
+    # transaction, with at most queue_size writes waiting (graph.write_behind)
+    checkpoint_write_behind: bool = False
+    checkpoint_write_queue_size: int = 1024
+    checkpoint_write_batch_size: int = 64
+
+    # "never" routes every question to one source; "uncertain" runs retrieval
+    # and web search in parallel when the router's confidence is below
+    # route_confidence_threshold; "always" does so for every routed question
+    route_fanout: str = "never"
+    route_confidence_threshold: float = 0.7
+    # Split vectorstore questions into at most decompose_max_sub_questions
+    # sub-questions, retrieved and graded in parallel (graph.nodes.decompose)
+    decompose_questions: bool = False
+    decompose_max_sub_questions: int = 4
+
+    # Documents beyond this many tokens are not sent to generate in one
+    # prompt: batches of at most this size are answered concurrently and the
+    # partial answers combined (map-reduce, graph.nodes.generate). Only
+    # documents the state keeps reach generate, so by default the state's
+    # token cap is generation_max_batches times this budget
+    generation_context_token_budget: int = 6000
+    generation_max_batches: int = 2
+
+    # Concurrent calls per provider across all async graph runs in the
+    # process, 0 for no limit (graph.limits)
+    llm_max_concurrency: int = 0
+    retriever_max_concurrency: int = 0
+    web_search_max_concurrency: int = 0
+    # Questions in flight in `python -m graph.batch`
+    batch_concurrency: int = 32
+    # Client-side rate limits per model / web search provider (0 for none),
+    # retries with jitter for 429s, 5xx and network errors, and a circuit
+    # breaker that fails fast after breaker_failure_threshold failures in a
+    # row for breaker_reset_s (graph.resilience; 0 disables the breaker)
+    llm_requests_per_min: float = 0.0
+    llm_tokens_per_min: float = 0.0
+    web_search_requests_per_min: float = 0.0
+    retry_max_attempts: int = 3
+    retry_base_s: float = 0.5
+    retry_cap_s: float = 20.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_s: float = 30.0
+
+    # Identical questions in flight at once share one graph run (HTTP
+    # requests without a thread_id) and identical router / grader inputs one
+    # LLM call; followers wait up to singleflight_timeout_s (graph.singleflight)
+    singleflight: bool = False
+    singleflight_chains: bool = False
+    singleflight_timeout_s: float = 120.0
+
+    # `python -m graph.server`: the variant served, and how long a request
+    # may run before it is cancelled
+    server_variant: str = "corrective"
+    server_request_timeout_s: float = 120.0
+    # Warm the graph once in a master process and fork the workers from it
+    # (graph.prefork); a worker is replaced after server_max_requests
+    # requests, 0 for never
+    server_prefork: bool = False
+    server_max_requests: int = 0
+    # At most admission_max_concurrency requests run the graph at once (0
+    # for no limit) and admission_max_queue wait; interactive requests go
+    # first and tenants take turns (graph.admission)
+    admission_max_concurrency: int = 0
+    admission_max_queue: int = 256
+
+    chroma_collection: str = "rag-chroma"
+    chroma_persist_directory: str = "./.chroma"
+
+    # Documents accumulated in the state across retrieval and web search
+    # loops are deduplicated by content and capped by count and tokens; the
+    # oldest are dropped first. A token cap of 0 follows the generation
+    # budget (see generation_max_batches); one at or below
+    # generation_context_token_budget means generate never map-reduces
+    state_max_documents: int = 12
+    state_document_token_budget: int = 0
+    # Keep document ids in the state (and checkpoints) and the text in a
+    # content-addressed store, in memory (docstore_max_entries, the rest in a
+    # temporary file) or in docstore_path (SQLite); a persistent checkpointer
+    # or memory spill needs docstore_path, without it the state keeps the text
+    state_document_refs: bool = True
+    docstore_path: str = ""
+    docstore_max_entries: int = 10_000
+    # Documents kept in the temporary file, longest evicted dropped first; 0
+    # for memory_max_threads * state_max_documents
+    docstore_overflow_max_entries: int = 0
+
+    web_search_k: int = 3
+    # Comma separated; with several providers "first" races them and "merge"
+    # combines their results
+    web_search_providers: str = "tavily"
+    web_search_mode: str = "first"
+    web_search_timeout_s: float = 10.0
+    # Send a duplicate request once a call is slower than this latency
+    # quantile of the provider's recent calls; 0 disables hedging
+    web_search_hedge_quantile: float = 0.95
+    # Results are split into chunks of chunk_tokens, ranked against the
+    # question, and at most token_budget tokens of them reach the prompt;
+    # rank=false keeps the old single concatenated document
+    web_search_rank: bool = True
+    web_search_chunk_tokens: int = 200
+    web_search_token_budget: int = 800
+    web_search_max_passages: int = 8
+    # Results are fresh for ttl_s, then served stale (and refreshed in the
+    # background) for another stale_s; cache_path adds a SQLite tier
+    web_search_cache_ttl_s: float = 3600.0
+    web_search_cache_stale_s: float = 600.0
+    web_search_cache_max_entries: int = 1024
+    web_search_cache_path: str = ""
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Build settings from ``RAG_<FIELD_NAME>`` environment variables."""
+        values = {}
+        for f in fields(cls):
+            raw = os.environ.get(f"{ENV_PREFIX}{f.name.upper()}")
+            if raw is None:
+                continue
+            if f.type in (bool, "bool"):
+                values[f.name] = raw.strip().lower() in ("1", "true", "yes", "on")
+            elif f.type in (int, "int"):
+                values[f.name] = int(raw)
+            elif f.type in (float, "float"):
+                values[f.name] = float(raw)
+            else:
+                values[f.name] = raw
+        return cls(**values)
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    return Settings.from_env()
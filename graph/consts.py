@@ -3,3 +3,22 @@ RETRIEVE = "retrieve"
 GRADE_DOCUMENTS = "grade_documents"
 GENERATE = "generate"
 WEBSEARCH = "websearch"
+ROUTE = "route_question"
+# Parallel retrieval and web search, joined and graded together (graph.builder)
+RETRIEVE_PARALLEL = "retrieve_parallel"
+WEBSEARCH_PARALLEL = "websearch_parallel"
+GRADE_UNION = "grade_union"
+# Sub-question decomposition: one retrieve-and-grade task per sub-question
+DECOMPOSE = "decompose"
+RETRIEVE_SUB_QUESTION = "retrieve_sub_question"
+REDUCE_SUB_QUESTIONS = "reduce_sub_questions"
+
+# When the router fans out to both sources instead of picking one
+FANOUT_NEVER = "never"
+FANOUT_UNCERTAIN = "uncertain"
+FANOUT_ALWAYS = "always"
+
+# Graph variants understood by graph.builder
+CORRECTIVE = "corrective"
+SELF_RAG = "self_rag"
+ADAPTIVE = "adaptive"
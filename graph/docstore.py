@@ -0,0 +1,206 @@
+"""
+Content-addressed store for the documents referenced by the graph state.
+
+``GraphState.documents`` holds document ids (the SHA-256 of the page
+content) instead of whole documents, so every checkpoint step serializes a
+few short strings rather than the same chunk text again. Nodes resolve ids
+through ``load_documents`` when they need the text.
+
+The in-memory tier is an LRU bounded by ``max_entries``. With a SQLite path
+documents also outlive the process, which is what a persistent checkpointer
+needs to resume a thread later; without one, documents evicted from memory
+move to a private temporary SQLite file, so ids held by the checkpoints of
+live threads keep resolving; that file keeps at most ``max_overflow_entries``
+documents, dropping the longest evicted first (by default as many as the
+memory checkpointer's ``memory_max_threads`` threads can reference). A persistent
+checkpointer (or memory spill) without ``docstore_path`` would keep ids that
+no longer resolve after a restart, so then the state holds the documents
+themselves (see ``refs_enabled``). Ids that still cannot be resolved are
+dropped, with a warning, rather than failing the run.
+"""
+
+import hashlib
+import json
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple, Union
+
+from langchain_core.documents import Document
+
+from graph.config import Settings, get_settings
+from graph.tokens import count_tokens
+
+DocumentRef = Union[str, Document]
+
+
+def document_id(doc: Document) -> str:
+    return hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+
+class DocumentStore:
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        sqlite_path: Optional[str] = None,
+        max_overflow_entries: int = 100_000,
+    ):
+        self.max_entries = max_entries
+        self.max_overflow_entries = max_overflow_entries
+        self.overflow_entries = 0
+        self._entries: "OrderedDict[str, Tuple[Document, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._persistent = bool(sqlite_path)
+        self._overflow: Optional[tempfile.TemporaryDirectory] = None
+        self._db = self._connect(sqlite_path) if sqlite_path else None
+
+    @staticmethod
+    def _connect(path: str, journal_mode: str = "WAL") -> sqlite3.Connection:
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute(f"PRAGMA journal_mode={journal_mode}")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS documents (id TEXT PRIMARY KEY, "
+            "content TEXT NOT NULL, metadata TEXT NOT NULL, tokens INTEGER NOT NULL)"
+        )
+        db.commit()
+        return db
+
+    def _write(self, doc_id: str, entry: Tuple[Document, int]) -> None:
+        if self._db is None:
+            # Created on the first eviction; removed with the store.
+            self._overflow = tempfile.TemporaryDirectory(prefix="docstore-")
+            self._db = self._connect(f"{self._overflow.name}/documents.sqlite", "OFF")
+            self._db.execute("PRAGMA synchronous=OFF")
+        doc, tokens = entry
+        inserted = self._db.execute(
+            "INSERT OR IGNORE INTO documents VALUES (?, ?, ?, ?)",
+            (doc_id, doc.page_content, json.dumps(doc.metadata, default=str), tokens),
+        ).rowcount
+        if not self._persistent:
+            self.overflow_entries += inserted
+            excess = self.overflow_entries - self.max_overflow_entries
+            if excess > 0:
+                # The longest evicted go first; their ids no longer resolve.
+                self._db.execute(
+                    "DELETE FROM documents WHERE rowid IN "
+                    "(SELECT rowid FROM documents ORDER BY rowid LIMIT ?)",
+                    (excess,),
+                )
+                self.overflow_entries -= excess
+        self._db.commit()
+
+    def put(self, doc: Document) -> str:
+        doc_id = document_id(doc)
+        with self._lock:
+            if doc_id in self._entries:
+                self._entries.move_to_end(doc_id)
+                return doc_id
+            entry = (doc, count_tokens(doc.page_content))
+            self._remember(doc_id, entry)
+            if self._persistent:
+                self._write(doc_id, entry)
+        return doc_id
+
+    def lookup(self, doc_id: str) -> Optional[Tuple[Document, int]]:
+        """The document and its token count, None if the store does not have it."""
+        with self._lock:
+            entry = self._entries.get(doc_id)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT content, metadata, tokens FROM documents WHERE id = ?", (doc_id,)
+                ).fetchone()
+                if row is not None:
+                    entry = (Document(page_content=row[0], metadata=json.loads(row[1])), row[2])
+                    if not self._persistent:
+                        # Back in memory: an entry lives in one tier at a time.
+                        self._db.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+                        self.overflow_entries -= 1
+                    self._remember(doc_id, entry)
+            if entry is not None:
+                self._entries.move_to_end(doc_id)
+            return entry
+
+    def _entry(self, doc_id: str) -> Tuple[Document, int]:
+        entry = self.lookup(doc_id)
+        if entry is None:
+            raise KeyError(f"document {doc_id} is not in the document store")
+        return entry
+
+    def get(self, doc_id: str) -> Document:
+        return self._entry(doc_id)[0]
+
+    def tokens(self, doc_id: str) -> int:
+        return self._entry(doc_id)[1]
+
+    def _remember(self, doc_id: str, entry: Tuple[Document, int]) -> None:
+        self._entries[doc_id] = entry
+        self._entries.move_to_end(doc_id)
+        while len(self._entries) > self.max_entries:
+            evicted_id, evicted = self._entries.popitem(last=False)
+            if not self._persistent:
+                self._write(evicted_id, evicted)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache(maxsize=None)
+def get_document_store() -> DocumentStore:
+    settings = get_settings()
+    return DocumentStore(
+        max_entries=settings.docstore_max_entries,
+        sqlite_path=settings.docstore_path or None,
+        max_overflow_entries=settings.docstore_overflow_max_entries
+        or settings.memory_max_threads * settings.state_max_documents,
+    )
+
+
+def store_document(doc: DocumentRef) -> str:
+    """The id of ``doc``, storing it first; ids pass through unchanged."""
+    return doc if isinstance(doc, str) else get_document_store().put(doc)
+
+
+@lru_cache(maxsize=None)
+def _refs_enabled(settings: Settings) -> bool:
+    if not settings.state_document_refs:
+        return False
+    persistent = settings.checkpointer != "memory" or settings.memory_spill_path
+    if persistent and not settings.docstore_path:
+        print(
+            "---DOCSTORE: PERSISTENT CHECKPOINTS WITHOUT RAG_DOCSTORE_PATH, "
+            "KEEPING DOCUMENTS IN THE STATE---"
+        )
+        return False
+    return True
+
+
+def refs_enabled() -> bool:
+    """
+    Whether nodes write document ids to the state: with ``state_document_refs``,
+    unless checkpoints outlive the process but the documents would not.
+    """
+    return _refs_enabled(get_settings())
+
+
+def document_refs(docs: Iterable[DocumentRef]) -> List[DocumentRef]:
+    """What nodes write to the state: ids when ``refs_enabled()``, else the documents."""
+    if not refs_enabled():
+        return list(docs)
+    return [store_document(doc) for doc in docs]
+
+
+def load_documents(refs: Optional[Iterable[DocumentRef]]) -> List[Document]:
+    """Resolve ids from the state to documents, dropping unknown ids; documents pass through."""
+    store = get_document_store()
+    documents: List[Document] = []
+    for ref in refs or []:
+        if isinstance(ref, str):
+            entry = store.lookup(ref)
+            if entry is None:
+                print(f"---DOCSTORE: DOCUMENT {ref[:12]} IS GONE, DROPPING IT---")
+                continue
+            ref = entry[0]
+        documents.append(ref)
+    return documents
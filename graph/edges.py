@@ -0,0 +1,171 @@
+import asyncio
+from typing import Any, Dict, List, Union
+
+from langgraph.constants import Send
+
+from graph.chains.answer_grader import get_answer_grader
+from graph.chains.hallucination_grader import get_hallucination_grader
+from graph.chains.router import RouteQuery, get_question_router
+from graph.config import get_settings
+from graph.consts import (
+    FANOUT_ALWAYS,
+    FANOUT_UNCERTAIN,
+    GENERATE,
+    RETRIEVE,
+    RETRIEVE_PARALLEL,
+    RETRIEVE_SUB_QUESTION,
+    WEBSEARCH,
+    WEBSEARCH_PARALLEL,
+)
+from graph.docstore import load_documents
+from graph.limits import LLM, provider_slot
+from graph.nodes.generate import generation_batches
+from graph.state import GraphState
+
+
+def decide_to_generate(state):
+    """
+    Decides whether to generate an answer or do web search based on current state.
+    Returns either WEBSEARCH or GENERATE as the next node.
+    """
+    print("---ASSESS GRADED DOCUMENTS---")
+
+    if state["web_search"]:
+        print(
+            "---DECISION: NOT ALL DOCUMENTS ARE NOT RELEVANT TO QUESTION, INCLUDE WEB SEARCH---"
+        )
+        return WEBSEARCH
+    else:
+        print("---DECISION: GENERATE---")
+        return GENERATE
+
+
+async def adecide_to_generate(state) -> str:
+    # No I/O, but a plain function would be run on a worker thread by ainvoke.
+    return decide_to_generate(state)
+
+
+def map_sub_questions(state: GraphState) -> List[Send]:
+    """Send every sub-question to its own retrieve-and-grade task, all in one step."""
+    print(f"---MAP {len(state['sub_questions'])} SUB-QUESTION(S)---")
+    sub_questions = state["sub_questions"]
+    return [
+        Send(RETRIEVE_SUB_QUESTION, {"question": q, "sub_questions": sub_questions})
+        for q in sub_questions
+    ]
+
+
+async def amap_sub_questions(state: GraphState) -> List[Send]:
+    return map_sub_questions(state)
+
+
+def grade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
+    """
+    Two-step grading process:
+    1. Check if generation is grounded in documents (no hallucinations)
+    2. Check if generation actually answers the question
+    Returns: "useful", "not useful", or "not supported"
+    """
+    print("---CHECK HALLUCINATIONS---")
+    question = state["question"]
+    generation = state["generation"]
+
+    checks = _grounding_checks(state)
+    if len(checks) == 1:
+        scores = [get_hallucination_grader().invoke(checks[0])]
+    else:
+        scores = get_hallucination_grader().batch(
+            checks, config={"max_concurrency": len(checks)}
+        )
+
+    if hallucination_grade := all(score.binary_score for score in scores):
+        print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
+        print("---GRADE GENERATION vs QUESTION---")
+        score = get_answer_grader().invoke({"question": question, "generation": generation})
+        return _answer_decision(score.binary_score)
+    else:
+        print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---")
+        return "not supported"
+
+
+async def agrade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
+    print("---CHECK HALLUCINATIONS---")
+    question = state["question"]
+    generation = state["generation"]
+
+    hallucination_grader = get_hallucination_grader()
+
+    async def check(inputs: Dict[str, Any]):
+        async with provider_slot(LLM):
+            return await hallucination_grader.ainvoke(inputs)
+
+    scores = await asyncio.gather(*(check(inputs) for inputs in _grounding_checks(state)))
+    if not all(score.binary_score for score in scores):
+        print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---")
+        return "not supported"
+    print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
+    print("---GRADE GENERATION vs QUESTION---")
+    async with provider_slot(LLM):
+        score = await get_answer_grader().ainvoke({"question": question, "generation": generation})
+    return _answer_decision(score.binary_score)
+
+
+def _grounding_checks(state: GraphState) -> List[Dict[str, Any]]:
+    """
+    Hallucination grader inputs: the generation against all documents, or,
+    after map-reduce generation, each partial answer against the batch it was
+    generated from and the combined answer against the partial answers.
+    """
+    documents = load_documents(state["documents"])
+    partial_answers = state.get("partial_answers") or []
+    if not partial_answers:
+        return [{"documents": documents, "generation": state["generation"]}]
+    checks = [
+        {"documents": batch, "generation": answer}
+        for batch, answer in zip(generation_batches(documents), partial_answers)
+    ]
+    checks.append({"documents": partial_answers, "generation": state["generation"]})
+    return checks
+
+
+def _answer_decision(answer_grade) -> str:
+    if answer_grade:
+        print("---DECISION: GENERATION ADDRESSES QUESTION---")
+        return "useful"
+    print("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
+    return "not useful"
+
+
+def route_question(state: GraphState) -> Union[str, List[str]]:
+    """
+    Decides initial path: web search or vector store retrieval
+    Returns either WEBSEARCH or RETRIEVE as the starting point, or both
+    parallel branches when the fan-out policy applies
+    """
+    print("---ROUTE QUESTION---")
+    question = state["question"]
+    source: RouteQuery = get_question_router().invoke({"question": question})
+    return _route(source)
+
+
+async def aroute_question(state: GraphState) -> Union[str, List[str]]:
+    print("---ROUTE QUESTION---")
+    async with provider_slot(LLM):
+        source: RouteQuery = await get_question_router().ainvoke({"question": state["question"]})
+    return _route(source)
+
+
+def _route(source: RouteQuery) -> Union[str, List[str]]:
+    settings = get_settings()
+    if settings.route_fanout == FANOUT_ALWAYS or (
+        settings.route_fanout == FANOUT_UNCERTAIN
+        and source.confidence < settings.route_confidence_threshold
+    ):
+        print(f"---ROUTE QUESTION TO RAG AND WEB SEARCH (confidence {source.confidence})---")
+        return [RETRIEVE_PARALLEL, WEBSEARCH_PARALLEL]
+    if source.datasource == WEBSEARCH:
+        print("---ROUTE QUESTION TO WEB SEARCH---")
+        return WEBSEARCH
+    elif source.datasource == "vectorstore":
+        print("---ROUTE QUESTION TO RAG---")
+        return RETRIEVE
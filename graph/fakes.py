@@ -0,0 +1,582 @@
+"""
+Offline stand-ins and fixtures used by the tests and the benchmark scripts.
+
+Nothing in here talks to the network, so everything built on top of it runs
+without API keys.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Type,
+    get_args,
+    get_origin,
+)
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, get_buffer_string
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel, Field
+
+WORDS = (
+    "agent memory planning tool use reflection prompt chain thought retrieval "
+    "vector store embedding attack jailbreak adversarial token model context "
+    "reasoning grader hallucination answer question search document graph"
+).split()
+
+
+def lorem(n_words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_text_pdf(path: str, pages: List[str], line_width: int = 90) -> None:
+    """Write a minimal, valid PDF with one text page per entry of ``pages``."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in pages:
+        lines = [text[i : i + line_width] for i in range(0, len(text), line_width)]
+        ops = ["BT", "/F1 10 Tf", "12 TL", "40 800 Td"]
+        ops += [f"({_pdf_escape(line)}) Tj T*" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids),
+        len(kids),
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def make_corpus(
+    root: str,
+    n_pdf: int = 10,
+    n_html: int = 10,
+    n_markdown: int = 10,
+    pages_per_pdf: int = 5,
+    words_per_page: int = 400,
+) -> List[str]:
+    """Generate a local directory of PDF, HTML and Markdown files."""
+    paths = []
+    for sub in ("pdf", "html", "md"):
+        os.makedirs(os.path.join(root, sub), exist_ok=True)
+    for i in range(n_pdf):
+        path = os.path.join(root, "pdf", f"doc_{i}.pdf")
+        pages = [lorem(words_per_page, seed=i * 1000 + p) for p in range(pages_per_pdf)]
+        write_text_pdf(path, pages)
+        paths.append(path)
+    for i in range(n_html):
+        path = os.path.join(root, "html", f"page_{i}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(
+                f"<html><head><title>page {i}</title></head>"
+                f"<body><p>{lorem(words_per_page, seed=10_000 + i)}</p></body></html>"
+            )
+        paths.append(path)
+    for i in range(n_markdown):
+        path = os.path.join(root, "md", f"note_{i}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# Note {i}\n\n{lorem(words_per_page, seed=20_000 + i)}\n")
+        paths.append(path)
+    return paths
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic set-of-words embedding using the hashing trick.
+
+    Unlike ``DeterministicFakeEmbedding`` texts sharing words end up close to
+    each other, so retrieval quality measured with it is meaningful.
+    """
+
+    def __init__(self, size: int = 512):
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        # Word presence rather than counts, so repeated filler does not drown
+        # out the rare words that actually identify a passage.
+        for word in set(re.findall(r"\w+", text.lower())):
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            vector[int.from_bytes(digest, "little") % self.size] = 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    # Native async like the real clients; the base class would use a thread.
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def _pseudo_word(rng: random.Random) -> str:
+    consonants, vowels = "bcdfghjklmnprstvz", "aeiou"
+    return "".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(3))
+
+
+def make_qa_corpus(
+    root: str,
+    n_docs: int = 30,
+    facts_per_doc: int = 4,
+    words_per_doc: int = 1500,
+    seed: int = 0,
+) -> List[Dict[str, str]]:
+    """
+    Generate Markdown documents with planted facts and the questions about them.
+
+    Every fact is a sentence like "The zorblax engine was built by lab kestrel"
+    inserted at a random position in filler text; the matching question is
+    "Which lab built the zorblax engine?" with answer "kestrel". The question
+    set is also written to ``questions.jsonl`` next to the documents.
+    """
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    questions = []
+    for i in range(n_docs):
+        words = lorem(words_per_doc, seed=seed * 100_000 + i).split()
+        sentences = [
+            " ".join(words[j : j + 15]).capitalize() + "."
+            for j in range(0, len(words), 15)
+        ]
+        for _ in range(facts_per_doc):
+            thing, lab = _pseudo_word(rng), _pseudo_word(rng)
+            fact = f"The {thing} engine was built by lab {lab}."
+            sentences.insert(rng.randrange(len(sentences)), fact)
+            questions.append(
+                {"question": f"Which lab built the {thing} engine?", "answer": lab}
+            )
+        paragraphs = [" ".join(sentences[j : j + 5]) for j in range(0, len(sentences), 5)]
+        with open(os.path.join(root, f"doc_{i}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Document {i}\n\n" + "\n\n".join(paragraphs) + "\n")
+    with open(os.path.join(root, "questions.jsonl"), "w", encoding="utf-8") as f:
+        for q in questions:
+            f.write(json.dumps(q) + "\n")
+    return questions
+
+
+def default_structured_response(schema: Type[BaseModel], prompt: str) -> BaseModel:
+    """A plausible, deterministic instance of ``schema``: "yes" grades, first choices."""
+    values: Dict[str, Any] = {}
+    for name, field in schema.model_fields.items():
+        annotation = field.annotation
+        if get_origin(annotation) is Literal:
+            values[name] = get_args(annotation)[0]
+        elif annotation is bool:
+            values[name] = True
+        elif annotation is str:
+            values[name] = "yes" if name == "binary_score" else ""
+        elif annotation in (int, float):
+            values[name] = annotation(1)
+        elif get_origin(annotation) in (list, List):
+            values[name] = []
+    return schema(**values)
+
+
+class ContextWindowExceeded(ValueError):
+    """Raised by ``FakeChatModel`` for prompts longer than its ``context_window``."""
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline chat model with a fixed latency.
+
+    Plain calls answer with ``answer``; ``with_structured_output(schema)``
+    returns ``structured_responder(schema, prompt_text)``. Every call is
+    appended to ``calls`` as ``(kind, prompt_text)`` so tests can count them.
+    """
+
+    answer: str = "This is a fake answer grounded in the provided context."
+    latency_s: float = 0.0
+    # Extra latency per prompt token, to model prefill cost of long prompts
+    latency_per_token_s: float = 0.0
+    # Prompts over this many tokens fail, like a real model's context window; 0 for no limit
+    context_window: int = 0
+    structured_responder: Callable[[Type[BaseModel], str], BaseModel] = (
+        default_structured_response
+    )
+    calls: List[Tuple[str, str]] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _delay(self, text: str) -> float:
+        if not self.latency_per_token_s and not self.context_window:
+            return self.latency_s
+        from graph.tokens import count_tokens
+
+        tokens = count_tokens(text)
+        if self.context_window and tokens > self.context_window:
+            raise ContextWindowExceeded(
+                f"prompt of {tokens} tokens exceeds the context window of {self.context_window}"
+            )
+        return self.latency_s + self.latency_per_token_s * tokens
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text = get_buffer_string(messages)
+        self.calls.append(("generate", text))
+        time.sleep(self._delay(text))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.answer))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text = get_buffer_string(messages)
+        self.calls.append(("generate", text))
+        await asyncio.sleep(self._delay(text))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.answer))])
+
+    def _chunks(self) -> List[ChatGenerationChunk]:
+        words = self.answer.split(" ")
+        return [
+            ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+            for i, word in enumerate(words)
+        ]
+
+    # Streaming yields the answer word by word once the latency has passed.
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        text = get_buffer_string(messages)
+        self.calls.append(("generate", text))
+        time.sleep(self._delay(text))
+        for chunk in self._chunks():
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        text = get_buffer_string(messages)
+        self.calls.append(("generate", text))
+        await asyncio.sleep(self._delay(text))
+        for chunk in self._chunks():
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema, **kwargs) -> Runnable:
+        def respond(prompt_value) -> BaseModel:
+            text = prompt_value.to_string()
+            self.calls.append((schema.__name__, text))
+            time.sleep(self._delay(text))
+            return self.structured_responder(schema, text)
+
+        async def arespond(prompt_value) -> BaseModel:
+            text = prompt_value.to_string()
+            self.calls.append((schema.__name__, text))
+            await asyncio.sleep(self._delay(text))
+            return self.structured_responder(schema, text)
+
+        return RunnableLambda(respond, afunc=arespond)
+
+
+class FakeSearchTool:
+    """
+    Stand-in for ``TavilySearchResults``: ``invoke({"query": ...})`` returns
+    ``k`` deterministic results shaped like Tavily's (``url`` and ``content``).
+    """
+
+    def __init__(self, k: int = 3, latency_s: float = 0.0, words_per_result: int = 120):
+        self.k = k
+        self.latency_s = latency_s
+        self.words_per_result = words_per_result
+        self.queries: List[str] = []
+
+    def results(self, query: str) -> List[Dict[str, str]]:
+        seed = int(hashlib.sha256(query.encode()).hexdigest()[:8], 16)
+        return [
+            {
+                "url": f"https://example.com/{seed}/{i}",
+                "content": f"{query} " + lorem(self.words_per_result, seed=seed + i),
+            }
+            for i in range(self.k)
+        ]
+
+    def invoke(self, tool_input: Dict[str, Any], config: Any = None) -> List[Dict[str, str]]:
+        self.queries.append(tool_input["query"])
+        time.sleep(self.latency_s)
+        return self.results(tool_input["query"])
+
+    async def ainvoke(self, tool_input: Dict[str, Any], config: Any = None) -> List[Dict[str, str]]:
+        self.queries.append(tool_input["query"])
+        await asyncio.sleep(self.latency_s)
+        return self.results(tool_input["query"])
+
+
+def fake_retriever(n_docs: int = 20, k: int = 4, seed: int = 0):
+    """An in-memory retriever over generated documents, embedded with HashingEmbeddings."""
+    from langchain_core.documents import Document
+    from langchain_core.vectorstores import InMemoryVectorStore
+
+    store = InMemoryVectorStore(HashingEmbeddings(size=256))
+    store.add_documents(
+        [
+            Document(page_content=lorem(150, seed=seed + i), metadata={"source": f"doc_{i}"})
+            for i in range(n_docs)
+        ]
+    )
+    return store.as_retriever(search_kwargs={"k": k})
+
+
+def _fake_tool_arguments(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    args: Dict[str, Any] = {}
+    for name, spec in parameters.get("properties", {}).items():
+        if "enum" in spec:
+            args[name] = spec["enum"][0]
+        elif spec.get("type") == "boolean":
+            args[name] = True
+        elif spec.get("type") in ("number", "integer"):
+            args[name] = 1
+        elif spec.get("type") == "array":
+            args[name] = []
+        else:
+            args[name] = "yes" if name == "binary_score" else ""
+    return args
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+    # Send headers and body in one segment; otherwise Nagle + delayed ACK add ~40ms.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with self.server.lock:
+            self.server.requests += 1
+        latency_s, status = self.server.sample()
+        if status != 200:
+            message = "Rate limit reached" if status == 429 else "The server had an error"
+            data = json.dumps({"error": {"message": message, "type": None, "code": None}}).encode()
+            self.send_response(status)
+            if status == 429 and self.server.retry_after_s is not None:
+                self.send_header("Retry-After", f"{self.server.retry_after_s:g}")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        time.sleep(latency_s)
+        if self.path.endswith("/embeddings"):
+            inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            embed = HashingEmbeddings(size=64)
+            payload = {
+                "object": "list",
+                "data": [
+                    {"object": "embedding", "index": i, "embedding": embed.embed_query(str(text))}
+                    for i, text in enumerate(inputs)
+                ],
+                "model": body.get("model", "fake"),
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            }
+        else:
+            message: Dict[str, Any] = {"role": "assistant", "content": self.server.answer}
+            if body.get("tools"):
+                function = body["tools"][0]["function"]
+                message = {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [
+                        {
+                            "id": "call_0",
+                            "type": "function",
+                            "function": {
+                                "name": function["name"],
+                                "arguments": json.dumps(
+                                    _fake_tool_arguments(function.get("parameters", {}))
+                                ),
+                            },
+                        }
+                    ],
+                }
+            payload = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """
+    Local OpenAI-compatible HTTP stand-in for chat completions and embeddings.
+
+    Counts accepted TCP connections and requests so connection reuse can be
+    measured. Use as a context manager; ``base_url`` is what ``ChatOpenAI``
+    and ``OpenAIEmbeddings`` (or ``RAG_OPENAI_BASE_URL``) should point at.
+
+    Like a busy provider, it can answer 429 (with a Retry-After of
+    ``retry_after_s``, None for no header) to requests beyond
+    ``requests_per_s`` in any one-second window and to a random
+    ``rate_limit_prob`` share of the others, answer 500 to an ``error_prob``
+    share, and delay a ``spike_prob`` share of the requests by ``spike_s``.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        latency_s: float = 0.0,
+        answer: str = "This is a fake answer.",
+        requests_per_s: float = 0.0,
+        rate_limit_prob: float = 0.0,
+        retry_after_s: Optional[float] = 1.0,
+        error_prob: float = 0.0,
+        spike_prob: float = 0.0,
+        spike_s: float = 0.0,
+        seed: int = 0,
+    ):
+        super().__init__(("127.0.0.1", 0), _FakeOpenAIHandler)
+        self.latency_s = latency_s
+        self.answer = answer
+        self.requests_per_s = requests_per_s
+        self.rate_limit_prob = rate_limit_prob
+        self.retry_after_s = retry_after_s
+        self.error_prob = error_prob
+        self.spike_prob = spike_prob
+        self.spike_s = spike_s
+        self.connections = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._window = (0, 0)  # (second, requests accepted in it)
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def sample(self) -> Tuple[float, int]:
+        """The latency and the status code of the next request."""
+        with self.lock:
+            second, accepted = self._window
+            now = int(time.monotonic())
+            if now != second:
+                second, accepted = now, 0
+            limited = (self.requests_per_s and accepted >= self.requests_per_s) or (
+                self._rng.random() < self.rate_limit_prob
+            )
+            if limited:
+                self.rate_limited += 1
+            else:
+                accepted += 1
+            self._window = (second, accepted)
+            spike = self._rng.random() < self.spike_prob
+            failed = self._rng.random() < self.error_prob
+        status = 429 if limited else 500 if failed else 200
+        return self.latency_s + (self.spike_s if spike else 0.0), status
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class FakeSearchProvider:
+    """
+    Async web search provider with a long-tailed latency distribution.
+
+    Most calls take about ``median_s`` (log-normal jitter); with probability
+    ``tail_prob`` a call stalls for ``tail_s`` instead, like a provider
+    having a bad moment.
+    """
+
+    def __init__(
+        self,
+        name: str = "fake",
+        median_s: float = 0.0,
+        tail_prob: float = 0.0,
+        tail_s: float = 0.0,
+        fail_prob: float = 0.0,
+        seed: int = 0,
+    ):
+        self.name = name
+        self.median_s = median_s
+        self.tail_prob = tail_prob
+        self.tail_s = tail_s
+        self.fail_prob = fail_prob
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._tool = FakeSearchTool()
+
+    def sample_latency(self) -> float:
+        if self._rng.random() < self.tail_prob:
+            return self.tail_s
+        return self.median_s * self._rng.lognormvariate(0, 0.25)
+
+    async def asearch(self, query: str, k: int) -> List[Dict[str, str]]:
+        self.calls += 1
+        await asyncio.sleep(self.sample_latency())
+        if self._rng.random() < self.fail_prob:
+            raise ConnectionError(f"{self.name} failed")
+        return self._tool.results(query)[:k]
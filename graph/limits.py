@@ -0,0 +1,92 @@
+"""
+Concurrency limits per outbound provider, shared by every async graph run.
+
+The async nodes and edges wrap each provider call in
+``async with provider_slot(LLM):`` (or ``RETRIEVER`` / ``WEB_SEARCH``), so
+however many questions are in flight, no provider sees more than its limit
+of concurrent calls. Limits come from ``RAG_LLM_MAX_CONCURRENCY``,
+``RAG_RETRIEVER_MAX_CONCURRENCY`` and ``RAG_WEB_SEARCH_MAX_CONCURRENCY``
+(0 means unlimited); ``use_limits`` overrides them for one run, as the
+batch runner does. Every call is counted in ``provider_calls_total``.
+"""
+
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from graph.config import get_settings
+from graph.metrics import counter, histogram
+
+LLM = "llm"
+RETRIEVER = "retriever"
+WEB_SEARCH = "web_search"
+PROVIDERS = (LLM, RETRIEVER, WEB_SEARCH)
+
+provider_calls = counter("provider_calls_total", "Outbound provider calls by provider")
+provider_wait = histogram(
+    "provider_wait_seconds", "Time spent waiting for a provider concurrency slot"
+)
+
+
+class ProviderLimits:
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = {provider: n for provider, n in limits.items() if n > 0}
+        # asyncio primitives belong to one event loop, so keep a set per loop.
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def _semaphore(self, provider: str) -> Optional[asyncio.Semaphore]:
+        if provider not in self.limits:
+            return None
+        per_loop = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        if provider not in per_loop:
+            per_loop[provider] = asyncio.Semaphore(self.limits[provider])
+        return per_loop[provider]
+
+    @asynccontextmanager
+    async def slot(self, provider: str) -> AsyncIterator[None]:
+        provider_calls.inc(provider=provider)
+        semaphore = self._semaphore(provider)
+        if semaphore is None:
+            yield
+            return
+        start = time.perf_counter()
+        async with semaphore:
+            provider_wait.observe(time.perf_counter() - start, provider=provider)
+            yield
+
+
+@lru_cache(maxsize=None)
+def get_limits() -> ProviderLimits:
+    settings = get_settings()
+    return ProviderLimits(
+        {
+            LLM: settings.llm_max_concurrency,
+            RETRIEVER: settings.retriever_max_concurrency,
+            WEB_SEARCH: settings.web_search_max_concurrency,
+        }
+    )
+
+
+_current: ContextVar[Optional[ProviderLimits]] = ContextVar("provider_limits", default=None)
+
+
+@contextmanager
+def use_limits(limits: ProviderLimits) -> Iterator[None]:
+    """Apply ``limits`` to graph runs started in this context (and its tasks)."""
+    token = _current.set(limits)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def provider_slot(provider: str):
+    return (_current.get() or get_limits()).slot(provider)
+
+
+def provider_call_counts() -> Dict[str, int]:
+    return {provider: int(provider_calls.value(provider=provider)) for provider in PROVIDERS}
@@ -0,0 +1,132 @@
+"""
+Minimal in-process metrics: counters and histograms with labels.
+
+Everything registers itself in ``REGISTRY``; ``render_prometheus()`` produces
+the Prometheus text exposition format and ``snapshot()`` a plain dict for
+logs, tests and benchmark reports.
+"""
+
+import bisect
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt(name: str, key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{_fmt(self.name, k)} {v}" for k, v in sorted(self._values.items())]
+        return lines
+
+    def snapshot(self) -> Dict[str, float]:
+        return {_fmt(self.name, k): v for k, v in self._values.items()}
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # Bucket counts, the count above the last bucket, then [sum, count].
+        self._series: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 3))
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels: str) -> float:
+        series = self._series.get(_key(labels))
+        return series[-1] if series else 0.0
+
+    def sum(self, **labels: str) -> float:
+        series = self._series.get(_key(labels))
+        return series[-2] if series else 0.0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                lines.append(f"{_fmt(self.name + '_bucket', key, [('le', str(bound))])} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            lines.append(f"{_fmt(self.name + '_bucket', key, [('le', '+Inf')])} {cumulative}")
+            lines.append(f"{_fmt(self.name + '_sum', key)} {series[-2]}")
+            lines.append(f"{_fmt(self.name + '_count', key)} {series[-1]}")
+        return lines
+
+    def snapshot(self) -> Dict[str, float]:
+        out = {}
+        for key, series in self._series.items():
+            out[_fmt(self.name + "_count", key)] = series[-1]
+            out[_fmt(self.name + "_sum", key)] = series[-2]
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, buckets=buckets)
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, float]:
+        out: Dict[str, float] = {}
+        for metric in self._metrics.values():
+            out.update(metric.snapshot())
+        return out
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+histogram = REGISTRY.histogram
@@ -1,6 +1,39 @@
-from graph.nodes.generate import generate
-from graph.nodes.grade_documents import grade_documents
-from graph.nodes.retrieve import retrieve
-from graph.nodes.web_search import web_search
+from graph.nodes.decompose import (
+    adecompose,
+    areduce_sub_questions,
+    aretrieve_sub_question,
+    decompose,
+    reduce_sub_questions,
+    retrieve_sub_question,
+)
+from graph.nodes.fanout import (
+    aretrieve_parallel,
+    aweb_search_parallel,
+    retrieve_parallel,
+    web_search_parallel,
+)
+from graph.nodes.generate import agenerate, generate
+from graph.nodes.grade_documents import agrade_documents, grade_documents
+from graph.nodes.retrieve import aretrieve, retrieve
+from graph.nodes.web_search import aweb_search, web_search
 
-__all__ = ["generate", "grade_documents", "retrieve", "web_search"]
+__all__ = [
+    "adecompose",
+    "agenerate",
+    "agrade_documents",
+    "areduce_sub_questions",
+    "aretrieve",
+    "aretrieve_parallel",
+    "aretrieve_sub_question",
+    "aweb_search",
+    "aweb_search_parallel",
+    "decompose",
+    "generate",
+    "grade_documents",
+    "reduce_sub_questions",
+    "retrieve",
+    "retrieve_parallel",
+    "retrieve_sub_question",
+    "web_search",
+    "web_search_parallel",
+]
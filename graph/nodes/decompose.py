@@ -0,0 +1,97 @@
+"""
+Sub-question decomposition: split, retrieve and grade per part, reduce.
+
+``decompose`` asks the LLM to split the question and clears the documents
+of any earlier question. graph.edges.map_sub_questions then sends every
+sub-question to ``retrieve_sub_question`` as its own task, so they all run
+in one step. Each task retrieves and grades against its sub-question and
+adds the relevant documents, which ``merge_documents`` deduplicates into one
+context, and records its sub-question in ``unanswered`` if nothing passed.
+Each task keeps only its fair share of the state's document caps (at least
+its most relevant document), so the merge never evicts one sub-question's
+documents to make room for another's.
+``reduce_sub_questions`` runs once all tasks are done and asks for web
+search only if some sub-question is left unanswered; graph.nodes.web_search
+then searches those sub-questions, each within the same fair share.
+
+The tasks never write ``question``: it holds the original question, which
+``generate`` answers, and parallel writes to it would be rejected.
+"""
+
+from typing import Any, Dict, List
+
+from graph.chains.decomposer import SubQuestions, get_question_decomposer
+from graph.config import get_settings
+from graph.limits import LLM, provider_slot
+from graph.nodes.grade_documents import agrade_documents, grade_documents
+from graph.nodes.retrieve import aretrieve, retrieve
+from graph.state import GraphState, Replace, ReplaceDocuments, fair_share
+
+
+def _decomposed(question: str, result: SubQuestions) -> Dict[str, Any]:
+    sub_questions: List[str] = []
+    for sub_question in result.sub_questions:
+        sub_question = sub_question.strip()
+        if sub_question and sub_question not in sub_questions:
+            sub_questions.append(sub_question)
+    sub_questions = sub_questions[: get_settings().decompose_max_sub_questions] or [question]
+    print(f"---DECOMPOSE: {len(sub_questions)} SUB-QUESTION(S)---")
+    return {
+        "question": question,
+        "sub_questions": sub_questions,
+        "documents": ReplaceDocuments(),
+        "unanswered": Replace(),
+    }
+
+
+def decompose(state: GraphState) -> Dict[str, Any]:
+    print("---DECOMPOSE QUESTION---")
+    question = state["question"]
+    result = get_question_decomposer().invoke(
+        {"question": question, "max_sub_questions": get_settings().decompose_max_sub_questions}
+    )
+    return _decomposed(question, result)
+
+
+async def adecompose(state: GraphState) -> Dict[str, Any]:
+    print("---DECOMPOSE QUESTION---")
+    question = state["question"]
+    async with provider_slot(LLM):
+        result = await get_question_decomposer().ainvoke(
+            {"question": question, "max_sub_questions": get_settings().decompose_max_sub_questions}
+        )
+    return _decomposed(question, result)
+
+
+def _graded(sub_question: str, graded: Dict[str, Any], shares: int) -> Dict[str, Any]:
+    documents = fair_share(list(graded["documents"]), shares)
+    if not documents:
+        print(f"---SUB-QUESTION UNANSWERED: {sub_question}---")
+    return {"documents": documents, "unanswered": [] if documents else [sub_question]}
+
+
+def retrieve_sub_question(state: GraphState) -> Dict[str, Any]:
+    """Retrieve and grade one sub-question; ``state`` is the payload of its ``Send``."""
+    sub_question = state["question"]
+    retrieved = retrieve({"question": sub_question})
+    return _graded(sub_question, grade_documents(retrieved), len(state["sub_questions"]))
+
+
+async def aretrieve_sub_question(state: GraphState) -> Dict[str, Any]:
+    sub_question = state["question"]
+    retrieved = await aretrieve({"question": sub_question})
+    graded = await agrade_documents(retrieved)
+    return _graded(sub_question, graded, len(state["sub_questions"]))
+
+
+def reduce_sub_questions(state: GraphState) -> Dict[str, Any]:
+    unanswered = state.get("unanswered") or []
+    print(
+        f"---REDUCE SUB-QUESTIONS: {len(state['documents'])} DOCUMENTS, "
+        f"{len(unanswered)} UNANSWERED---"
+    )
+    return {"web_search": bool(unanswered)}
+
+
+async def areduce_sub_questions(state: GraphState) -> Dict[str, Any]:
+    return reduce_sub_questions(state)
@@ -0,0 +1,31 @@
+"""
+Branches of the parallel fan-out: retrieval and web search in one step.
+
+They run the normal nodes but return only ``documents``; ``question`` is
+unchanged and two writes to it in one step would be rejected. The
+retrieval branch replaces the documents of any earlier question and the
+web search branch adds to them; LangGraph applies a step's writes in node
+order, and graph.builder adds the retrieval branch first.
+"""
+
+from typing import Any, Dict
+
+from graph.nodes.retrieve import aretrieve, retrieve
+from graph.nodes.web_search import aweb_search, web_search
+from graph.state import GraphState
+
+
+def retrieve_parallel(state: GraphState) -> Dict[str, Any]:
+    return {"documents": retrieve(state)["documents"]}
+
+
+async def aretrieve_parallel(state: GraphState) -> Dict[str, Any]:
+    return {"documents": (await aretrieve(state))["documents"]}
+
+
+def web_search_parallel(state: GraphState) -> Dict[str, Any]:
+    return {"documents": web_search(state)["documents"]}
+
+
+async def aweb_search_parallel(state: GraphState) -> Dict[str, Any]:
+    return {"documents": (await aweb_search(state))["documents"]}
@@ -1,13 +1,104 @@
-from typing import Any, Dict
+"""
+Answer the question from the documents in the state.
 
-from graph.chains.generation import generation_chain
+Documents that fit ``RAG_GENERATION_CONTEXT_TOKEN_BUDGET`` go into one
+prompt, as they always have. Beyond it, the documents are packed in order
+into batches of at most that many tokens (a document larger than a batch is
+split), every batch is answered concurrently and the partial answers are
+combined by one more call. The partial answers are kept in the state so the
+hallucination grader can check each against its own batch (graph.edges).
+Generate only sees the documents the state keeps, so this happens only when
+the state's token cap (``RAG_STATE_DOCUMENT_TOKEN_BUDGET``, by default
+``RAG_GENERATION_MAX_BATCHES`` budgets) is above the budget.
+"""
+
+import asyncio
+from typing import Any, Dict, List
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from graph.chains.generation import get_combine_chain, get_generation_chain
+from graph.config import get_settings
+from graph.docstore import load_documents
+from graph.limits import LLM, provider_slot
 from graph.state import GraphState
+from graph.tokens import count_tokens
+
+
+def context_batches(documents: List[Document], token_budget: int) -> List[List[Document]]:
+    """``documents`` in order, in batches of at most ``token_budget`` tokens each."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=token_budget, chunk_overlap=0, length_function=count_tokens
+    )
+    batches: List[List[Document]] = [[]]
+    used = 0
+    for document in documents:
+        tokens = count_tokens(document.page_content)
+        if tokens <= token_budget:
+            parts = [(document, tokens)]
+        else:
+            split = splitter.split_documents([document])
+            parts = [(part, count_tokens(part.page_content)) for part in split]
+        for part, tokens in parts:
+            if batches[-1] and used + tokens > token_budget:
+                batches.append([])
+                used = 0
+            batches[-1].append(part)
+            used += tokens
+    return batches
+
+
+def generation_batches(documents: List[Document]) -> List[List[Document]]:
+    """The batches ``generate`` answers separately; a single batch means one prompt."""
+    return context_batches(documents, get_settings().generation_context_token_budget)
+
+
+def _combine_inputs(question: str, partial_answers: List[str]) -> Dict[str, Any]:
+    answers = "\n".join(f"{i}. {answer}" for i, answer in enumerate(partial_answers, start=1))
+    return {"question": question, "answers": answers}
 
 
 def generate(state: GraphState) -> Dict[str, Any]:
     print("---GENERATE---")
     question = state["question"]
-    documents = state["documents"]
+    documents = load_documents(state["documents"])
+    batches = generation_batches(documents)
+
+    if len(batches) == 1:
+        generation = get_generation_chain().invoke({"context": documents, "question": question})
+        return {"question": question, "generation": generation, "partial_answers": []}
+
+    print(f"---GENERATE: CONTEXT OVER BUDGET, ANSWERING {len(batches)} BATCHES---")
+    partial_answers = get_generation_chain().batch(
+        [{"context": batch, "question": question} for batch in batches],
+        config={"max_concurrency": len(batches)},
+    )
+    generation = get_combine_chain().invoke(_combine_inputs(question, partial_answers))
+    return {"question": question, "generation": generation, "partial_answers": partial_answers}
+
+
+async def agenerate(state: GraphState) -> Dict[str, Any]:
+    print("---GENERATE---")
+    question = state["question"]
+    documents = load_documents(state["documents"])
+    batches = generation_batches(documents)
+
+    if len(batches) == 1:
+        async with provider_slot(LLM):
+            generation = await get_generation_chain().ainvoke(
+                {"context": documents, "question": question}
+            )
+        return {"question": question, "generation": generation, "partial_answers": []}
+
+    print(f"---GENERATE: CONTEXT OVER BUDGET, ANSWERING {len(batches)} BATCHES---")
+    generation_chain = get_generation_chain()
+
+    async def answer(batch: List[Document]) -> str:
+        async with provider_slot(LLM):
+            return await generation_chain.ainvoke({"context": batch, "question": question})
 
-    generation = generation_chain.invoke({"context": documents, "question": question})
-    return {"documents": documents, "question": question, "generation": generation}
+    partial_answers = list(await asyncio.gather(*(answer(batch) for batch in batches)))
+    async with provider_slot(LLM):
+        generation = await get_combine_chain().ainvoke(_combine_inputs(question, partial_answers))
+    return {"question": question, "generation": generation, "partial_answers": partial_answers}
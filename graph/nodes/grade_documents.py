@@ -1,7 +1,10 @@
+import asyncio
 from typing import Any, Dict
 
-from graph.chains.retrieval_grader import retrieval_grader
-from graph.state import GraphState
+from graph.chains.retrieval_grader import get_retrieval_grader
+from graph.docstore import document_refs, load_documents
+from graph.limits import LLM, provider_slot
+from graph.state import GraphState, ReplaceDocuments
 
 
 def grade_documents(state: GraphState) -> Dict[str, Any]:
@@ -18,14 +21,17 @@ def grade_documents(state: GraphState) -> Dict[str, Any]:
 
     print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
     question = state["question"]
-    documents = state["documents"]
+    documents = load_documents(state["documents"])
 
+    # Documents are graded independently, so grade them all at once; batch()
+    # would otherwise use a pool sized by CPU count, not by the LLM's latency.
+    scores = get_retrieval_grader().batch(
+        [{"question": question, "document": d.page_content} for d in documents],
+        config={"max_concurrency": max(len(documents), 1)},
+    )
     filtered_docs = []
     web_search = False
-    for d in documents:
-        score = retrieval_grader.invoke(
-            {"question": question, "document": d.page_content}
-        )
+    for d, score in zip(documents, scores):
         grade = score.binary_score
         if grade.lower() == "yes":
             print("---GRADE: DOCUMENT RELEVANT---")
@@ -34,4 +40,40 @@ def grade_documents(state: GraphState) -> Dict[str, Any]:
             print("---GRADE: DOCUMENT NOT RELEVANT---")
             web_search = True
             continue
-    return {"documents": filtered_docs, "question": question, "web_search": web_search}
+    return {
+        "documents": ReplaceDocuments(document_refs(filtered_docs)),
+        "question": question,
+        "web_search": web_search,
+    }
+
+
+async def agrade_documents(state: GraphState) -> Dict[str, Any]:
+    """Async ``grade_documents``: the same grades, one ``ainvoke`` per document."""
+
+    print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
+    question = state["question"]
+    documents = load_documents(state["documents"])
+
+    retrieval_grader = get_retrieval_grader()
+
+    async def grade(d):
+        async with provider_slot(LLM):
+            return await retrieval_grader.ainvoke(
+                {"question": question, "document": d.page_content}
+            )
+
+    scores = await asyncio.gather(*(grade(d) for d in documents))
+    filtered_docs = []
+    web_search = False
+    for d, score in zip(documents, scores):
+        if score.binary_score.lower() == "yes":
+            print("---GRADE: DOCUMENT RELEVANT---")
+            filtered_docs.append(d)
+        else:
+            print("---GRADE: DOCUMENT NOT RELEVANT---")
+            web_search = True
+    return {
+        "documents": ReplaceDocuments(document_refs(filtered_docs)),
+        "question": question,
+        "web_search": web_search,
+    }
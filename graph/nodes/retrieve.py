@@ -1,12 +1,23 @@
 from typing import Any, Dict
 
-from graph.state import GraphState
-from ingestion import retriever
+from graph.docstore import document_refs
+from graph.limits import RETRIEVER, provider_slot
+from graph.state import GraphState, ReplaceDocuments
+from ingestion import get_retriever
 
 
 def retrieve(state: GraphState) -> Dict[str, Any]:
     print("---RETRIEVE---")
     question = state["question"]
 
-    documents = retriever.invoke(question)
-    return {"documents": documents, "question": question}
+    documents = get_retriever().invoke(question)
+    return {"documents": ReplaceDocuments(document_refs(documents)), "question": question}
+
+
+async def aretrieve(state: GraphState) -> Dict[str, Any]:
+    print("---RETRIEVE---")
+    question = state["question"]
+
+    async with provider_slot(RETRIEVER):
+        documents = await get_retriever().ainvoke(question)
+    return {"documents": ReplaceDocuments(document_refs(documents)), "question": question}
@@ -1,23 +1,116 @@
-from typing import Any, Dict
+import asyncio
+from functools import lru_cache
+from typing import Any, Dict, List
 
-from langchain.schema import Document
-from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_core.documents import Document
 
-from graph.state import GraphState
+from graph.config import get_settings
+from graph.docstore import document_refs
+from graph.limits import WEB_SEARCH, provider_slot
+from graph.resilience import CircuitOpen
+from graph.search.cache import CachedSearch, SearchCache
+from graph.search.client import WebSearchClient, WebSearchTimeout
+from graph.search.providers import get_provider, get_web_search_tool  # noqa: F401
+from graph.search.rank import rank_results
+from graph.state import GraphState, fair_share
 
-web_search_tool = TavilySearchResults(k=3)
+
+@lru_cache(maxsize=None)
+def get_search_client() -> WebSearchClient:
+    settings = get_settings()
+    names = [n.strip() for n in settings.web_search_providers.split(",") if n.strip()]
+    return WebSearchClient(
+        [get_provider(name) for name in names],
+        timeout_s=settings.web_search_timeout_s,
+        hedge_quantile=settings.web_search_hedge_quantile,
+        mode=settings.web_search_mode,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_cached_search() -> CachedSearch:
+    settings = get_settings()
+    cache = SearchCache(
+        ttl_s=settings.web_search_cache_ttl_s,
+        stale_s=settings.web_search_cache_stale_s,
+        max_entries=settings.web_search_cache_max_entries,
+        sqlite_path=settings.web_search_cache_path or None,
+    )
+    return CachedSearch(cache, provider=settings.web_search_providers, k=settings.web_search_k)
+
+
+def _search(query: str):
+    return get_search_client().search(query, get_settings().web_search_k)
+
+
+async def _asearch(query: str):
+    # Cache hits never get here, so they take no provider slot.
+    async with provider_slot(WEB_SEARCH):
+        return await get_search_client().asearch(query, get_settings().web_search_k)
+
+
+def _queries(state: GraphState) -> List[str]:
+    """The sub-questions left unanswered by graph.nodes.decompose, else the question."""
+    return list(state.get("unanswered") or []) or [state["question"]]
+
+
+def _search_query(query: str) -> List[Dict[str, Any]]:
+    try:
+        return get_cached_search().search(query, _search)
+    except (WebSearchTimeout, CircuitOpen) as e:
+        print(f"---WEB SEARCH: {e}, CONTINUING WITHOUT WEB RESULTS---")
+        return []
+
+
+async def _asearch_query(query: str) -> List[Dict[str, Any]]:
+    try:
+        return await get_cached_search().asearch(query, _asearch)
+    except (WebSearchTimeout, CircuitOpen) as e:
+        print(f"---WEB SEARCH: {e}, CONTINUING WITHOUT WEB RESULTS---")
+        return []
 
 
 def web_search(state: GraphState) -> Dict[str, Any]:
     print("---WEB SEARCH---")
-    question = state["question"]
-    documents = state["documents"]
+    queries = _queries(state)
+    return _web_results(state, queries, [_search_query(q) for q in queries])
+
+
+async def aweb_search(state: GraphState) -> Dict[str, Any]:
+    print("---WEB SEARCH---")
+    queries = _queries(state)
+    results = await asyncio.gather(*(_asearch_query(q) for q in queries))
+    return _web_results(state, queries, results)
+
+
+def _ranked(query: str, docs: List[Dict[str, Any]]) -> List[Document]:
+    settings = get_settings()
+    if settings.web_search_rank:
+        return rank_results(
+            query,
+            docs,
+            chunk_tokens=settings.web_search_chunk_tokens,
+            token_budget=settings.web_search_token_budget,
+            max_passages=settings.web_search_max_passages,
+        )
+    return [Document(page_content="\n".join([d["content"] for d in docs]))]
 
-    docs = web_search_tool.invoke({"query": question})
-    web_results = "\n".join([d["content"] for d in docs])
-    web_results = Document(page_content=web_results)
-    if documents is not None:
-        documents.append(web_results)
+
+def _web_results(
+    state: GraphState, queries: List[str], results: List[List[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    question = state["question"]
+    if queries == [question]:
+        web_results = _ranked(question, results[0])
     else:
-        documents = [web_results]
-    return {"documents": documents, "question": question}
+        # Each unanswered sub-question gets the share of the state's caps its
+        # retrieval had, so no one sub-question's results evict another's.
+        print(f"---WEB SEARCH: {len(queries)} UNANSWERED SUB-QUESTION(S)---")
+        shares = len(state.get("sub_questions") or queries)
+        web_results = [
+            doc
+            for query, docs in zip(queries, results)
+            for doc in fair_share(_ranked(query, docs), shares)
+        ]
+    # Added to the accumulated documents by the state reducer.
+    return {"documents": document_refs(web_results), "question": question}
@@ -0,0 +1,177 @@
+"""
+Pre-fork serving: warm the graph once in a master process, then fork workers.
+
+    python -m graph.server --prefork --workers 4 --max-requests 1000
+
+The master imports everything, builds every chain, loads the tokenizer and
+compiles the graph (``warm``), then binds the socket and forks the workers. A
+worker is ready as soon as it is forked, and shares all of those pages with
+the master copy-on-write instead of holding its own copy.
+
+Sharing only lasts while nobody writes to the pages. The master therefore
+warms up with the cyclic garbage collector disabled and moves everything it
+created into the permanent generation (``gc.freeze``) before forking, so
+collections in the workers do not touch the shared objects' headers
+(reference counting still does, for the objects a request uses). A worker
+that has served ``max_requests`` requests exits and the master forks a fresh
+one, which gives back whatever memory the old one had grown.
+
+Warm-up must not leave anything behind that cannot cross a fork: no threads,
+no open connections, no event loop. The shared HTTP clients are created but
+not connected. The Chroma retriever holds a SQLite connection and the open
+HNSW index, so the master only imports its modules and each worker opens its
+own on its first retrieval. SQLite checkpointers hold a connection and may
+run background threads, so with ``RAG_CHECKPOINTER`` other than ``memory``
+each worker compiles its own graph at startup (a few milliseconds; the
+imports and chains are still shared). Metrics stay per worker, as with uvicorn's own
+workers: /metrics reports the worker that answers it.
+"""
+
+import gc
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Any, Callable, Optional, Set
+
+from graph.config import get_settings
+from graph.server import GraphService
+
+Serve = Callable[[Any, socket.socket, int], None]
+
+
+def warm(variant: Optional[str] = None) -> GraphService:
+    """A GraphService whose graph, chains and tokenizer are loaded, and nothing is connected."""
+    from graph.builder import build_graph, build_workflow, get_options
+    from graph.chains.answer_grader import get_answer_grader
+    from graph.chains.decomposer import get_question_decomposer
+    from graph.chains.generation import get_combine_chain, get_generation_chain
+    from graph.chains.hallucination_grader import get_hallucination_grader
+    from graph.chains.retrieval_grader import get_retrieval_grader
+    from graph.chains.router import get_question_router
+    from graph.checkpointers import MEMORY
+    from graph.tokens import get_encoding
+
+    service = GraphService(variant=variant)
+    for build in (
+        get_answer_grader,
+        get_question_decomposer,
+        get_combine_chain,
+        get_generation_chain,
+        get_hallucination_grader,
+        get_retrieval_grader,
+        get_question_router,
+    ):
+        build()
+    # Not get_retriever(): its connection and index would be shared by every
+    # worker. Importing the client is most of its start-up cost anyway.
+    for module in ("langchain_chroma", "langchain_openai"):
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass  # the workers fail on their first retrieval instead
+    get_encoding()
+    if get_settings().checkpointer == MEMORY:
+        service.graph = build_graph(service.variant)
+    else:
+        build_workflow(get_options(service.variant)).compile()
+    return service
+
+
+def serve_uvicorn(app: Any, sock: socket.socket, max_requests: int) -> None:
+    """Serve ``app`` on the inherited socket until ``max_requests`` have been handled."""
+    import uvicorn
+
+    config = uvicorn.Config(app, limit_max_requests=max_requests or None, timeout_keep_alive=5)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class PreforkServer:
+    """Forks ``workers`` processes running ``serve`` and replaces those that exit."""
+
+    def __init__(
+        self,
+        app: Any,
+        sock: socket.socket,
+        workers: int,
+        max_requests: int = 0,
+        serve: Serve = serve_uvicorn,
+    ):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.max_requests = max_requests
+        self.serve = serve
+        self.children: Set[int] = set()
+        self.stopping = False
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid:
+            self.children.add(pid)
+            return pid
+        code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            gc.enable()
+            self.serve(self.app, self.sock, self.max_requests)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def stop(self, *_: Any) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        gc.freeze()
+        for _ in range(self.workers):
+            self.spawn()
+        print(f"---PREFORK: {self.workers} WORKERS FORKED FROM {os.getpid()}---")
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            self.children.discard(pid)
+            if self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code:
+                print(f"---PREFORK: WORKER {pid} EXITED WITH {code}, REPLACING IT---")
+                # Do not fork in a tight loop when every worker fails at startup.
+                time.sleep(1)
+            self.spawn()
+
+
+def run(
+    host: str,
+    port: int,
+    workers: int,
+    max_requests: int,
+    variant: Optional[str] = None,
+    serve: Serve = serve_uvicorn,
+) -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    gc.disable()
+    start = time.perf_counter()
+    app = warm(variant)
+    print(f"---PREFORK: WARMED {app.variant} IN {time.perf_counter() - start:.2f}s---")
+    sock = socket.create_server((host, port), backlog=2048)
+    PreforkServer(app, sock, workers, max_requests, serve).run()
@@ -0,0 +1,57 @@
+"""
+Render the graph diagrams on demand instead of on every import.
+
+    python -m graph.render                       # Mermaid source for all variants
+    python -m graph.render --variant self_rag --png
+    python -m graph.render --png --remote        # PNG via the mermaid.ink service
+
+Mermaid source (``.mmd``) is produced offline. ``--png`` renders locally with
+pyppeteer; only ``--remote`` sends the diagram to mermaid.ink, which is what
+the graph modules used to do implicitly at import time.
+"""
+
+import argparse
+import os
+
+from langchain_core.runnables.graph import MermaidDrawMethod
+
+from graph.builder import VARIANTS, build_graph
+from graph.consts import ADAPTIVE, CORRECTIVE, SELF_RAG
+
+# File names the diagrams have always been saved under.
+OUTPUT_NAMES = {
+    CORRECTIVE: "graph",
+    SELF_RAG: "self-rag-graph",
+    ADAPTIVE: "adapative-rag-graph",
+}
+
+
+def render(variant: str, out_dir: str = ".", png: bool = False, remote: bool = False) -> str:
+    drawable = build_graph(variant).get_graph()
+    base = os.path.join(out_dir, OUTPUT_NAMES.get(variant, variant))
+    if not png:
+        path = f"{base}.mmd"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(drawable.draw_mermaid())
+        return path
+    path = f"{base}.png"
+    method = MermaidDrawMethod.API if remote else MermaidDrawMethod.PYPPETEER
+    drawable.draw_mermaid_png(output_file_path=path, draw_method=method)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--variant", choices=[*VARIANTS, "all"], default="all")
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--png", action="store_true", help="render a PNG instead of .mmd")
+    parser.add_argument("--remote", action="store_true", help="render the PNG with mermaid.ink")
+    args = parser.parse_args()
+
+    variants = list(VARIANTS) if args.variant == "all" else [args.variant]
+    for variant in variants:
+        print(render(variant, args.out_dir, png=args.png, remote=args.remote))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Client-side rate limiting, retries and circuit breaking for provider calls.
+
+Every outbound provider (an OpenAI model, a web search provider) gets one
+``Guard``, shared by all threads and event loops in the process:
+
+    rate limit   token buckets for requests and tokens per minute; a call
+                 waits for its share instead of being sent to collect a 429
+    retries      on 429s, 5xx answers, timeouts and connection errors, at
+                 most ``retry_max_attempts`` attempts in all, sleeping with
+                 decorrelated jitter (spreads retries out instead of sending
+                 them in waves) or for the Retry-After the provider asked for
+    breaker      after ``breaker_failure_threshold`` failed attempts in a row
+                 (5xx, timeouts, connection errors: a 429 means the provider
+                 works but wants less traffic, which the rate limit and the
+                 retries handle) calls fail at once with ``CircuitOpen`` for
+                 ``breaker_reset_s``; then one trial call is let through, and
+                 its outcome closes or re-opens the circuit
+
+The OpenAI calls of every chain and embedding go through the shared HTTP
+clients of graph.clients, whose transports apply the guard of the request's
+model (the SDK's own retries are turned off, so failures are not retried
+twice over). Web search providers are guarded in graph.search.client; with
+an open circuit the web search node continues without web results.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+import httpx
+
+from graph.config import get_settings
+from graph.metrics import counter, histogram
+from graph.tokens import count_tokens
+
+guard_retries = counter("provider_retries_total", "Retried provider calls by provider")
+guard_wait = histogram(
+    "provider_rate_limit_wait_seconds", "Time calls waited for the client-side rate limit"
+)
+circuit_transitions = counter(
+    "circuit_breaker_transitions_total", "Circuit breaker state changes by provider and state"
+)
+circuit_rejections = counter(
+    "circuit_breaker_rejections_total", "Calls failed fast by an open circuit, by provider"
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class Retryable(Exception):
+    """
+    A failed attempt worth retrying; ``result`` is returned if none succeeds.
+    ``throttled`` attempts (429s) were turned away by a working provider, so
+    they are retried but do not count towards opening the circuit.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        retry_after_s: Optional[float] = None,
+        result: Any = None,
+        throttled: bool = False,
+    ):
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+        self.result = result
+        self.throttled = throttled
+
+
+class CircuitOpen(RuntimeError):
+    def __init__(self, name: str, retry_after_s: float):
+        super().__init__(f"{name} is unavailable (circuit open), retry in {retry_after_s:.1f}s")
+        self.name = name
+        self.retry_after_s = retry_after_s
+
+
+class TokenBucket:
+    """``rate_per_s`` tokens a second, at most ``capacity`` saved up."""
+
+    def __init__(self, rate_per_s: float, capacity: float):
+        self.rate_per_s = rate_per_s
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` tokens now; returns how long to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate_per_s
+            )
+            self._updated = now
+            # A call larger than the bucket waits for a full bucket, not forever.
+            self._tokens -= min(amount, self.capacity)
+            return max(0.0, -self._tokens / self.rate_per_s)
+
+
+class RateLimiter:
+    """Requests and tokens per minute; 0 means no limit."""
+
+    def __init__(self, requests_per_min: float = 0, tokens_per_min: float = 0):
+        self.buckets: List[Tuple[TokenBucket, bool]] = []
+        if requests_per_min:
+            # Bursts of at most a second's worth of requests and ten seconds' of tokens.
+            rate = requests_per_min / 60
+            self.buckets.append((TokenBucket(rate, max(1.0, rate)), False))
+        if tokens_per_min:
+            self.buckets.append((TokenBucket(tokens_per_min / 60, tokens_per_min / 6), True))
+
+    @property
+    def counts_tokens(self) -> bool:
+        return any(by_tokens for _, by_tokens in self.buckets)
+
+    def reserve(self, tokens: int) -> float:
+        return max(
+            [bucket.reserve(tokens if by_tokens else 1) for bucket, by_tokens in self.buckets],
+            default=0.0,
+        )
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_s: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_s = reset_s
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def _set(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            circuit_transitions.inc(provider=self.name, state=state)
+            print(f"---CIRCUIT {self.name}: {state.upper()}---")
+
+    def before_call(self) -> None:
+        """Raise ``CircuitOpen`` unless a call may be made now."""
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            remaining = self._opened_at + self.reset_s - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self._set(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+        circuit_rejections.inc(provider=self.name)
+        raise CircuitOpen(self.name, max(0.0, remaining))
+
+    def record(self, ok: Optional[bool]) -> None:
+        """The outcome of an allowed call; None when it was cancelled without one."""
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            self._trial_running = False
+            if ok is None:
+                return
+            if ok:
+                self.failures = 0
+                self._set(CLOSED)
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set(OPEN)
+
+
+class Guard:
+    """Rate limit, retry and circuit breaker for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        limiter: Optional[RateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        max_attempts: int = 3,
+        base_s: float = 0.5,
+        cap_s: float = 20.0,
+        seed: Optional[int] = None,
+    ):
+        self.name = name
+        self.limiter = limiter or RateLimiter()
+        self.breaker = breaker or CircuitBreaker(name, failure_threshold=0)
+        self.max_attempts = max(1, max_attempts)
+        self.base_s = base_s
+        self.cap_s = cap_s
+        self._rng = random.Random(seed)
+
+    def next_delay(self, previous_s: float, error: Retryable) -> Optional[float]:
+        """Seconds to sleep before the next attempt, None to give up."""
+        if error.retry_after_s is not None:
+            if error.retry_after_s > self.cap_s:
+                return None
+            # Never sooner than asked; the jitter keeps the clients that were
+            # all told the same time from coming back together.
+            return error.retry_after_s + self._rng.uniform(0, self.base_s)
+        return min(self.cap_s, self._rng.uniform(self.base_s, max(self.base_s, previous_s * 3)))
+
+    def _attempt_failed(self, attempt: int, delay_s: float, error: Retryable) -> Optional[float]:
+        """Record the failure; the delay before the next attempt, None when giving up."""
+        self.breaker.record(None if error.throttled else False)
+        if attempt + 1 >= self.max_attempts:
+            return None
+        delay_s = self.next_delay(delay_s, error)
+        if delay_s is not None:
+            guard_retries.inc(provider=self.name)
+        return delay_s
+
+    @staticmethod
+    def _give_up(error: Retryable) -> Any:
+        if error.result is not None:
+            return error.result
+        raise error.__cause__ or error
+
+    def call(self, fn: Callable[[], Any], tokens: int = 1) -> Any:
+        delay_s = self.base_s
+        for attempt in range(self.max_attempts):
+            self.breaker.before_call()
+            try:
+                wait = self.limiter.reserve(tokens)
+                if wait:
+                    guard_wait.observe(wait, provider=self.name)
+                    time.sleep(wait)
+                result = fn()
+            except Retryable as e:
+                delay_s = self._attempt_failed(attempt, delay_s, e)
+                if delay_s is None:
+                    return self._give_up(e)
+                time.sleep(delay_s)
+                continue
+            except BaseException:
+                self.breaker.record(True)
+                raise
+            self.breaker.record(True)
+            return result
+
+    async def acall(self, afn: Callable[[], Awaitable[Any]], tokens: int = 1) -> Any:
+        delay_s = self.base_s
+        for attempt in range(self.max_attempts):
+            self.breaker.before_call()
+            try:
+                wait = self.limiter.reserve(tokens)
+                if wait:
+                    guard_wait.observe(wait, provider=self.name)
+                    await asyncio.sleep(wait)
+                result = await afn()
+            except Retryable as e:
+                delay_s = self._attempt_failed(attempt, delay_s, e)
+                if delay_s is None:
+                    return self._give_up(e)
+                await asyncio.sleep(delay_s)
+                continue
+            except asyncio.CancelledError:
+                self.breaker.record(None)
+                raise
+            except BaseException:
+                self.breaker.record(True)
+                raise
+            self.breaker.record(True)
+            return result
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or an HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retryable_error(e: BaseException) -> Optional[Retryable]:
+    """A ``Retryable`` for errors that may pass (429, 5xx, timeouts, resets), else None."""
+    response = getattr(e, "response", None)
+    status = getattr(e, "status", None) or getattr(response, "status_code", None)
+    headers = getattr(e, "headers", None) or getattr(response, "headers", None) or {}
+    if status == 429 or (isinstance(status, int) and status >= 500):
+        retry_after_s = parse_retry_after(headers.get("retry-after"))
+        return Retryable(str(e), retry_after_s, throttled=status == 429)
+    if isinstance(e, (ConnectionError, TimeoutError, asyncio.TimeoutError, httpx.TransportError)):
+        return Retryable(str(e))
+    return None
+
+
+@lru_cache(maxsize=None)
+def get_guard(name: str) -> Guard:
+    """The process-wide guard of provider ``name`` ("llm:<model>" or "web_search:<name>")."""
+    settings = get_settings()
+    if name.startswith("web_search:"):
+        limiter = RateLimiter(settings.web_search_requests_per_min)
+    else:
+        limiter = RateLimiter(settings.llm_requests_per_min, settings.llm_tokens_per_min)
+    return Guard(
+        name,
+        limiter,
+        CircuitBreaker(name, settings.breaker_failure_threshold, settings.breaker_reset_s),
+        max_attempts=settings.retry_max_attempts,
+        base_s=settings.retry_base_s,
+        cap_s=settings.retry_cap_s,
+    )
+
+
+def _request_guard(request: httpx.Request) -> Tuple[Guard, int]:
+    """The guard for an OpenAI API request, and its estimated token count."""
+    try:
+        body = json.loads(request.content or b"{}")
+    except ValueError:
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
+    guard = get_guard(f"llm:{body.get('model', request.url.host)}")
+    if not guard.limiter.counts_tokens:
+        return guard, 1
+    prompt = body.get("messages") or body.get("input") or ""
+    tokens = count_tokens(prompt if isinstance(prompt, str) else json.dumps(prompt))
+    return guard, max(1, tokens + int(body.get("max_tokens") or 0))
+
+
+def _check(response: httpx.Response) -> httpx.Response:
+    if response.status_code == 429 or response.status_code >= 500:
+        raise Retryable(
+            f"HTTP {response.status_code}",
+            parse_retry_after(response.headers.get("retry-after")),
+            result=response,
+            throttled=response.status_code == 429,
+        )
+    return response
+
+
+class GuardedTransport(httpx.BaseTransport):
+    """Sends every request through the guard of its model."""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        guard, tokens = _request_guard(request)
+
+        def send() -> httpx.Response:
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as e:
+                raise Retryable(str(e)) from e
+            if response.status_code == 429 or response.status_code >= 500:
+                # Read the body so the connection goes back to the pool.
+                response.read()
+            return _check(response)
+
+        return guard.call(send, tokens)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncGuardedTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        guard, tokens = _request_guard(request)
+
+        async def send() -> httpx.Response:
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                raise Retryable(str(e)) from e
+            if response.status_code == 429 or response.status_code >= 500:
+                await response.aread()
+            return _check(response)
+
+        return await guard.acall(send, tokens)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
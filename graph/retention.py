@@ -0,0 +1,221 @@
+"""
+Checkpoint retention for SQLite checkpointers.
+
+    python -m graph.retention --keep-last 20 --ttl-s 604800
+    python -m graph.retention --path data/checkpoints.sqlite --vacuum
+
+``prune`` deletes every checkpoint beyond the newest ``keep_last`` of each
+thread and every checkpoint older than ``ttl_s`` (a thread whose newest
+checkpoint is older than the TTL disappears entirely), then the ``writes``
+rows left without a checkpoint. Deletes run in small transactions on a
+separate connection, so live graphs only ever wait for one batch.
+Checkpoint ids are time-ordered UUIDs, so the TTL cutoff is a plain
+comparison on ``checkpoint_id``.
+
+Freed pages are returned to the file system with ``PRAGMA
+incremental_vacuum``, a few pages at a time. That needs
+``auto_vacuum=INCREMENTAL``, which graph.checkpointers sets on new files;
+``--vacuum`` converts an existing file once (a full, blocking VACUUM).
+
+``RetentionWorker`` runs prune and compact periodically in a daemon thread;
+graph.checkpointers starts one for its SQLite file when
+``RAG_CHECKPOINT_KEEP_LAST`` or ``RAG_CHECKPOINT_TTL_S`` is set.
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from graph.config import get_settings
+from graph.metrics import counter
+
+pruned_rows = counter("checkpoint_pruned_rows_total", "Rows deleted by checkpoint retention")
+vacuumed_pages = counter(
+    "checkpoint_vacuumed_pages_total", "SQLite pages released by incremental vacuum"
+)
+
+# 100ns intervals between the UUID (Gregorian) epoch and the Unix epoch
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+
+@dataclass
+class PruneStats:
+    checkpoints: int = 0
+    writes: int = 0
+    pages: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"deleted {self.checkpoints} checkpoints, {self.writes} writes; "
+            f"released {self.pages} pages"
+        )
+
+
+def checkpoint_id_at(unix_s: float) -> str:
+    """The smallest uuid6 checkpoint id created at ``unix_s``."""
+    ts = int(unix_s * 10_000_000) + _UUID_EPOCH_OFFSET
+    return str(
+        uuid.UUID(int=((ts >> 12) << 80) | (0x6 << 76) | ((ts & 0xFFF) << 64) | (0b10 << 62))
+    )
+
+
+# Pause between delete batches, so writers waiting on the lock get it before
+# their busy handler backs off into multi-millisecond sleeps.
+BATCH_PAUSE_S = 0.002
+
+
+def _delete_in_batches(
+    conn: sqlite3.Connection, table: str, where: str, params: tuple, batch_size: int
+) -> int:
+    # Find the rows with one read, then delete them a batch per transaction so
+    # the write lock is only ever held briefly.
+    rowids = [r[0] for r in conn.execute(f"SELECT rowid FROM {table} WHERE {where}", params)]
+    for i in range(0, len(rowids), batch_size):
+        batch = rowids[i : i + batch_size]
+        conn.execute(
+            f"DELETE FROM {table} WHERE rowid IN ({','.join('?' * len(batch))})", batch
+        )
+        conn.commit()
+        time.sleep(BATCH_PAUSE_S)
+    return len(rowids)
+
+
+def prune(
+    conn: sqlite3.Connection,
+    keep_last: int = 0,
+    ttl_s: float = 0.0,
+    batch_size: int = 100,
+    now: Optional[float] = None,
+) -> PruneStats:
+    """Apply the retention policy; 0 disables ``keep_last`` / ``ttl_s``."""
+    stats = PruneStats()
+    if ttl_s:
+        cutoff = checkpoint_id_at((now if now is not None else time.time()) - ttl_s)
+        stats.checkpoints += _delete_in_batches(
+            conn, "checkpoints", "checkpoint_id < ?", (cutoff,), batch_size
+        )
+    if keep_last:
+        stats.checkpoints += _delete_in_batches(
+            conn,
+            "checkpoints",
+            "rowid IN (SELECT rowid FROM (SELECT rowid, ROW_NUMBER() OVER ("
+            "PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC) AS n "
+            "FROM checkpoints) WHERE n > ?)",
+            (keep_last,),
+            batch_size,
+        )
+    stats.writes = _delete_in_batches(
+        conn,
+        "writes",
+        "NOT EXISTS (SELECT 1 FROM checkpoints c WHERE c.thread_id = writes.thread_id "
+        "AND c.checkpoint_ns = writes.checkpoint_ns AND c.checkpoint_id = writes.checkpoint_id)",
+        (),
+        batch_size,
+    )
+    pruned_rows.inc(stats.checkpoints, table="checkpoints")
+    pruned_rows.inc(stats.writes, table="writes")
+    return stats
+
+
+def compact(
+    conn: sqlite3.Connection,
+    pages_per_step: int = 256,
+    max_steps: int = 64,
+    keep_free_ratio: float = 0.1,
+) -> int:
+    """
+    Release free pages incrementally; returns the number released. Up to
+    ``keep_free_ratio`` of the file stays free, since new checkpoints reuse
+    those pages and would otherwise grow the file straight back.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:  # INCREMENTAL
+        return 0
+    start = pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    for _ in range(max_steps):
+        excess = conn.execute("PRAGMA freelist_count").fetchone()[0] - int(keep_free_ratio * pages)
+        if excess <= 0:
+            break
+        # executescript steps the pragma to completion; execute() frees one page.
+        conn.executescript(f"PRAGMA incremental_vacuum({min(excess, pages_per_step)})")
+        time.sleep(BATCH_PAUSE_S)
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    released = start - pages
+    vacuumed_pages.inc(released)
+    return released
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection) -> None:
+    """Switch an existing file to incremental auto-vacuum (runs a full VACUUM)."""
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+
+
+def run_retention(
+    path: str, keep_last: int = 0, ttl_s: float = 0.0, pages_per_step: int = 256
+) -> PruneStats:
+    from graph.checkpointers import connect_sqlite
+
+    conn = connect_sqlite(path)
+    try:
+        stats = prune(conn, keep_last=keep_last, ttl_s=ttl_s)
+        stats.pages = compact(conn, pages_per_step=pages_per_step)
+        return stats
+    finally:
+        conn.close()
+
+
+class RetentionWorker:
+    """Run ``run_retention`` on ``path`` every ``interval_s`` in a daemon thread."""
+
+    def __init__(
+        self, path: str, keep_last: int = 0, ttl_s: float = 0.0, interval_s: float = 300.0
+    ):
+        self.path = path
+        self.keep_last = keep_last
+        self.ttl_s = ttl_s
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="checkpoint-retention", daemon=True
+        )
+
+    def start(self) -> "RetentionWorker":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                run_retention(self.path, self.keep_last, self.ttl_s)
+            except sqlite3.Error as e:
+                print(f"---CHECKPOINT RETENTION FAILED: {e}---")
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Prune and compact a SQLite checkpoint file.")
+    parser.add_argument("--path", default=settings.checkpoint_path)
+    parser.add_argument("--keep-last", type=int, default=settings.checkpoint_keep_last)
+    parser.add_argument("--ttl-s", type=float, default=settings.checkpoint_ttl_s)
+    parser.add_argument(
+        "--vacuum", action="store_true", help="convert the file to incremental auto-vacuum first"
+    )
+    args = parser.parse_args()
+
+    if args.vacuum:
+        conn = sqlite3.connect(args.path)
+        enable_incremental_vacuum(conn)
+        conn.close()
+    print(run_retention(args.path, args.keep_last, args.ttl_s).summary())
+
+
+if __name__ == "__main__":
+    main()
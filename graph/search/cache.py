@@ -0,0 +1,218 @@
+"""
+TTL cache for web search results with stale-while-revalidate.
+
+Entries are keyed on the normalized query plus ``k`` and the provider name.
+An entry younger than ``ttl_s`` is fresh; up to ``stale_s`` past that it is
+stale and is served immediately while a background refresh replaces it;
+anything older is a miss. The in-memory tier is an LRU bounded by
+``max_entries``; an optional SQLite file persists entries across processes.
+"""
+
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from graph.metrics import counter, histogram
+
+FRESH = "hit"
+STALE = "stale"
+MISS = "miss"
+
+cache_requests = counter(
+    "web_search_cache_requests_total", "Web search cache lookups by result (hit, stale, miss)"
+)
+cache_saved_seconds = counter(
+    "web_search_cache_saved_seconds_total",
+    "Estimated provider latency avoided by serving from the web search cache",
+)
+cache_refreshes = counter(
+    "web_search_cache_refreshes_total", "Background stale-while-revalidate refreshes by outcome"
+)
+search_latency = histogram("web_search_latency_seconds", "Latency of web search provider calls")
+
+Results = List[Dict[str, Any]]
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query.casefold()).strip().rstrip("?.! ")
+
+
+def cache_key(query: str, k: int, provider: str) -> str:
+    return f"{provider}|{k}|{normalize_query(query)}"
+
+
+class SearchCache:
+    def __init__(
+        self,
+        ttl_s: float = 3600.0,
+        stale_s: float = 600.0,
+        max_entries: int = 1024,
+        sqlite_path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Results]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache "
+                "(key TEXT PRIMARY KEY, created_at REAL NOT NULL, results TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def _state(self, created_at: float) -> str:
+        age = self.clock() - created_at
+        if age < self.ttl_s:
+            return FRESH
+        if age < self.ttl_s + self.stale_s:
+            return STALE
+        return MISS
+
+    def get(self, key: str) -> Tuple[Optional[Results], str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT created_at, results FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], json.loads(row[1]))
+                    self._remember(key, entry)
+            if entry is None:
+                return None, MISS
+            self._entries.move_to_end(key)
+            state = self._state(entry[0])
+            return (entry[1] if state != MISS else None), state
+
+    def put(self, key: str, results: Results) -> None:
+        entry = (self.clock(), results)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?)",
+                    (key, entry[0], json.dumps(results)),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, entry: Tuple[float, Results]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CachedSearch:
+    """
+    Serve web search results through a ``SearchCache``.
+
+    ``search(query, fetch)`` calls ``fetch(query)`` only on a miss; stale
+    entries are returned as-is and refreshed on a small background pool, with
+    at most one refresh in flight per key. ``asearch(query, afetch)`` is the
+    same for coroutine fetchers, refreshing in a task on the running loop.
+    """
+
+    def __init__(self, cache: SearchCache, provider: str = "tavily", k: int = 3):
+        self.cache = cache
+        self.provider = provider
+        self.k = k
+        self._refreshing: set = set()
+        self._refresh_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-refresh")
+        self._tasks: set = set()
+        # Running mean of provider latency, used to estimate the time saved by hits.
+        self._mean_latency_s = 0.0
+        self._calls = 0
+
+    def _record(self, key: str, results: Results, elapsed: float) -> None:
+        search_latency.observe(elapsed, provider=self.provider)
+        self._calls += 1
+        self._mean_latency_s += (elapsed - self._mean_latency_s) / self._calls
+        self.cache.put(key, results)
+
+    def _fetch(self, key: str, query: str, fetch: Callable[[str], Results]) -> Results:
+        start = time.perf_counter()
+        results = fetch(query)
+        self._record(key, results, time.perf_counter() - start)
+        return results
+
+    async def _afetch(
+        self, key: str, query: str, afetch: Callable[[str], Awaitable[Results]]
+    ) -> Results:
+        start = time.perf_counter()
+        results = await afetch(query)
+        self._record(key, results, time.perf_counter() - start)
+        return results
+
+    def _refresh(self, key: str, query: str, fetch: Callable[[str], Results]) -> None:
+        try:
+            self._fetch(key, query, fetch)
+            cache_refreshes.inc(outcome="ok")
+        except Exception as e:
+            print(f"---WEB SEARCH: BACKGROUND REFRESH FAILED ({e})---")
+            cache_refreshes.inc(outcome="error")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+
+    async def _arefresh(
+        self, key: str, query: str, afetch: Callable[[str], Awaitable[Results]]
+    ) -> None:
+        try:
+            await self._afetch(key, query, afetch)
+            cache_refreshes.inc(outcome="ok")
+        except Exception as e:
+            print(f"---WEB SEARCH: BACKGROUND REFRESH FAILED ({e})---")
+            cache_refreshes.inc(outcome="error")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+
+    def _lookup(self, query: str) -> Tuple[str, Optional[Results], bool]:
+        """(key, cached results or None on a miss, whether to start a refresh)."""
+        key = cache_key(query, self.k, self.provider)
+        results, state = self.cache.get(key)
+        cache_requests.inc(result=state)
+        if state == MISS:
+            return key, None, False
+        cache_saved_seconds.inc(self._mean_latency_s)
+        if state == FRESH:
+            return key, results, False
+        with self._refresh_lock:
+            start_refresh = key not in self._refreshing
+            self._refreshing.add(key)
+        return key, results, start_refresh
+
+    def search(self, query: str, fetch: Callable[[str], Results]) -> Results:
+        key, results, start_refresh = self._lookup(query)
+        if start_refresh:
+            self._pool.submit(self._refresh, key, query, fetch)
+        if results is None:
+            return self._fetch(key, query, fetch)
+        return results
+
+    async def asearch(self, query: str, afetch: Callable[[str], Awaitable[Results]]) -> Results:
+        key, results, start_refresh = self._lookup(query)
+        if start_refresh:
+            task = asyncio.ensure_future(self._arefresh(key, query, afetch))
+            # Keep a reference until it finishes; the loop only holds a weak one.
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if results is None:
+            return await self._afetch(key, query, afetch)
+        return results
@@ -0,0 +1,173 @@
+"""
+Async web search with a deadline, hedged requests and provider fan-out.
+
+Every search is bounded by ``timeout_s``. Once a provider has enough latency
+samples, a request still running after that provider's ``hedge_quantile``
+latency gets a duplicate, and whichever copy answers first wins. With several
+providers, ``mode="first"`` races them and returns the first success, while
+``mode="merge"`` waits for all of them (within the deadline) and interleaves
+their results, dropping duplicate URLs. Each provider call goes through the
+provider's guard (graph.resilience): rate limited, retried with jitter, and
+failed fast with ``CircuitOpen`` while the provider keeps failing.
+"""
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, Optional, Sequence
+
+from graph.metrics import counter, histogram
+from graph.resilience import get_guard, retryable_error
+from graph.search.providers import Results
+
+hedges_sent = counter("web_search_hedges_total", "Hedged duplicate web search requests sent")
+search_timeouts = counter("web_search_timeouts_total", "Web searches that hit their deadline")
+provider_latency = histogram(
+    "web_search_provider_latency_seconds", "Latency of individual web search provider calls"
+)
+
+
+class WebSearchTimeout(TimeoutError):
+    pass
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies, for percentile-based hedging."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class WebSearchClient:
+    def __init__(
+        self,
+        providers: Sequence,
+        timeout_s: float = 10.0,
+        hedge_quantile: Optional[float] = 0.95,
+        hedge_min_samples: int = 20,
+        mode: str = "first",
+    ):
+        if not providers:
+            raise ValueError("at least one web search provider is required")
+        if mode not in ("first", "merge"):
+            raise ValueError(f"unknown web search mode {mode!r}")
+        self.providers = list(providers)
+        self.timeout_s = timeout_s
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.mode = mode
+        self.latency: Dict[str, LatencyTracker] = {p.name: LatencyTracker() for p in providers}
+
+    async def _timed(self, provider, query: str, k: int) -> Results:
+        start = time.perf_counter()
+        results = await provider.asearch(query, k)
+        elapsed = time.perf_counter() - start
+        self.latency[provider.name].add(elapsed)
+        provider_latency.observe(elapsed, provider=provider.name)
+        return results
+
+    async def _attempt(self, provider, query: str, k: int) -> Results:
+        try:
+            return await self._timed(provider, query, k)
+        except Exception as e:
+            retryable = retryable_error(e)
+            if retryable is None:
+                raise
+            raise retryable from e
+
+    async def _guarded(self, provider, query: str, k: int) -> Results:
+        guard = get_guard(f"web_search:{provider.name}")
+        return await guard.acall(lambda: self._attempt(provider, query, k))
+
+    def hedge_delay(self, provider) -> Optional[float]:
+        tracker = self.latency[provider.name]
+        if not self.hedge_quantile or len(tracker) < self.hedge_min_samples:
+            return None
+        return tracker.quantile(self.hedge_quantile)
+
+    async def _hedged(self, provider, query: str, k: int) -> Results:
+        first = asyncio.ensure_future(self._guarded(provider, query, k))
+        delay = self.hedge_delay(provider)
+        if delay is None:
+            return await first
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                hedges_sent.inc(provider=provider.name)
+                tasks.add(asyncio.ensure_future(self._guarded(provider, query, k)))
+            return await self._first_success(tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    async def _first_success(tasks) -> Results:
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    async def _merge(self, query: str, k: int) -> Results:
+        outcomes = await asyncio.gather(
+            *(self._hedged(p, query, k) for p in self.providers), return_exceptions=True
+        )
+        lists = [o for o in outcomes if not isinstance(o, BaseException)]
+        if not lists:
+            raise outcomes[0]
+        merged, seen = [], set()
+        for rank in range(max(len(results) for results in lists)):
+            for results in lists:
+                if rank < len(results):
+                    url = results[rank].get("url")
+                    if url not in seen:
+                        seen.add(url)
+                        merged.append(results[rank])
+        return merged
+
+    async def asearch(self, query: str, k: int = 3) -> Results:
+        if self.mode == "merge" and len(self.providers) > 1:
+            search = self._merge(query, k)
+        else:
+            search = self._race(query, k)
+        try:
+            return await asyncio.wait_for(search, timeout=self.timeout_s)
+        except asyncio.TimeoutError:
+            search_timeouts.inc()
+            raise WebSearchTimeout(f"web search exceeded {self.timeout_s}s: {query!r}")
+
+    async def _race(self, query: str, k: int) -> Results:
+        tasks = [asyncio.ensure_future(self._hedged(p, query, k)) for p in self.providers]
+        try:
+            return await self._first_success(tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def search(self, query: str, k: int = 3) -> Results:
+        """Blocking wrapper for sync callers such as the ``web_search`` node."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.asearch(query, k))
+        # Called from inside a running loop: run on a helper thread instead.
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, self.asearch(query, k)).result()
@@ -0,0 +1,63 @@
+"""
+Web search providers behind one async interface.
+
+A provider has a ``name`` and ``async asearch(query, k) -> results`` where
+results are Tavily-shaped dicts (``url``, ``content``). ``get_provider``
+maps the names used in ``RAG_WEB_SEARCH_PROVIDERS`` to instances.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from graph.config import get_settings
+
+Results = List[Dict[str, Any]]
+
+
+@lru_cache(maxsize=None)
+def get_web_search_tool():
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+    # max_results is the tool's real parameter; the old `k=3` was silently ignored.
+    return TavilySearchResults(max_results=get_settings().web_search_k)
+
+
+class TavilyError(Exception):
+    """A failed Tavily call; ``status`` is the HTTP status, when there was a response."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def _tavily_error(message: str) -> Exception:
+    # The API wrapper raises Exception(f"Error {status}: {reason}").
+    match = re.search(r"Error (\d{3})\b", message)
+    if match:
+        return TavilyError(message, int(match.group(1)))
+    # No response at all: a network error, retried like one.
+    return ConnectionError(message)
+
+
+class TavilyProvider:
+    name = "tavily"
+
+    async def asearch(self, query: str, k: int) -> Results:
+        # Looked up per call so tests can swap the tool.
+        results = await get_web_search_tool().ainvoke({"query": query})
+        if not isinstance(results, list):
+            # TavilySearchResults returns repr(error) instead of raising;
+            # raise it so the guard retries it and the breaker counts it.
+            raise _tavily_error(str(results))
+        return results
+
+
+def get_provider(name: str):
+    if name == "tavily":
+        return TavilyProvider()
+    if name.startswith("fake"):
+        from graph.fakes import FakeSearchProvider
+
+        return FakeSearchProvider(name=name)
+    raise ValueError(f"unknown web search provider {name!r}")
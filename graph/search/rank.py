@@ -0,0 +1,90 @@
+"""
+Turn raw web search results into a few relevant, source-tagged passages.
+
+Results are split into token-bounded chunks carrying their source URL, every
+chunk is scored against the question with BM25 (computed on a numpy
+term-frequency matrix, so one pass scores all chunks), and the best chunks
+are kept until the token budget is spent.
+"""
+
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from graph.tokens import count_tokens
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def split_results(results: List[Dict[str, Any]], chunk_tokens: int = 200) -> List[Document]:
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_tokens, chunk_overlap=0, length_function=count_tokens
+    )
+    passages = []
+    for rank, result in enumerate(results):
+        metadata = {"source": result.get("url", ""), "search_rank": rank}
+        passages += splitter.create_documents([result.get("content") or ""], [metadata])
+    return passages
+
+
+def bm25_scores(query: str, texts: List[str], k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+    docs = [tokenize(t) for t in texts]
+    vocab: Dict[str, int] = {}
+    for words in docs:
+        for w in words:
+            vocab.setdefault(w, len(vocab))
+    query_ids = sorted({vocab[w] for w in tokenize(query) if w in vocab})
+    if not docs or not query_ids:
+        return np.zeros(len(texts))
+
+    tf = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+    for row, words in enumerate(docs):
+        if words:
+            tf[row] = np.bincount([vocab[w] for w in words], minlength=len(vocab))
+    lengths = tf.sum(axis=1)
+    avg_length = lengths.mean() or 1.0
+    df = (tf[:, query_ids] > 0).sum(axis=0)
+    idf = np.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+    q_tf = tf[:, query_ids]
+    norm = k1 * (1 - b + b * lengths / avg_length)
+    return (idf * q_tf * (k1 + 1) / (q_tf + norm[:, None])).sum(axis=1)
+
+
+def select_passages(
+    question: str, passages: List[Document], token_budget: int = 800, max_passages: int = 8
+) -> List[Document]:
+    """Highest scoring passages that fit within ``token_budget`` tokens."""
+    if not passages:
+        return []
+    scores = bm25_scores(question, [p.page_content for p in passages])
+    selected, used = [], 0
+    for i in np.argsort(-scores, kind="stable"):
+        passage = passages[i]
+        tokens = count_tokens(passage.page_content)
+        if used + tokens > token_budget:
+            continue
+        passage.metadata["score"] = float(scores[i])
+        selected.append(passage)
+        used += tokens
+        if len(selected) >= max_passages:
+            break
+    return selected
+
+
+def rank_results(
+    question: str,
+    results: List[Dict[str, Any]],
+    chunk_tokens: int = 200,
+    token_budget: int = 800,
+    max_passages: int = 8,
+) -> List[Document]:
+    return select_passages(
+        question, split_results(results, chunk_tokens), token_budget, max_passages
+    )
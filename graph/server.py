@@ -0,0 +1,437 @@
+"""
+HTTP service for the compiled graph, as a plain ASGI application.
+
+    python -m graph.server --port 8000 --workers 4
+
+    POST /invoke   {"question": ..., "thread_id": ..., "tenant": ..., "priority": ...,
+                    "deadline_s": ...}
+                   -> {"thread_id": ..., "generation": ..., "seconds": ...}
+    POST /stream   the same body, answered with server-sent events:
+                   update  {"node": ..., "update": {...}} after every node
+                   token   {"node": "generate", "text": ...} while the answer is generated
+                   end     {"thread_id": ..., "generation": ..., "seconds": ...}
+                   error   {"error": ...} instead of ``end``, timeouts included
+    GET  /healthz  {"status": "ok", "variant": ..., "loaded": ...}
+    GET  /metrics  every graph.metrics series, in the Prometheus text format
+
+``thread_id`` defaults to a new id; reusing one continues that thread's
+checkpoints. With ``RAG_SINGLEFLIGHT``, /invoke requests without a
+thread_id that ask the same question at the same time share one graph run
+(see graph.singleflight). Each worker process compiles the graph once, at
+startup (or on the first request when the server sends no lifespan events),
+and runs every request through the async graph, so one worker serves many
+requests at once. A request still running after its ``deadline_s`` (at most
+and by default ``RAG_SERVER_REQUEST_TIMEOUT_S``) is cancelled (504 for
+/invoke), and so is one whose client disconnects.
+
+With ``RAG_ADMISSION_MAX_CONCURRENCY``, requests queue for one of that many
+slots before they run (graph.admission): ``priority`` is "interactive" (the
+default) or "batch", ``tenant`` (default "default") groups the requests
+that take turns, and a request that cannot start in time is answered 503
+with a Retry-After header.
+
+The application needs no web framework; ``python -m graph.server`` runs it
+with uvicorn (installed with chromadb). With ``--prefork`` the graph is
+warmed once and the workers are forked from that process (graph.prefork).
+The tests drive it through ``httpx.ASGITransport``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from graph.admission import INTERACTIVE, PRIORITIES, AdmissionController, AdmissionRejected
+from graph.config import get_settings
+from graph.consts import GENERATE
+from graph.metrics import REGISTRY, counter, histogram
+from graph.singleflight import SingleFlight, input_key
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+http_requests = counter("http_requests_total", "HTTP requests by path and status")
+http_latency = histogram("http_request_seconds", "HTTP request latency by path")
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Document):
+        return {"page_content": value.page_content, "metadata": value.metadata}
+    return str(value)
+
+
+def dumps(value: Any) -> bytes:
+    return json.dumps(value, default=_json_default).encode()
+
+
+def sse(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+async def read_body(receive: Receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ConnectionError("client disconnected")
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+@dataclass
+class GraphRequest:
+    question: str
+    thread_id: Optional[str] = None
+    tenant: str = "default"
+    priority: str = INTERACTIVE
+    deadline_s: Optional[float] = None
+
+
+def parse_request(body: bytes) -> GraphRequest:
+    try:
+        payload = json.loads(body or b"{}")
+    except json.JSONDecodeError as e:
+        raise BadRequest(f"invalid JSON: {e}") from None
+    if not isinstance(payload, dict):
+        raise BadRequest("expected a JSON object")
+    question = payload.get("question")
+    if not isinstance(question, str) or not question.strip():
+        raise BadRequest("'question' must be a non-empty string")
+    thread_id = payload.get("thread_id")
+    priority = payload.get("priority", INTERACTIVE)
+    if priority not in PRIORITIES:
+        raise BadRequest(f"'priority' must be one of {', '.join(PRIORITIES)}")
+    deadline_s = payload.get("deadline_s")
+    if deadline_s is not None and (
+        isinstance(deadline_s, bool) or not isinstance(deadline_s, (int, float)) or deadline_s <= 0
+    ):
+        raise BadRequest("'deadline_s' must be a positive number")
+    return GraphRequest(
+        question=question,
+        thread_id=str(thread_id) if thread_id else None,
+        tenant=str(payload.get("tenant") or "default"),
+        priority=priority,
+        deadline_s=deadline_s,
+    )
+
+
+async def _until_disconnect(receive: Receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def cancel_on_disconnect(receive: Receive, work: Awaitable[Any]) -> Any:
+    """Await ``work``, cancelling it if the client goes away first."""
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_until_disconnect(receive))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+    if not task.done():
+        task.cancel()
+        raise ConnectionError("client disconnected")
+    return task.result()
+
+
+class GraphService:
+    """The ASGI application; one instance, and one compiled graph, per worker."""
+
+    def __init__(
+        self,
+        graph: Optional[Any] = None,
+        variant: Optional[str] = None,
+        request_timeout_s: Optional[float] = None,
+    ):
+        settings = get_settings()
+        self.variant = variant or settings.server_variant
+        self.request_timeout_s = request_timeout_s or settings.server_request_timeout_s
+        self.graph = graph
+        self._loading: Optional[asyncio.Lock] = None
+        self.singleflight: Optional[SingleFlight] = None
+        if settings.singleflight:
+            self.singleflight = SingleFlight("http", settings.singleflight_timeout_s)
+        self.admission: Optional[AdmissionController] = None
+        if settings.admission_max_concurrency > 0:
+            self.admission = AdmissionController(
+                settings.admission_max_concurrency, settings.admission_max_queue
+            )
+
+    async def get_graph(self):
+        if self.graph is None:
+            if self._loading is None:
+                self._loading = asyncio.Lock()
+            async with self._loading:
+                if self.graph is None:
+                    from graph.builder import abuild_graph
+
+                    self.graph = await abuild_graph(self.variant)
+        return self.graph
+
+    def deadline_s(self, request: GraphRequest) -> float:
+        return min(request.deadline_s or self.request_timeout_s, self.request_timeout_s)
+
+    @asynccontextmanager
+    async def admitted(self, request: GraphRequest, deadline_s: float) -> AsyncIterator[float]:
+        """Hold an admission slot for ``request``; yields the seconds left of its deadline."""
+        if self.admission is None:
+            yield deadline_s
+            return
+        start = time.perf_counter()
+        async with self.admission.slot(request.tenant, request.priority, deadline_s):
+            yield deadline_s - (time.perf_counter() - start)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        path, method = scope["path"], scope["method"]
+        routes = {
+            "/invoke": ("POST", self.invoke),
+            "/stream": ("POST", self.stream),
+            "/healthz": ("GET", self.healthz),
+            "/metrics": ("GET", self.metrics),
+        }
+        start = time.perf_counter()
+        if path not in routes:
+            status = await respond(send, 404, {"error": f"no route for {path}"})
+        elif method != routes[path][0]:
+            status = await respond(send, 405, {"error": f"{path} expects {routes[path][0]}"})
+        else:
+            status = await routes[path][1](receive, send)
+        label = path if path in routes else "other"
+        http_requests.inc(path=label, status=str(status))
+        http_latency.observe(time.perf_counter() - start, path=label)
+
+    async def lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.get_graph()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                from graph.checkpointers import aclose_checkpointers
+
+                await aclose_checkpointers()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def invoke(self, receive: Receive, send: Send) -> int:
+        try:
+            request = parse_request(await read_body(receive))
+        except BadRequest as e:
+            return await respond(send, 400, {"error": str(e)})
+        except ConnectionError:
+            return 499
+        graph = await self.get_graph()
+        start = time.perf_counter()
+        coalesced = self.singleflight is not None and request.thread_id is None
+        thread_id = request.thread_id or uuid.uuid4().hex
+        config = {"configurable": {"thread_id": thread_id}}
+        deadline_s = self.deadline_s(request)
+
+        async def run():
+            async with self.admitted(request, deadline_s) as remaining_s:
+                return await asyncio.wait_for(
+                    graph.ainvoke({"question": request.question}, config), remaining_s
+                )
+
+        key = input_key({"question": request.question})
+        work = self.singleflight.ado(key, run) if coalesced else run()
+        try:
+            result = await cancel_on_disconnect(receive, work)
+        except AdmissionRejected as e:
+            return await rejected(send, e)
+        except asyncio.TimeoutError:
+            return await respond(send, 504, {"error": f"timed out after {deadline_s}s"})
+        except ConnectionError:
+            return 499
+        except Exception as e:
+            print(f"---SERVER: /invoke FAILED: {type(e).__name__}: {e}---")
+            return await respond(send, 500, {"error": f"{type(e).__name__}: {e}"})
+        return await respond(
+            send,
+            200,
+            {
+                "thread_id": thread_id,
+                "generation": result.get("generation"),
+                "seconds": round(time.perf_counter() - start, 3),
+            },
+        )
+
+    async def stream(self, receive: Receive, send: Send) -> int:
+        try:
+            request = parse_request(await read_body(receive))
+        except BadRequest as e:
+            return await respond(send, 400, {"error": str(e)})
+        except ConnectionError:
+            return 499
+        graph = await self.get_graph()
+        thread_id = request.thread_id or uuid.uuid4().hex
+        deadline_s = self.deadline_s(request)
+
+        async def event(name: str, data: Any) -> None:
+            await send({"type": "http.response.body", "body": sse(name, data), "more_body": True})
+
+        async def run() -> None:
+            start = time.perf_counter()
+            generation = None
+            config = {"configurable": {"thread_id": thread_id}}
+            async for mode, chunk in graph.astream(
+                {"question": request.question}, config, stream_mode=["updates", "messages"]
+            ):
+                if mode == "updates":
+                    for node, update in chunk.items():
+                        if update and "generation" in update:
+                            generation = update["generation"]
+                        await event("update", {"node": node, "update": update})
+                else:
+                    message, metadata = chunk
+                    node = metadata.get("langgraph_node")
+                    if node == GENERATE and isinstance(message.content, str) and message.content:
+                        await event("token", {"node": node, "text": message.content})
+            await event(
+                "end",
+                {
+                    "thread_id": thread_id,
+                    "generation": generation,
+                    "seconds": round(time.perf_counter() - start, 3),
+                },
+            )
+
+        try:
+            # Admission is decided before the response starts, so a rejection is a 503.
+            async with self.admitted(request, deadline_s) as remaining_s:
+                await send(
+                    {
+                        "type": "http.response.start",
+                        "status": 200,
+                        "headers": [
+                            (b"content-type", b"text/event-stream"),
+                            (b"cache-control", b"no-cache"),
+                        ],
+                    }
+                )
+                try:
+                    await cancel_on_disconnect(receive, asyncio.wait_for(run(), remaining_s))
+                except asyncio.TimeoutError:
+                    await event("error", {"error": f"timed out after {deadline_s}s"})
+                except ConnectionError:
+                    return 499
+                except Exception as e:
+                    print(f"---SERVER: /stream FAILED: {type(e).__name__}: {e}---")
+                    await event("error", {"error": f"{type(e).__name__}: {e}"})
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return 200
+        except AdmissionRejected as e:
+            return await rejected(send, e)
+
+    async def healthz(self, receive: Receive, send: Send) -> int:
+        body = {"status": "ok", "variant": self.variant, "loaded": self.graph is not None}
+        return await respond(send, 200, body)
+
+    async def metrics(self, receive: Receive, send: Send) -> int:
+        text = REGISTRY.render_prometheus().encode()
+        return await respond(send, 200, text, content_type=b"text/plain; version=0.0.4")
+
+
+async def respond(
+    send: Send,
+    status: int,
+    body: Any,
+    content_type: bytes = b"application/json",
+    headers: Optional[List[Tuple[bytes, bytes]]] = None,
+) -> int:
+    payload = body if isinstance(body, bytes) else dumps(body)
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", content_type),
+                (b"content-length", str(len(payload)).encode()),
+                *(headers or []),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": payload})
+    return status
+
+
+async def rejected(send: Send, error: AdmissionRejected) -> int:
+    retry_after = str(int(error.retry_after_s)).encode()
+    body = {"error": str(error), "reason": error.reason}
+    return await respond(send, 503, body, headers=[(b"retry-after", retry_after)])
+
+
+def create_app() -> GraphService:
+    """Application factory, called once in every worker process."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return GraphService()
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Serve the graph over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--variant", default=settings.server_variant)
+    parser.add_argument("--timeout", type=float, default=settings.server_request_timeout_s)
+    parser.add_argument(
+        "--prefork",
+        action="store_true",
+        default=settings.server_prefork,
+        help="warm the graph once and fork the workers from it (graph.prefork)",
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=settings.server_max_requests,
+        help="with --prefork, replace a worker after this many requests (0: never)",
+    )
+    args = parser.parse_args()
+
+    # Workers are separate processes that read their settings from the environment.
+    os.environ["RAG_SERVER_VARIANT"] = args.variant
+    os.environ["RAG_SERVER_REQUEST_TIMEOUT_S"] = str(args.timeout)
+    get_settings.cache_clear()
+    if args.prefork:
+        from graph import prefork
+
+        prefork.run(args.host, args.port, args.workers, args.max_requests, args.variant)
+        return
+    import uvicorn
+
+    uvicorn.run(
+        "graph.server:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
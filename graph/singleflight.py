@@ -0,0 +1,193 @@
+"""
+Single-flight coalescing of identical calls that are in flight at the same time.
+
+The first caller for a key (the leader) runs the call; callers arriving with
+the same key before it finishes (followers) wait for the leader's result
+instead of starting their own, and get its exception if it fails. Followers
+give up after ``timeout_s`` with ``SingleFlightTimeout``; the leader carries
+on. Nothing is cached: once the call returns, the next caller leads again.
+
+Two layers use it:
+
+    CoalescedGraph     wraps a compiled graph; runs with the same normalized
+                       question and thread_id share one run (the HTTP service
+                       coalesces requests without a thread_id when
+                       RAG_SINGLEFLIGHT is set)
+    coalesce(chain)    wraps a chain; identical inputs share one LLM call
+                       (the router and graders, with RAG_SINGLEFLIGHT_CHAINS)
+
+A follower of a graph run gets the leader's final state, which is
+checkpointed under the leader's thread only. Runs on different threads
+therefore never share a run; runs without a thread_id do, on a new thread
+of their own when the graph has a checkpointer.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import uuid
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from graph.config import get_settings
+from graph.metrics import counter
+from graph.search.cache import normalize_query
+
+singleflight_calls = counter(
+    "singleflight_calls_total", "Coalesced calls by layer and role (leader or follower)"
+)
+
+
+class SingleFlightTimeout(TimeoutError):
+    pass
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _AsyncCall:
+    def __init__(self, task: "asyncio.Future"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str = "default", timeout_s: float = 60.0):
+        self.name = name
+        self.timeout_s = timeout_s
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        # asyncio futures belong to one event loop, so keep the flights per loop.
+        self._async_calls: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def do(self, key: str, fn: Callable[[], Any], timeout_s: Optional[float] = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        singleflight_calls.inc(layer=self.name, role="leader" if leader else "follower")
+        if leader:
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        timeout = self.timeout_s if timeout_s is None else timeout_s
+        if not call.done.wait(timeout):
+            raise SingleFlightTimeout(f"{self.name}: no result for {key!r} after {timeout}s")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def ado(
+        self, key: str, afn: Callable[[], Awaitable[Any]], timeout_s: Optional[float] = None
+    ) -> Any:
+        calls = self._async_calls.setdefault(asyncio.get_running_loop(), {})
+        call = calls.get(key)
+        leader = call is None
+        if leader:
+            # The call runs in its own task, so it survives the leader being
+            # cancelled while followers still wait for it.
+            call = calls[key] = _AsyncCall(asyncio.ensure_future(afn()))
+            call.task.add_done_callback(lambda _, call=call: self._forget(calls, key, call))
+        singleflight_calls.inc(layer=self.name, role="leader" if leader else "follower")
+        timeout = None if leader else (self.timeout_s if timeout_s is None else timeout_s)
+        call.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(call.task), timeout)
+        except asyncio.TimeoutError:
+            if call.task.done():
+                raise
+            raise SingleFlightTimeout(
+                f"{self.name}: no result for {key!r} after {timeout}s"
+            ) from None
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                call.task.cancel()
+
+    @staticmethod
+    def _forget(calls: Dict[str, _AsyncCall], key: str, call: _AsyncCall) -> None:
+        if calls.get(key) is call:
+            del calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls) + sum(len(calls) for calls in self._async_calls.values())
+
+
+def input_key(value: Any) -> str:
+    """A stable key for a chain or graph input; questions are normalized first."""
+    if isinstance(value, dict) and isinstance(value.get("question"), str):
+        value = {**value, "question": normalize_query(value["question"])}
+    encoded = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class CoalescedGraph:
+    """A compiled graph whose identical concurrent runs share one execution."""
+
+    def __init__(self, app, flight: Optional[SingleFlight] = None):
+        self.app = app
+        self.flight = flight or SingleFlight("graph", get_settings().singleflight_timeout_s)
+
+    def _run(self, input: Dict[str, Any], config: Optional[RunnableConfig]):
+        """The flight key and config for a run of ``input``."""
+        configurable = (config or {}).get("configurable") or {}
+        thread_id = configurable.get("thread_id")
+        if thread_id is not None:
+            return f"{thread_id}:{input_key(input)}", config
+        if getattr(self.app, "checkpointer", None) is not None:
+            # The checkpointer needs a thread; the run's followers share it.
+            config = {**(config or {}), "configurable": {**configurable}}
+            config["configurable"]["thread_id"] = uuid.uuid4().hex
+        return input_key(input), config
+
+    def invoke(self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs):
+        key, config = self._run(input, config)
+        return self.flight.do(key, lambda: self.app.invoke(input, config, **kwargs))
+
+    async def ainvoke(
+        self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs
+    ):
+        key, config = self._run(input, config)
+        return await self.flight.ado(key, lambda: self.app.ainvoke(input, config, **kwargs))
+
+    def __getattr__(self, name: str):
+        return getattr(self.app, name)
+
+
+class CoalescedRunnable(Runnable):
+    """A runnable whose identical concurrent ``invoke``/``ainvoke`` calls share one call."""
+
+    def __init__(self, bound: Runnable, flight: SingleFlight):
+        self.bound = bound
+        self.flight = flight
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs) -> Any:
+        return self.flight.do(input_key(input), lambda: self.bound.invoke(input, config, **kwargs))
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs) -> Any:
+        return await self.flight.ado(
+            input_key(input), lambda: self.bound.ainvoke(input, config, **kwargs)
+        )
+
+
+def coalesce(chain: Runnable, name: str) -> Runnable:
+    """``chain``, coalesced under ``name`` when ``RAG_SINGLEFLIGHT_CHAINS`` is set."""
+    settings = get_settings()
+    if not settings.singleflight_chains:
+        return chain
+    return CoalescedRunnable(chain, SingleFlight(name, settings.singleflight_timeout_s))
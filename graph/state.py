@@ -1,4 +1,106 @@
-from typing import List, TypedDict
+from typing import Annotated, List, Optional, TypedDict
+
+from graph.config import get_settings
+from graph.docstore import DocumentRef, document_id, document_refs, get_document_store
+from graph.tokens import count_tokens
+
+
+class ReplaceDocuments(list):
+    """Node output that replaces the accumulated documents instead of adding to them."""
+
+
+class Replace(list):
+    """Node output that replaces a list accumulated with ``extend``."""
+
+
+def extend(current: Optional[List], update: Optional[List]) -> List:
+    """Reducer for lists written by parallel tasks: adds ``update`` or applies a ``Replace``."""
+    if update is None:
+        return list(current or [])
+    if isinstance(update, Replace):
+        return list(update)
+    return [*(current or []), *update]
+
+
+def _key(ref: DocumentRef) -> str:
+    return ref if isinstance(ref, str) else document_id(ref)
+
+
+def _tokens(ref: DocumentRef) -> Optional[int]:
+    """Tokens of ``ref``; None for an id the document store no longer has."""
+    if isinstance(ref, str):
+        entry = get_document_store().lookup(ref)
+        return None if entry is None else entry[1]
+    return count_tokens(ref.page_content)
+
+
+def document_token_budget() -> int:
+    """The token cap on ``GraphState.documents``, by default room for map-reduce batches."""
+    settings = get_settings()
+    return settings.state_document_token_budget or (
+        settings.generation_context_token_budget * settings.generation_max_batches
+    )
+
+
+def cap_documents(
+    documents: List[DocumentRef], max_documents: int, token_budget: int
+) -> List[DocumentRef]:
+    """
+    Keep the newest documents that fit both caps; the newest one is always
+    kept. Ids missing from the document store are dropped.
+    """
+    kept: List[DocumentRef] = []
+    tokens = 0
+    for doc in reversed(documents):
+        cost = _tokens(doc)
+        if cost is None:
+            print(f"---DOCSTORE: DOCUMENT {doc[:12]} IS GONE, DROPPING IT---")
+            continue
+        if kept and (len(kept) >= max_documents or tokens + cost > token_budget):
+            break
+        kept.append(doc)
+        tokens += cost
+    kept.reverse()
+    return kept
+
+
+def fair_share(documents: List[DocumentRef], shares: int) -> List[DocumentRef]:
+    """The first (most relevant) ``documents`` within 1/``shares`` of the state's caps."""
+    settings = get_settings()
+    shares = max(1, shares)
+    # cap_documents keeps the end of the list; retrievers rank best first.
+    kept = cap_documents(
+        documents[::-1],
+        max(1, settings.state_max_documents // shares),
+        document_token_budget() // shares,
+    )
+    return kept[::-1]
+
+
+def merge_documents(
+    current: Optional[List[DocumentRef]], update: Optional[List[DocumentRef]]
+) -> List[DocumentRef]:
+    """
+    Reducer for ``GraphState.documents``.
+
+    Adds ``update`` to ``current`` (or replaces it, for ``ReplaceDocuments``),
+    drops documents whose content is already present and applies the caps
+    from settings. With ``state_document_refs`` documents are put in the
+    document store and only their ids are kept. Always returns a new list;
+    ``current`` is never modified.
+    """
+    if update is None:
+        return list(current or [])
+    settings = get_settings()
+    base = [] if isinstance(update, ReplaceDocuments) else (current or [])
+    merged: List[DocumentRef] = []
+    seen = set()
+    for doc in document_refs([*base, *update]):
+        key = _key(doc)
+        if key not in seen:
+            seen.add(key)
+            merged.append(doc)
+    return cap_documents(merged, settings.state_max_documents, document_token_budget())
 
 
 class GraphState(TypedDict):
@@ -9,10 +111,18 @@ class GraphState(TypedDict):
         question: question
         generation: LLM generation
         web_search: whether to add search
-        documents: list of documents
+        documents: ids of documents in the document store (see graph.docstore),
+            accumulated through ``merge_documents``; resolve with ``load_documents``
+        sub_questions: the question split by graph.nodes.decompose
+        unanswered: sub-questions none of whose documents passed grading
+        partial_answers: per-batch answers when generate split an oversized
+            context (see graph.nodes.generate), empty otherwise
     """
 
     question: str
     generation: str
     web_search: bool
-    documents: List[str]
+    documents: Annotated[List[DocumentRef], merge_documents]
+    sub_questions: List[str]
+    unanswered: Annotated[List[str], extend]
+    partial_answers: List[str]
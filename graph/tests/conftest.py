@@ -0,0 +1,30 @@
+import importlib
+
+import pytest
+
+from graph import fakes
+from graph.chains import reset_chains
+from graph.config import get_settings
+
+
+@pytest.fixture
+def fake_backends(monkeypatch):
+    """Run the graph offline: fake LLM, in-memory retriever, fake web search."""
+    monkeypatch.setenv("RAG_LLM_PROVIDER", "fake")
+    get_settings.cache_clear()
+    reset_chains()
+    search = fakes.FakeSearchTool()
+    retriever = fakes.fake_retriever()
+    # graph.nodes re-exports the node functions under the module names, so
+    # resolve the modules themselves.
+    retrieve_module = importlib.import_module("graph.nodes.retrieve")
+    web_search_module = importlib.import_module("graph.nodes.web_search")
+    monkeypatch.setattr(retrieve_module, "get_retriever", lambda: retriever)
+    monkeypatch.setattr("graph.search.providers.get_web_search_tool", lambda: search)
+    web_search_module.get_cached_search.cache_clear()
+    web_search_module.get_search_client.cache_clear()
+    yield search
+    get_settings.cache_clear()
+    reset_chains()
+    web_search_module.get_cached_search.cache_clear()
+    web_search_module.get_search_client.cache_clear()
@@ -0,0 +1,138 @@
+import asyncio
+import time
+from typing import List
+
+import httpx
+import pytest
+
+from graph.admission import BATCH, INTERACTIVE, AdmissionController, AdmissionRejected
+from graph.builder import build_graph
+from graph.chains.llm import get_llm
+from graph.config import get_settings
+from graph.consts import SELF_RAG
+from graph.server import GraphService
+
+
+async def hold(
+    controller: AdmissionController, release: asyncio.Event, priority: str = INTERACTIVE
+) -> None:
+    async with controller.slot(priority=priority):
+        await release.wait()
+
+
+def test_interactive_first_and_tenants_take_turns() -> None:
+    controller = AdmissionController(max_concurrency=1, max_queue=100)
+    order: List[str] = []
+
+    async def request(tenant: str, priority: str) -> None:
+        async with controller.slot(tenant, priority):
+            order.append(f"{priority[0]}:{tenant}")
+            await asyncio.sleep(0)
+
+    async def main() -> None:
+        release = asyncio.Event()
+        blocker = asyncio.ensure_future(hold(controller, release))
+        await asyncio.sleep(0)
+        arrivals = [("a", BATCH)] * 3 + [("b", BATCH), ("a", INTERACTIVE), ("a", INTERACTIVE)]
+        tasks = [asyncio.ensure_future(request(*a)) for a in arrivals + [("c", INTERACTIVE)]]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(blocker, *tasks)
+
+    asyncio.run(main())
+    assert order == ["i:a", "i:c", "i:a", "b:a", "b:b", "b:a", "b:a"]
+
+
+def test_full_queue_sheds_batch_for_interactive() -> None:
+    controller = AdmissionController(max_concurrency=1, max_queue=2)
+
+    async def main() -> None:
+        release = asyncio.Event()
+        blocker = asyncio.ensure_future(hold(controller, release))
+        await asyncio.sleep(0)
+        batch = [asyncio.ensure_future(hold(controller, release, BATCH)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        async def interactive() -> None:
+            async with controller.slot(priority=INTERACTIVE):
+                pass
+
+        task = asyncio.ensure_future(interactive())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.slot(priority=BATCH):
+                pass
+        assert rejected.value.reason == "queue_full" and rejected.value.retry_after_s >= 1
+        release.set()
+        results = await asyncio.gather(blocker, task, *batch, return_exceptions=True)
+        assert [getattr(r, "reason", None) for r in results] == [None, None, None, "shed"]
+
+    asyncio.run(main())
+
+
+def test_deadlines_reject_early_or_expire_in_the_queue() -> None:
+    controller = AdmissionController(max_concurrency=1, max_queue=100)
+
+    async def main() -> None:
+        release = asyncio.Event()
+        blocker = asyncio.ensure_future(hold(controller, release))
+        await asyncio.sleep(0)
+
+        # No run has finished yet, so there is no estimate: the request queues and expires.
+        with pytest.raises(AdmissionRejected) as expired:
+            async with controller.slot(deadline_s=0.05):
+                pass
+        assert expired.value.reason == "expired"
+        # A cancelled waiter leaves the queue without taking a slot.
+        cancelled = asyncio.ensure_future(hold(controller, release))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        release.set()
+        await blocker
+
+        assert controller.run_time_s is not None
+        controller.run_time_s = 0.1
+        release.clear()
+        blocker = asyncio.ensure_future(hold(controller, release))
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        with pytest.raises(AdmissionRejected) as early:
+            async with controller.slot(deadline_s=0.15):
+                pass
+        assert early.value.reason == "deadline" and time.perf_counter() - start < 0.05
+        release.set()
+        await blocker
+        assert controller._state().running == 0 and controller._state().size == 0
+
+    asyncio.run(main())
+
+
+def test_server_answers_503_with_retry_after(fake_backends, monkeypatch) -> None:
+    monkeypatch.setenv("RAG_ADMISSION_MAX_CONCURRENCY", "1")
+    get_settings.cache_clear()
+    get_llm().latency_s = 0.05
+    service = GraphService(graph=build_graph(SELF_RAG), variant=SELF_RAG)
+
+    async def post_all(bodies):
+        transport = httpx.ASGITransport(app=service)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.ensure_future(client.post("/invoke", json=bodies[0]))
+            while not service.admission._state().running:
+                await asyncio.sleep(0.005)
+            rest = [client.post(path, json=body) for path, body in bodies[1:]]
+            return await asyncio.gather(first, *rest)
+
+    question = {"question": "agent memory"}
+    responses = asyncio.run(
+        post_all(
+            [
+                question,
+                ("/invoke", {**question, "deadline_s": 0.05}),
+                ("/stream", {**question, "deadline_s": 0.05, "priority": BATCH}),
+                ("/invoke", {**question, "priority": "urgent"}),
+            ]
+        )
+    )
+    assert [r.status_code for r in responses] == [200, 503, 503, 400]
+    assert responses[1].json()["reason"] == "expired"
+    assert int(responses[1].headers["retry-after"]) >= 1
@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+from graph.batch import read_questions, run_batch
+from graph.builder import build_graph
+from graph.consts import SELF_RAG
+from graph.limits import LLM, ProviderLimits, provider_slot, use_limits
+
+
+def test_provider_limit_caps_concurrent_calls() -> None:
+    limits = ProviderLimits({LLM: 2})
+    in_flight, peak = 0, 0
+
+    async def call() -> None:
+        nonlocal in_flight, peak
+        async with provider_slot(LLM):
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def run() -> None:
+        with use_limits(limits):
+            await asyncio.gather(*(call() for _ in range(10)))
+
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_batch_streams_results_and_resumes(fake_backends, tmp_path) -> None:
+    questions = tmp_path / "questions.jsonl"
+    questions.write_text(
+        "\n".join(json.dumps({"question": f"agent memory {i}"}) for i in range(6)) + "\n"
+    )
+    output = tmp_path / "answers.jsonl"
+    # A previous run answered question 1, failed question 2 and died mid-line.
+    output.write_text(
+        json.dumps({"id": "1", "question": "agent memory 0", "generation": "done"})
+        + "\n"
+        + json.dumps({"id": "2", "question": "agent memory 1", "error": "boom"})
+        + '\n{"id": "3", "quest'
+    )
+    app = build_graph(SELF_RAG)
+
+    stats = asyncio.run(
+        run_batch(app, read_questions(str(questions)), str(output), concurrency=3)
+    )
+
+    assert (stats.answered, stats.failed, stats.skipped) == (5, 0, 1)
+    assert stats.provider_calls[LLM] > 0 and stats.per_minute > 0
+    records = []
+    for line in output.read_text().splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            pass
+    answered = [r["id"] for r in records if "generation" in r]
+    assert sorted(answered) == ["1", "2", "3", "4", "5", "6"]
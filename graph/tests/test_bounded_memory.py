@@ -0,0 +1,71 @@
+import gc
+import os
+
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from graph.bounded_memory import BoundedMemorySaver
+from graph.builder import build_graph
+from graph.checkpointers import connect_sqlite
+from graph.consts import SELF_RAG
+
+
+def test_evicted_threads_spill_and_come_back(fake_backends, tmp_path) -> None:
+    spill = SqliteSaver(connect_sqlite(str(tmp_path / "spill.sqlite")))
+    saver = BoundedMemorySaver(max_threads=2, spill=spill)
+    app = build_graph(SELF_RAG, checkpointer=saver)
+    configs = [{"configurable": {"thread_id": f"t{i}"}} for i in range(3)]
+    app.invoke({"question": "agent memory"}, configs[0])
+    history = len(list(saver.list(configs[0])))
+    for config in configs[1:]:
+        app.invoke({"question": "agent memory"}, config)
+
+    assert saver.thread_count == 2 and "t0" not in saver.storage
+    assert spill.get_tuple(configs[0]) is not None
+    state = app.get_state(configs[0])
+    assert "fake answer" in state.values["generation"]
+    assert len(list(saver.list(configs[0]))) == 1 < history
+    assert saver.thread_count == 2 and "t1" not in saver.storage
+
+
+def test_keep_history_false_keeps_only_the_latest_checkpoint(fake_backends) -> None:
+    saver = BoundedMemorySaver(keep_history=False)
+    app = build_graph(SELF_RAG, checkpointer=saver)
+    config = {"configurable": {"thread_id": "latest"}}
+    app.invoke({"question": "agent memory"}, config)
+
+    assert len(list(saver.list(config))) == 1
+    assert app.get_state(config).values["generation"]
+    assert saver.total_bytes == sum(
+        len(c[0][1]) + len(c[1][1]) for c in saver.storage["latest"][""].values()
+    ) + sum(len(w[2][1]) for key, ws in saver.writes.items() for w in ws.values())
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def test_soak_rss_stays_flat_across_100k_threads() -> None:
+    saver = BoundedMemorySaver(max_threads=1_000)
+    payload = os.urandom(1000).hex()
+
+    def serve(start: int, stop: int) -> None:
+        for i in range(start, stop):
+            config = {"configurable": {"thread_id": f"user-{i}", "checkpoint_ns": ""}}
+            for step in range(2):
+                checkpoint = empty_checkpoint()
+                checkpoint["channel_values"] = {"generation": payload, "step": step}
+                config = saver.put(config, checkpoint, {"step": step}, {})
+                saver.put_writes(config, [("generation", payload)], task_id=f"task-{step}")
+            saver.get_tuple(config)
+
+    serve(0, 10_000)
+    gc.collect()
+    warm = rss_mb()
+    serve(10_000, 100_000)
+    gc.collect()
+
+    assert saver.thread_count == 1_000
+    assert len(saver.writes) <= 2 * 1_000
+    assert rss_mb() - warm < 10
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from graph.builder import build_graph, get_app
+from graph.consts import ADAPTIVE, CORRECTIVE, ROUTE, SELF_RAG
+
+
+def test_variants_share_nodes_and_differ_in_entry() -> None:
+    corrective = build_graph(CORRECTIVE).get_graph()
+    self_rag = build_graph(SELF_RAG).get_graph()
+    adaptive = build_graph(ADAPTIVE).get_graph()
+
+    assert ROUTE in adaptive.nodes and ROUTE not in corrective.nodes
+    assert set(corrective.nodes) == set(self_rag.nodes)
+    assert {e.target for e in self_rag.edges if e.source == "__start__"} == {"retrieve"}
+    with pytest.raises(ValueError):
+        build_graph("unknown")
+
+
+def test_get_app_compiles_once_per_variant() -> None:
+    assert get_app(CORRECTIVE) is get_app(CORRECTIVE)
+    assert get_app(CORRECTIVE) is not get_app(SELF_RAG)
+
+
+def test_importing_graph_modules_has_no_side_effects(tmp_path) -> None:
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = {**os.environ, "PYTHONPATH": root}
+    subprocess.run(
+        [sys.executable, "-c", "import graph.graph, self_rag_graph, adaptive_rag_graph"],
+        cwd=tmp_path,
+        env=env,
+        check=True,
+    )
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("variant", [CORRECTIVE, SELF_RAG, ADAPTIVE])
+def test_variants_run_side_by_side(fake_backends, variant) -> None:
+    config = {"configurable": {"thread_id": f"test-{variant}"}}
+    result = build_graph(variant).invoke({"question": "agent memory"}, config)
+
+    assert "fake answer" in result["generation"]
+    assert result["documents"]
+
+
+def test_ainvoke_waits_on_the_event_loop_not_on_threads(fake_backends) -> None:
+    from graph.chains.llm import get_llm
+
+    get_llm().latency_s = 0.02  # 8 LLM calls per request
+    app = build_graph(CORRECTIVE)
+
+    async def run(n: int):
+        # One worker thread: blocking nodes would run the requests one at a time.
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=1))
+        return await asyncio.gather(
+            *(
+                app.ainvoke({"question": "agent memory"}, {"configurable": {"thread_id": f"a{i}"}})
+                for i in range(n)
+            )
+        )
+
+    start = time.perf_counter()
+    results = asyncio.run(run(20))
+
+    assert time.perf_counter() - start < 1.5  # serialized: 20 * 8 * 0.02 = 3.2s
+    assert all("fake answer" in r["generation"] for r in results)
@@ -0,0 +1,63 @@
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from graph.checkpoint_inspect import (
+    channel_stats,
+    decode_checkpoint,
+    iter_checkpoints,
+    largest_values,
+    open_readonly,
+    recent_checkpoints,
+    thread_stats,
+)
+from graph.checkpointers import connect_sqlite
+
+
+def fill(path: str) -> None:
+    saver = SqliteSaver(connect_sqlite(path))
+    for t, steps in (("small", 2), ("big", 4)):
+        config = {"configurable": {"thread_id": t, "checkpoint_ns": ""}}
+        for i in range(steps):
+            checkpoint = empty_checkpoint()
+            checkpoint["channel_values"] = {
+                "question": "q",
+                "documents": ["d" * 1000 * (i + 1)] if t == "big" else [],
+            }
+            config = saver.put(config, checkpoint, {"step": i, "source": "loop"}, {})
+            saver.put_writes(config, [("generation", "g" * 100)], task_id=f"task-{i}")
+    saver.conn.close()
+
+
+def test_thread_and_channel_stats(tmp_path) -> None:
+    path = str(tmp_path / "c.sqlite")
+    fill(path)
+    conn = open_readonly(path)
+
+    threads = thread_stats(conn)
+    assert [(s.thread_id, s.checkpoints, s.last_step) for s in threads] == [
+        ("big", 4, 3),
+        ("small", 2, 1),
+    ]
+    assert threads[0].write_bytes > 400
+
+    in_checkpoints, in_writes = channel_stats(conn)
+    assert in_checkpoints["documents"].count == 2
+    assert in_checkpoints["documents"].max_bytes > 4000
+    assert (in_writes["generation"].count, in_writes["generation"].threads) == (6, 2)
+    assert channel_stats(conn, all_checkpoints=True)[0]["documents"].count == 6
+
+    size, thread_id, _, channel, task_id = largest_values(conn, "documents", limit=1)[0]
+    assert (thread_id, channel, task_id) == ("big", "documents", "(checkpoint)")
+    assert size > 4000
+
+
+def test_paging(tmp_path) -> None:
+    path = str(tmp_path / "c.sqlite")
+    fill(path)
+    conn = open_readonly(path)
+
+    assert len(list(iter_checkpoints(conn, page_size=1))) == 6
+    newest = recent_checkpoints(conn, "big", limit=3)
+    older = recent_checkpoints(conn, "big", limit=3, before=newest[-1][2])
+    assert [len(newest), len(older)] == [3, 1]
+    assert len(decode_checkpoint(newest[0])["channel_values"]["documents"][0]) == 4000
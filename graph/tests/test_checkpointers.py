@@ -0,0 +1,85 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+
+from graph.builder import abuild_graph, build_graph
+from graph.checkpointers import (
+    ASYNC_SQLITE,
+    CHECKPOINTERS,
+    SQLITE,
+    aclose_checkpointers,
+    acreate_checkpointer,
+    close_checkpointers,
+    create_checkpointer,
+)
+from graph.config import get_settings
+from graph.consts import SELF_RAG
+
+
+@pytest.fixture
+def sqlite_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "checkpoints" / "graph.sqlite")
+    monkeypatch.setenv("RAG_CHECKPOINT_PATH", path)
+    get_settings.cache_clear()
+    yield path
+    close_checkpointers()
+    get_settings.cache_clear()
+
+
+def test_sqlite_connection_is_tuned_and_shared(sqlite_path) -> None:
+    saver = create_checkpointer(SQLITE)
+    pragma = lambda name: saver.conn.execute(f"PRAGMA {name}").fetchone()[0]  # noqa: E731
+
+    assert create_checkpointer(SQLITE) is saver
+    assert pragma("journal_mode") == "wal"
+    assert pragma("synchronous") == 1  # NORMAL
+    assert pragma("busy_timeout") == 5000
+    assert isinstance(create_checkpointer(), MemorySaver)
+    with pytest.raises(ValueError):
+        create_checkpointer(ASYNC_SQLITE)
+
+
+def test_sqlite_checkpointer_under_concurrent_threads(fake_backends, sqlite_path) -> None:
+    app = build_graph(SELF_RAG, checkpointer=create_checkpointer(SQLITE))
+
+    def run(i: int):
+        config = {"configurable": {"thread_id": f"thread-{i}"}}
+        app.invoke({"question": f"agent memory {i}"}, config)
+        return app.get_state(config).values["generation"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        generations = list(pool.map(run, range(16)))
+    assert all("fake answer" in g for g in generations)
+
+
+@pytest.mark.parametrize("kind", CHECKPOINTERS)
+def test_ainvoke_with_every_checkpointer(fake_backends, sqlite_path, monkeypatch, kind) -> None:
+    monkeypatch.setenv("RAG_CHECKPOINTER", kind)
+    get_settings.cache_clear()
+
+    async def main():
+        app = await abuild_graph(SELF_RAG)
+        try:
+            configs = [{"configurable": {"thread_id": f"async-{i}"}} for i in range(4)]
+            await asyncio.gather(
+                *(app.ainvoke({"question": "agent memory"}, c) for c in configs)
+            )
+            return [await app.aget_state(c) for c in configs]
+        finally:
+            await aclose_checkpointers()
+
+    assert all(s.values["generation"] for s in asyncio.run(main()))
+
+
+def test_async_sqlite_connections_are_closed(sqlite_path) -> None:
+    async def open_saver():
+        return await acreate_checkpointer(ASYNC_SQLITE)
+
+    saver = asyncio.run(open_saver())
+    assert saver.conn.is_alive()
+    # Outside a loop, the sync close reaches the async connections too.
+    close_checkpointers()
+    saver.conn.join(timeout=5)
+    assert not saver.conn.is_alive()
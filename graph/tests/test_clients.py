@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_openai import OpenAIEmbeddings
+
+from graph.chains import reset_chains
+from graph.chains.answer_grader import get_answer_grader
+from graph.chains.generation import get_generation_chain
+from graph.chains.hallucination_grader import get_hallucination_grader
+from graph.chains.llm import get_llm
+from graph.chains.retrieval_grader import get_retrieval_grader
+from graph.chains.router import get_question_router
+from graph.clients import get_http_client, openai_client_kwargs, reset_clients
+from graph.config import get_settings
+from graph.fakes import FakeOpenAIServer
+
+
+@pytest.fixture
+def openai_server(monkeypatch):
+    with FakeOpenAIServer(latency_s=0.01) as server:
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        monkeypatch.setenv("RAG_LLM_PROVIDER", "openai")
+        monkeypatch.setenv("RAG_OPENAI_BASE_URL", server.base_url)
+        monkeypatch.setenv("RAG_HTTP_MAX_CONNECTIONS", "8")
+        get_settings.cache_clear()
+        reset_clients()
+        reset_chains()
+        yield server
+        get_settings.cache_clear()
+        reset_clients()
+        reset_chains()
+
+
+def test_all_chains_share_one_pool(openai_server) -> None:
+    calls = [
+        lambda: get_question_router().invoke({"question": "agent memory"}),
+        lambda: get_retrieval_grader().invoke({"question": "q", "document": "d"}),
+        lambda: get_generation_chain().invoke({"context": "c", "question": "q"}),
+        lambda: get_hallucination_grader().invoke({"documents": "d", "generation": "g"}),
+        lambda: get_answer_grader().invoke({"question": "q", "generation": "g"}),
+    ]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: calls[i % len(calls)](), range(100)))
+
+    assert get_llm().http_client is get_http_client()
+    assert results[0].datasource == "vectorstore"
+    assert openai_server.requests == 100
+    # Five chains, 100 calls, 8 threads: connections are bounded by the pool.
+    assert openai_server.connections <= 8
+
+
+def test_embeddings_reuse_the_chat_connections(openai_server) -> None:
+    get_question_router().invoke({"question": "agent memory"})
+    embeddings = OpenAIEmbeddings(**openai_client_kwargs(), check_embedding_ctx_length=False)
+    for _ in range(5):
+        assert len(embeddings.embed_query("agent memory")) == 64
+
+    assert openai_server.requests == 6
+    assert openai_server.connections == 1
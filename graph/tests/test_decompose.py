@@ -0,0 +1,143 @@
+import asyncio
+import importlib
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from graph.builder import build_graph
+from graph.chains.llm import get_llm
+from graph.config import get_settings
+from graph.consts import (
+    CORRECTIVE,
+    DECOMPOSE,
+    REDUCE_SUB_QUESTIONS,
+    RETRIEVE_SUB_QUESTION,
+    SELF_RAG,
+)
+from graph.docstore import load_documents
+from graph.fakes import default_structured_response, lorem
+
+
+def split_on_and(schema, prompt):
+    response = default_structured_response(schema, prompt)
+    if schema.__name__ == "SubQuestions":
+        question = prompt.rsplit("Human: ", 1)[-1].strip()
+        response.sub_questions = [part.strip() for part in question.split(" and ")]
+    elif schema.__name__ == "GradeDocuments":
+        # Nothing is relevant to a sub-question about "unknown".
+        question = prompt.rsplit("User question:", 1)[-1]
+        response.binary_score = "no" if "unknown" in question else "yes"
+    return response
+
+
+@pytest.fixture
+def decomposing(fake_backends, monkeypatch):
+    monkeypatch.setenv("RAG_DECOMPOSE_QUESTIONS", "true")
+    get_settings.cache_clear()
+    get_llm().structured_responder = split_on_and
+    return fake_backends
+
+
+def steps(app, question: str, thread_id: str):
+    """The names of the tasks run in each step; updates are streamed per task."""
+    config = {"configurable": {"thread_id": thread_id}}
+    tasks = {}
+    for event in app.stream({"question": question}, config, stream_mode="debug"):
+        if event["type"] == "task":
+            tasks.setdefault(event["step"], []).append(event["payload"]["name"])
+    return [names for _, names in sorted(tasks.items())]
+
+
+def test_sub_questions_are_retrieved_in_one_step_and_reduced(decomposing) -> None:
+    app = build_graph(SELF_RAG)
+    run = steps(app, "agent memory and prompt chain and agent memory", "t")
+
+    assert run[0] == [DECOMPOSE]
+    assert run[1] == [RETRIEVE_SUB_QUESTION, RETRIEVE_SUB_QUESTION]
+    assert run[2:4] == [[REDUCE_SUB_QUESTIONS], ["generate"]]
+    state = app.get_state({"configurable": {"thread_id": "t"}}).values
+    assert state["question"] == "agent memory and prompt chain and agent memory"
+    assert state["sub_questions"] == ["agent memory", "prompt chain"]
+    assert state["unanswered"] == [] and state["web_search"] is False
+    # Two sub-questions, four documents each, deduplicated into one context.
+    keys = [d.page_content for d in load_documents(state["documents"])]
+    assert len(keys) == len(set(keys)) <= 8
+    assert decomposing.queries == []
+
+
+def test_web_search_only_when_a_sub_question_finds_nothing(decomposing) -> None:
+    app = build_graph(CORRECTIVE)
+    config = {"configurable": {"thread_id": "w"}}
+    app.invoke({"question": "agent memory and unknown topic"}, config)
+
+    state = app.get_state(config).values
+    assert state["unanswered"] == ["unknown topic"]
+    assert decomposing.queries == ["unknown topic"]
+
+    # A new question on the thread starts from a clean slate.
+    app.invoke({"question": "agent memory"}, config)
+    state = app.get_state(config).values
+    assert state["sub_questions"] == ["agent memory"] and state["unanswered"] == []
+
+
+def test_sub_questions_are_capped(decomposing, monkeypatch) -> None:
+    monkeypatch.setenv("RAG_DECOMPOSE_MAX_SUB_QUESTIONS", "2")
+    get_settings.cache_clear()
+    app = build_graph(SELF_RAG)
+    run = steps(app, "agent memory and prompt chain and vector store", "c")
+
+    assert run[1] == [RETRIEVE_SUB_QUESTION, RETRIEVE_SUB_QUESTION]
+
+
+def test_async_decomposition(decomposing) -> None:
+    app = build_graph(CORRECTIVE)
+    config = {"configurable": {"thread_id": "a"}}
+    result = asyncio.run(app.ainvoke({"question": "agent memory and unknown topic"}, config))
+
+    assert "fake answer" in result["generation"]
+    assert result["unanswered"] == ["unknown topic"]
+    assert decomposing.queries == ["unknown topic"]
+
+
+def test_every_sub_question_keeps_documents_in_the_merged_context(
+    decomposing, monkeypatch
+) -> None:
+    def by_topic(query: str):
+        return [
+            Document(page_content=f"{query} {i}: {lorem(100, seed=i)}", metadata={"topic": query})
+            for i in range(4)
+        ]
+
+    retriever = RunnableLambda(by_topic)
+    retrieve_module = importlib.import_module("graph.nodes.retrieve")
+    monkeypatch.setattr(retrieve_module, "get_retriever", lambda: retriever)
+    app = build_graph(SELF_RAG)
+    config = {"configurable": {"thread_id": "fair"}}
+    app.invoke({"question": "sq1 and sq2 and sq3 and sq4"}, config)
+
+    state = app.get_state(config).values
+    documents = load_documents(state["documents"])
+    # Four sub-questions with four distinct documents each share the 12 slots.
+    assert {d.metadata["topic"] for d in documents} == {"sq1", "sq2", "sq3", "sq4"}
+    assert len(documents) == 12 and state["unanswered"] == []
+    assert [d.page_content.split(":")[0] for d in documents][:3] == ["sq1 0", "sq1 1", "sq1 2"]
+
+
+@pytest.mark.parametrize("run", ["sync", "async"])
+def test_web_search_covers_each_unanswered_sub_question(decomposing, run) -> None:
+    app = build_graph(CORRECTIVE)
+    config = {"configurable": {"thread_id": f"web-{run}"}}
+    question = "agent memory and unknown topic and unknown tool and unknown model"
+    if run == "sync":
+        app.invoke({"question": question}, config)
+    else:
+        asyncio.run(app.ainvoke({"question": question}, config))
+
+    unanswered = ["unknown topic", "unknown tool", "unknown model"]
+    assert sorted(decomposing.queries) == sorted(unanswered)
+    documents = load_documents(app.get_state(config).values["documents"])
+    # Every sub-question keeps web results within its quarter of the 12 slots.
+    for sub_question in unanswered:
+        found = [d for d in documents if d.page_content.startswith(sub_question)]
+        assert 1 <= len(found) <= 3
@@ -0,0 +1,104 @@
+import pytest
+from langchain_core.documents import Document
+
+from graph.builder import build_graph
+from graph.checkpointers import SQLITE, close_checkpointers
+from graph.config import get_settings
+from graph.consts import SELF_RAG
+from graph.docstore import DocumentStore, document_id, get_document_store, load_documents
+from graph.state import merge_documents
+
+
+def test_sqlite_store_survives_the_process_cache(tmp_path) -> None:
+    path = str(tmp_path / "docs.sqlite")
+    doc = Document(page_content="agents plan with memory", metadata={"source": "a.md"})
+    doc_id = DocumentStore(sqlite_path=path).put(doc)
+
+    reopened = DocumentStore(sqlite_path=path)
+    assert doc_id == document_id(doc)
+    assert reopened.get(doc_id) == doc
+    assert reopened.tokens(doc_id) > 0
+    with pytest.raises(KeyError):
+        DocumentStore().get(doc_id)
+
+
+def test_checkpoints_hold_document_ids(fake_backends) -> None:
+    app = build_graph(SELF_RAG)
+    config = {"configurable": {"thread_id": "docstore"}}
+    result = app.invoke({"question": "agent memory"}, config)
+
+    refs = app.get_state(config).values["documents"]
+    assert refs == result["documents"]
+    assert all(isinstance(ref, str) for ref in refs)
+    assert all(isinstance(doc, Document) for doc in load_documents(refs))
+
+
+@pytest.fixture
+def docstore_env(monkeypatch):
+    def configure(**env: str) -> None:
+        for name, value in env.items():
+            monkeypatch.setenv(f"RAG_{name.upper()}", value)
+        get_settings.cache_clear()
+        get_document_store.cache_clear()
+
+    yield configure
+    close_checkpointers()
+    get_settings.cache_clear()
+    get_document_store.cache_clear()
+
+
+def test_evicted_documents_stay_resolvable_for_live_threads(fake_backends, docstore_env) -> None:
+    docstore_env(docstore_max_entries="5")
+    app = build_graph(SELF_RAG)
+    old = {"configurable": {"thread_id": "old"}}
+    app.invoke({"question": "agent memory"}, old)
+    refs = app.get_state(old).values["documents"]
+    store = get_document_store()
+    for i in range(30):
+        store.put(Document(page_content=f"other thread {i}"))
+    assert len(store) == 5
+
+    assert [document_id(doc) for doc in load_documents(refs)] == refs
+    result = app.invoke({"question": "agent memory follow-up"}, old)
+    assert "fake answer" in result["generation"]
+
+
+def test_unknown_ids_are_dropped(docstore_env) -> None:
+    docstore_env()
+    doc = Document(page_content="agents plan with memory")
+    merged = merge_documents(["0" * 64], [doc])
+    assert merged == [document_id(doc)]
+    assert load_documents(["0" * 64, doc]) == [doc]
+
+
+def test_restarted_sqlite_thread_continues(fake_backends, docstore_env, tmp_path) -> None:
+    docstore_env(checkpointer=SQLITE, checkpoint_path=str(tmp_path / "checkpoints.sqlite"))
+    config = {"configurable": {"thread_id": "restarted"}}
+    build_graph(SELF_RAG).invoke({"question": "agent memory"}, config)
+    # Without a docstore path the checkpoints keep the documents themselves.
+    documents = build_graph(SELF_RAG).get_state(config).values["documents"]
+    assert documents and all(isinstance(doc, Document) for doc in documents)
+
+    docstore_env(docstore_path=str(tmp_path / "documents.sqlite"))
+    build_graph(SELF_RAG).invoke({"question": "agent memory"}, config)
+    get_document_store.cache_clear()  # a new process starts with an empty memory tier
+    app = build_graph(SELF_RAG)
+    refs = app.get_state(config).values["documents"]
+    assert refs and all(isinstance(ref, str) for ref in refs)
+    assert len(load_documents(refs)) == len(refs)
+    assert "fake answer" in app.invoke({"question": "follow-up"}, config)["generation"]
+
+
+def test_overflow_file_stays_bounded() -> None:
+    store = DocumentStore(max_entries=2, max_overflow_entries=3)
+    ids = [store.put(Document(page_content=f"document {i}")) for i in range(10)]
+
+    assert len(store) == 2 and store.overflow_entries == 3
+    rows = store._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+    assert rows == 3
+    # The five most recent resolve; the longest evicted are gone.
+    assert all(store.lookup(doc_id) is None for doc_id in ids[:5])
+    assert [store.get(doc_id).page_content for doc_id in ids[5:]] == [
+        f"document {i}" for i in range(5, 10)
+    ]
+    assert len(store) == 2 and store.overflow_entries == 3
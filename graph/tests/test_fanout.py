@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from graph.builder import build_graph
+from graph.chains.llm import get_llm
+from graph.config import get_settings
+from graph.consts import CORRECTIVE, GRADE_DOCUMENTS, GRADE_UNION, RETRIEVE_PARALLEL
+from graph.docstore import load_documents
+from graph.fakes import default_structured_response
+
+
+@pytest.fixture
+def uncertain_router(fake_backends, monkeypatch):
+    monkeypatch.setenv("RAG_ROUTE_FANOUT", "uncertain")
+    get_settings.cache_clear()
+
+    def respond(schema, prompt):
+        response = default_structured_response(schema, prompt)
+        if schema.__name__ == "RouteQuery":
+            response.confidence = 0.2 if "unsure" in prompt else 0.9
+        return response
+
+    get_llm().structured_responder = respond
+    return fake_backends
+
+
+def nodes_run(app, question: str, thread_id: str):
+    config = {"configurable": {"thread_id": thread_id}}
+    return [node for step in app.stream({"question": question}, config) for node in step]
+
+
+def test_uncertain_route_fans_out_and_grades_the_union_once(uncertain_router) -> None:
+    app = build_graph(CORRECTIVE)
+
+    assert nodes_run(app, "agent memory", "t")[0] == "retrieve"
+    nodes = nodes_run(app, "unsure agent memory", "t")
+
+    assert set(nodes[:2]) == {RETRIEVE_PARALLEL, "websearch_parallel"}
+    assert nodes[2:4] == [GRADE_UNION, "generate"]
+    assert GRADE_DOCUMENTS not in nodes
+    state = app.get_state({"configurable": {"thread_id": "t"}}).values
+    documents = load_documents(state["documents"])
+    # Web results survive retrieval's reset, which LangGraph applies first.
+    assert any(d.page_content.startswith("unsure agent memory") for d in documents)
+    assert any(d.metadata.get("source", "").startswith("doc_") for d in documents)
+    assert len(documents) <= 4 + get_settings().web_search_max_passages
+    assert uncertain_router.queries == ["unsure agent memory"]
+
+
+def test_async_fan_out(uncertain_router) -> None:
+    app = build_graph(CORRECTIVE)
+    config = {"configurable": {"thread_id": "a"}}
+    result = asyncio.run(app.ainvoke({"question": "unsure agent memory"}, config))
+
+    assert "fake answer" in result["generation"]
+    assert uncertain_router.queries == ["unsure agent memory"]
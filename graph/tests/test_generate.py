@@ -0,0 +1,90 @@
+import asyncio
+import importlib
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from graph import fakes
+from graph.builder import build_graph
+from graph.chains.llm import get_llm
+from graph.config import get_settings
+from graph.consts import SELF_RAG
+from graph.nodes.generate import context_batches
+from graph.tokens import count_tokens
+
+
+def test_context_batches_keep_order_and_fit_the_budget() -> None:
+    documents = [
+        Document(page_content=fakes.lorem(n, seed=i)) for i, n in enumerate([40, 40, 40, 400, 10])
+    ]
+    batches = context_batches(documents, token_budget=100)
+
+    flat = [d for batch in batches for d in batch]
+    assert flat[:3] == documents[:3] and flat[-1] == documents[-1]
+    # The oversized document is split into parts that each fit a batch.
+    assert len(flat) > len(documents)
+    for batch in batches:
+        assert sum(count_tokens(d.page_content) for d in batch) <= 100
+    assert context_batches(documents[:2], token_budget=1000) == [documents[:2]]
+    assert context_batches([], token_budget=100) == [[]]
+
+
+@pytest.fixture
+def small_window(fake_backends, monkeypatch):
+    """A model that fails on prompts over 500 tokens; each fake document is about 200."""
+    monkeypatch.setenv("RAG_GENERATION_CONTEXT_TOKEN_BUDGET", "400")
+    get_settings.cache_clear()
+    llm = get_llm()
+    llm.context_window = 500
+    return llm
+
+
+def test_oversized_context_fails_in_one_prompt(small_window, monkeypatch) -> None:
+    monkeypatch.setenv("RAG_GENERATION_CONTEXT_TOKEN_BUDGET", "100000")
+    get_settings.cache_clear()
+    config = {"configurable": {"thread_id": "one"}}
+
+    with pytest.raises(fakes.ContextWindowExceeded):
+        build_graph(SELF_RAG).invoke({"question": "agent memory"}, config)
+
+
+def test_map_reduce_generation_and_grading(small_window) -> None:
+    app = build_graph(SELF_RAG)
+    config = {"configurable": {"thread_id": "mr"}}
+    result = app.invoke({"question": "agent memory"}, config)
+
+    partial_answers = result["partial_answers"]
+    assert len(partial_answers) >= 2
+    assert "fake answer" in result["generation"]
+    kinds = [kind for kind, _ in small_window.calls]
+    # One call per batch plus the combining call, and the same for grounding.
+    assert kinds.count("generate") == len(partial_answers) + 1
+    assert kinds.count("GradeHallucinations") == len(partial_answers) + 1
+    combine = [text for kind, text in small_window.calls if "Partial answers" in text]
+    assert len(combine) == 1 and "2. " in combine[0]
+
+
+def test_async_map_reduce_generation(small_window) -> None:
+    app = build_graph(SELF_RAG)
+    config = {"configurable": {"thread_id": "amr"}}
+    result = asyncio.run(app.ainvoke({"question": "agent memory"}, config))
+
+    assert len(result["partial_answers"]) >= 2
+    assert "fake answer" in result["generation"]
+
+
+def test_default_settings_keep_room_for_map_reduce(fake_backends, monkeypatch) -> None:
+    # Four retrieved documents of about 2000 tokens: more than one prompt's
+    # budget, and all of them kept by the state's default cap.
+    documents = [Document(page_content=fakes.lorem(1000, seed=i)) for i in range(4)]
+    assert 6000 < sum(count_tokens(d.page_content) for d in documents) <= 12000
+    retriever = RunnableLambda(lambda query: documents)
+    retrieve_module = importlib.import_module("graph.nodes.retrieve")
+    monkeypatch.setattr(retrieve_module, "get_retriever", lambda: retriever)
+    config = {"configurable": {"thread_id": "defaults"}}
+    result = build_graph(SELF_RAG).invoke({"question": "agent memory"}, config)
+
+    assert len(result["documents"]) == 4
+    assert len(result["partial_answers"]) == 2
+    assert "fake answer" in result["generation"]
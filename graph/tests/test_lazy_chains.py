@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+
+from graph.chains import prompts, reset_chains
+from graph.config import get_settings
+
+COLD_START_BUDGET_S = float(os.environ.get("RAG_COLD_START_BUDGET_S", "2.5"))
+
+COLD_START = """
+import sys, time
+t = time.perf_counter()
+import graph.nodes, graph.chains.router, graph.chains.answer_grader, graph.chains.hallucination_grader
+print(time.perf_counter() - t)
+print(",".join(m for m in ("langchain.hub", "langchain_openai", "langchain_chroma",
+                           "langchain_community.tools.tavily_search") if m in sys.modules))
+"""
+
+
+def test_cold_start_is_offline_and_under_budget() -> None:
+    env = {k: v for k, v in os.environ.items() if k not in ("OPENAI_API_KEY", "TAVILY_API_KEY")}
+    out = subprocess.run(
+        [sys.executable, "-c", COLD_START], env=env, capture_output=True, text=True, check=True
+    )
+    seconds, eager_modules = out.stdout.splitlines()[-2:]
+
+    assert eager_modules == ""
+    assert float(seconds) < COLD_START_BUDGET_S
+
+
+def test_chains_build_from_settings(monkeypatch) -> None:
+    monkeypatch.setenv("RAG_LLM_PROVIDER", "fake")
+    get_settings.cache_clear()
+    reset_chains()
+    try:
+        from graph.chains.generation import get_generation_chain
+        from graph.chains.router import get_question_router
+
+        assert get_question_router().invoke({"question": "agent memory"}).datasource
+        answer = get_generation_chain().invoke({"context": [], "question": "agent memory"})
+        assert "fake answer" in answer
+    finally:
+        get_settings.cache_clear()
+        reset_chains()
+
+
+def test_hub_prompt_falls_back_to_cache_then_vendored(tmp_path, monkeypatch) -> None:
+    def unreachable(name):
+        raise ConnectionError("offline")
+
+    import langchain.hub
+
+    monkeypatch.setattr(langchain.hub, "pull", unreachable)
+    assert prompts.pull_cached("rlm/rag-prompt", str(tmp_path), 60, prompts.rag_prompt) is (
+        prompts.rag_prompt
+    )
+
+    cached = prompts.rag_prompt.partial(question="cached")
+    monkeypatch.setattr(langchain.hub, "pull", lambda name: cached)
+    prompts.pull_cached("rlm/rag-prompt", str(tmp_path), 0, prompts.rag_prompt)
+    monkeypatch.setattr(langchain.hub, "pull", unreachable)
+    stale = prompts.pull_cached("rlm/rag-prompt", str(tmp_path), 0, prompts.rag_prompt)
+    assert stale.partial_variables == {"question": "cached"}
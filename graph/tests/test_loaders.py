@@ -0,0 +1,48 @@
+import os
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from graph.fakes import make_corpus
+from graph.loaders import discover_files, ingest_directory, load_file
+
+splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=0)
+
+
+def test_load_file_parses_every_format(tmp_path) -> None:
+    paths = make_corpus(str(tmp_path), n_pdf=1, n_html=1, n_markdown=1, pages_per_pdf=3)
+    pdf, html, md = paths
+
+    assert len(load_file(pdf)) == 3
+    assert len(load_file(pdf)[0].page_content.split()) > 100
+    assert load_file(html)[0].metadata["title"] == "page 0"
+    assert load_file(md)[0].page_content.startswith("# Note 0")
+    assert len(discover_files(str(tmp_path))) == 3
+
+
+def test_ingest_directory_skips_unchanged_files(tmp_path) -> None:
+    corpus = tmp_path / "corpus"
+    paths = make_corpus(str(corpus), n_pdf=2, n_html=2, n_markdown=2, pages_per_pdf=2)
+    manifest = str(tmp_path / "manifest.json")
+    store = InMemoryVectorStore(DeterministicFakeEmbedding(size=16))
+
+    first = ingest_directory(str(corpus), store, splitter, manifest_path=manifest, max_workers=2)
+    assert first.files_parsed == 6
+    assert first.pages == 2 * 2 + 2 + 2
+    assert len(store.store) == first.chunks > 0
+
+    second = ingest_directory(str(corpus), store, splitter, manifest_path=manifest, max_workers=2)
+    assert second.files_parsed == 0
+    assert second.files_skipped == 6
+    assert len(store.store) == first.chunks
+
+    with open(paths[-1], "a", encoding="utf-8") as f:
+        f.write("\nan appended paragraph\n")
+    os.remove(paths[0])
+    third = ingest_directory(str(corpus), store, splitter, manifest_path=manifest, max_workers=2)
+    assert third.files_parsed == 1
+    assert third.files_removed == 1
+    assert not any(
+        doc["metadata"]["source"] == paths[0] for doc in store.store.values()
+    )
@@ -0,0 +1,14 @@
+from graph.metrics import Histogram
+
+
+def test_histogram_counts_values_above_the_last_bucket() -> None:
+    histogram = Histogram("latency_seconds", "test", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 100.0):
+        histogram.observe(value, route="a")
+
+    assert histogram.sum(route="a") == 100.55
+    assert histogram.count(route="a") == 3
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="a",le="0.1"} 1.0' in lines
+    assert 'latency_seconds_bucket{route="a",le="1.0"} 2.0' in lines
+    assert 'latency_seconds_bucket{route="a",le="+Inf"} 3.0' in lines
@@ -0,0 +1,86 @@
+import asyncio
+import gc
+import importlib
+import multiprocessing
+import os
+import socket
+import sys
+import types
+
+from graph.chains.llm import get_llm
+from graph.consts import SELF_RAG
+from graph.prefork import PreforkServer, serve_uvicorn, warm
+
+
+def answer_questions(app, sock: socket.socket, max_requests: int) -> None:
+    for _ in range(max_requests):
+        conn, _ = sock.accept()
+        with conn:
+            question = conn.recv(1024).decode()
+            config = {"configurable": {"thread_id": question}}
+            result = asyncio.run(app.graph.ainvoke({"question": question}, config))
+            frozen = gc.get_freeze_count() > 0
+            conn.sendall(f"{os.getpid()}|{frozen}|{result['generation']}".encode())
+
+
+def ask(port: int, question: str) -> str:
+    with socket.create_connection(("127.0.0.1", port), timeout=10) as conn:
+        conn.sendall(question.encode())
+        return conn.recv(4096).decode()
+
+
+def test_warm_loads_everything_before_the_fork(fake_backends, monkeypatch) -> None:
+    retrieve = importlib.import_module("graph.nodes.retrieve")
+    opened = []
+    retriever = retrieve.get_retriever
+    monkeypatch.setattr(retrieve, "get_retriever", lambda: opened.append(1) or retriever())
+
+    service = warm(SELF_RAG)
+    assert service.graph is not None and service.variant == SELF_RAG
+    assert get_llm.cache_info().currsize == 1
+    # The retriever's connection must not be shared across the fork.
+    assert opened == []
+
+
+def test_serve_uvicorn_serves_the_inherited_socket(monkeypatch) -> None:
+    served = {}
+
+    class Server:
+        def __init__(self, config):
+            served["config"] = config
+
+        def run(self, sockets):
+            served["sockets"] = sockets
+
+    uvicorn = types.SimpleNamespace(Config=lambda app, **kwargs: (app, kwargs), Server=Server)
+    monkeypatch.setitem(sys.modules, "uvicorn", uvicorn)
+    sock = socket.create_server(("127.0.0.1", 0))
+    try:
+        serve_uvicorn("app", sock, 0)
+        assert served["config"][1]["limit_max_requests"] is None
+        serve_uvicorn("app", sock, 100)
+        assert served["config"] == ("app", {"limit_max_requests": 100, "timeout_keep_alive": 5})
+        assert served["sockets"] == [sock]
+    finally:
+        sock.close()
+
+
+def test_workers_share_the_warm_graph_and_are_recycled(fake_backends) -> None:
+    sock = socket.create_server(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = PreforkServer(warm(SELF_RAG), sock, workers=2, max_requests=2, serve=answer_questions)
+    master = multiprocessing.get_context("fork").Process(target=server.run)
+    master.start()
+    try:
+        replies = [ask(port, f"agent memory {i}").split("|") for i in range(6)]
+    finally:
+        master.terminate()
+        master.join(10)
+    sock.close()
+
+    pids = {pid for pid, _, _ in replies}
+    # Two requests per worker: six requests need at least three workers.
+    assert len(pids) >= 3 and str(master.pid) not in pids
+    assert all(frozen == "True" for _, frozen, _ in replies)
+    assert all(generation == get_llm().answer for _, _, generation in replies)
+    assert master.exitcode == 0
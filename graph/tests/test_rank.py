@@ -0,0 +1,26 @@
+from graph.fakes import lorem
+from graph.search.rank import bm25_scores, rank_results
+from graph.tokens import count_tokens
+
+
+def test_bm25_prefers_passages_sharing_rare_query_terms() -> None:
+    texts = [lorem(80, seed=1), lorem(80, seed=2) + " the zorblax engine was built by kestrel"]
+    scores = bm25_scores("who built the zorblax engine", texts)
+    assert scores[1] > scores[0]
+
+
+def test_rank_results_keeps_relevant_chunks_within_budget() -> None:
+    results = [
+        {"url": "https://a", "content": lorem(1500, seed=3)},
+        {
+            "url": "https://b",
+            "content": lorem(700, seed=4) + "\n\nThe zorblax engine was built by lab kestrel.\n\n"
+            + lorem(700, seed=5),
+        },
+    ]
+    passages = rank_results("Which lab built the zorblax engine?", results, token_budget=400)
+
+    assert sum(count_tokens(p.page_content) for p in passages) <= 400
+    assert "kestrel" in passages[0].page_content
+    assert passages[0].metadata["source"] == "https://b"
+    assert all("score" in p.metadata for p in passages)
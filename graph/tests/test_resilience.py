@@ -0,0 +1,198 @@
+import asyncio
+import importlib
+import time
+
+import openai
+import pytest
+from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_community.utilities.tavily_search import TavilySearchAPIWrapper
+
+from graph.chains.llm import get_llm
+from graph.clients import reset_clients
+from graph.config import get_settings
+from graph.fakes import FakeOpenAIServer, FakeSearchProvider
+from graph.resilience import (
+    CircuitBreaker,
+    CircuitOpen,
+    Guard,
+    RateLimiter,
+    Retryable,
+    get_guard,
+    guard_retries,
+)
+
+
+@pytest.fixture
+def openai_server(monkeypatch, request):
+    with FakeOpenAIServer(**request.param) as server:
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        monkeypatch.setenv("RAG_LLM_PROVIDER", "openai")
+        monkeypatch.setenv("RAG_OPENAI_BASE_URL", server.base_url)
+        monkeypatch.setenv("RAG_RETRY_BASE_S", "0.01")
+        get_settings.cache_clear()
+        get_llm.cache_clear()
+        reset_clients()
+        yield server
+        get_settings.cache_clear()
+        get_llm.cache_clear()
+        reset_clients()
+
+
+def test_rate_limiter_spaces_out_requests() -> None:
+    limiter = RateLimiter(requests_per_min=600)
+    waits = [limiter.reserve(1) for _ in range(12)]
+    # A second's worth (10) goes at once, then one every 100ms.
+    assert waits[:10] == [0.0] * 10
+    assert waits[10] == pytest.approx(0.1, abs=0.01)
+    assert waits[11] == pytest.approx(0.2, abs=0.01)
+    assert not limiter.counts_tokens and RateLimiter(tokens_per_min=6000).counts_tokens
+
+
+def test_jittered_delays_and_retry_after() -> None:
+    guard = Guard("test", base_s=0.5, cap_s=2.0, seed=1)
+    # Decorrelated jitter: between the base and three times the previous delay.
+    delays = [guard.next_delay(0.5, Retryable("429")) for _ in range(100)]
+    assert all(0.5 <= d <= 1.5 for d in delays) and len(set(delays)) == 100
+    assert guard.next_delay(10.0, Retryable("429")) <= 2.0
+    asked = [guard.next_delay(1.0, Retryable("429", retry_after_s=1.0)) for _ in range(100)]
+    assert all(1.0 <= d <= 1.5 for d in asked)
+    assert guard.next_delay(1.0, Retryable("429", retry_after_s=60.0)) is None
+
+
+def test_breaker_opens_fails_fast_and_recovers() -> None:
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_s=0.05)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record(False)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+    time.sleep(0.05)
+    breaker.before_call()  # the trial call
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    breaker.record(False)
+    assert breaker.state == "open"
+
+    time.sleep(0.05)
+    breaker.before_call()
+    breaker.record(True)
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_guard_retries_only_retryable_errors() -> None:
+    guard = Guard("test", max_attempts=3, base_s=0.001)
+    calls = []
+
+    def flaky(failures: int):
+        calls.append(1)
+        if len(calls) <= failures:
+            raise Retryable("429") from ConnectionError("busy")
+        return "ok"
+
+    assert guard.call(lambda: flaky(2)) == "ok" and len(calls) == 3
+    calls.clear()
+    with pytest.raises(ConnectionError):
+        guard.call(lambda: flaky(3))
+    assert len(calls) == 3
+    with pytest.raises(ValueError):
+        guard.call(lambda: int("x"))
+
+    async def cancelled():
+        await asyncio.sleep(1)
+
+    async def main():
+        task = asyncio.ensure_future(guard.acall(cancelled))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize(
+    "openai_server", [{"rate_limit_prob": 0.5, "retry_after_s": 0, "seed": 3}], indirect=True
+)
+def test_chat_model_retries_429s(openai_server, monkeypatch) -> None:
+    monkeypatch.setenv("RAG_RETRY_MAX_ATTEMPTS", "10")
+    get_settings.cache_clear()
+    retries = guard_retries.value(provider="llm:gpt-3.5-turbo")
+
+    answers = [get_llm().invoke("agent memory").content for _ in range(10)]
+
+    async def ainvoke():
+        return [(await get_llm().ainvoke("agent memory")).content for _ in range(10)]
+
+    answers += asyncio.run(ainvoke())
+    assert answers == ["This is a fake answer."] * 20
+    assert openai_server.rate_limited > 0
+    assert openai_server.requests == 20 + openai_server.rate_limited
+    assert guard_retries.value(provider="llm:gpt-3.5-turbo") - retries == (
+        openai_server.rate_limited
+    )
+    # 429s are retried but say nothing about the provider's health.
+    assert get_guard("llm:gpt-3.5-turbo").breaker.state == "closed"
+
+
+@pytest.mark.parametrize("openai_server", [{"error_prob": 1.0}], indirect=True)
+def test_open_circuit_fails_fast(openai_server, monkeypatch) -> None:
+    monkeypatch.setenv("RAG_RETRY_MAX_ATTEMPTS", "2")
+    monkeypatch.setenv("RAG_BREAKER_FAILURE_THRESHOLD", "2")
+    get_settings.cache_clear()
+
+    with pytest.raises(openai.InternalServerError):
+        get_llm().invoke("agent memory")
+    assert openai_server.requests == 2
+    with pytest.raises(openai.APIConnectionError) as failed:
+        get_llm().invoke("agent memory")
+    assert isinstance(failed.value.__cause__, CircuitOpen)
+    assert openai_server.requests == 2
+
+
+def test_web_search_continues_without_a_failing_provider(fake_backends, monkeypatch) -> None:
+    monkeypatch.setenv("RAG_RETRY_MAX_ATTEMPTS", "1")
+    monkeypatch.setenv("RAG_BREAKER_FAILURE_THRESHOLD", "1")
+    monkeypatch.setenv("RAG_WEB_SEARCH_PROVIDERS", "flaky")
+    get_settings.cache_clear()
+    get_guard.cache_clear()
+    provider = FakeSearchProvider(name="flaky", fail_prob=1.0)
+    web_search = importlib.import_module("graph.nodes.web_search")
+    monkeypatch.setattr(web_search, "get_provider", lambda name: provider)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(web_search.aweb_search({"question": "agent memory"}))
+    result = asyncio.run(web_search.aweb_search({"question": "agent memory"}))
+    assert result["documents"] == [] and provider.calls == 1
+    get_guard.cache_clear()
+
+
+def test_tavily_outage_opens_the_breaker(fake_backends, monkeypatch) -> None:
+    calls = []
+
+    async def outage(self, query, *args, **kwargs):
+        calls.append(query)
+        raise Exception("Error 503: Service Unavailable")
+
+    monkeypatch.setattr(TavilySearchAPIWrapper, "raw_results_async", outage)
+    tool = TavilySearchResults(api_wrapper=TavilySearchAPIWrapper(tavily_api_key="test"))
+    monkeypatch.setattr("graph.search.providers.get_web_search_tool", lambda: tool)
+    monkeypatch.setenv("RAG_RETRY_MAX_ATTEMPTS", "2")
+    monkeypatch.setenv("RAG_RETRY_BASE_S", "0.001")
+    monkeypatch.setenv("RAG_BREAKER_FAILURE_THRESHOLD", "2")
+    get_settings.cache_clear()
+    get_guard.cache_clear()
+    web_search = importlib.import_module("graph.nodes.web_search")
+    web_search.get_search_client.cache_clear()
+    web_search.get_cached_search.cache_clear()
+
+    # Retried, then raised: the error string is never taken for results.
+    with pytest.raises(Exception, match="Error 503"):
+        asyncio.run(web_search.aweb_search({"question": "agent memory"}))
+    assert len(calls) == 2
+    result = asyncio.run(web_search.aweb_search({"question": "agent memory"}))
+    assert result["documents"] == [] and len(calls) == 2
+    get_guard.cache_clear()
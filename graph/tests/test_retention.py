@@ -0,0 +1,50 @@
+import os
+import time
+
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from graph.checkpointers import connect_sqlite
+from graph.retention import checkpoint_id_at, compact, prune
+
+
+def fill(saver: SqliteSaver, threads: int, per_thread: int) -> None:
+    for t in range(threads):
+        config = {"configurable": {"thread_id": f"t{t}", "checkpoint_ns": ""}}
+        for i in range(per_thread):
+            checkpoint = empty_checkpoint()
+            checkpoint["channel_values"] = {"generation": os.urandom(2000).hex()}
+            config = saver.put(config, checkpoint, {"step": i}, {})
+            saver.put_writes(config, [("generation", "x" * 1000)], task_id=f"task-{i}")
+
+
+def count(saver: SqliteSaver, table: str) -> int:
+    return saver.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_prune_keeps_newest_per_thread_and_drops_orphan_writes(tmp_path) -> None:
+    saver = SqliteSaver(connect_sqlite(str(tmp_path / "c.sqlite")))
+    fill(saver, threads=3, per_thread=10)
+    newest = saver.get_tuple({"configurable": {"thread_id": "t0"}}).checkpoint["id"]
+
+    stats = prune(saver.conn, keep_last=2)
+
+    assert (stats.checkpoints, stats.writes) == (24, 24)
+    assert count(saver, "checkpoints") == count(saver, "writes") == 6
+    assert saver.get_tuple({"configurable": {"thread_id": "t0"}}).checkpoint["id"] == newest
+    assert len(list(saver.list({"configurable": {"thread_id": "t1"}}))) == 2
+
+
+def test_ttl_and_incremental_vacuum(tmp_path) -> None:
+    saver = SqliteSaver(connect_sqlite(str(tmp_path / "c.sqlite")))
+    assert checkpoint_id_at(time.time() - 1) < empty_checkpoint()["id"]
+    fill(saver, threads=2, per_thread=20)
+    pages = saver.conn.execute("PRAGMA page_count").fetchone()[0]
+
+    assert prune(saver.conn, ttl_s=3600).checkpoints == 0
+    prune(saver.conn, ttl_s=3600, now=time.time() + 7200)
+    released = compact(saver.conn)
+
+    assert count(saver, "checkpoints") == count(saver, "writes") == 0
+    assert released > 0
+    assert saver.conn.execute("PRAGMA page_count").fetchone()[0] == pages - released
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+
+from graph.fakes import FakeSearchTool
+from graph.search.cache import MISS, STALE, CachedSearch, SearchCache, cache_key, cache_requests
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_key_ignores_case_whitespace_and_trailing_punctuation() -> None:
+    assert cache_key("What is agent memory?", 3, "tavily") == cache_key(
+        "  what is   AGENT memory ", 3, "tavily"
+    )
+    assert cache_key("agent memory", 3, "tavily") != cache_key("agent memory", 5, "tavily")
+
+
+def test_fresh_stale_and_expired_entries() -> None:
+    clock = Clock()
+    tool = FakeSearchTool()
+    refreshed = threading.Event()
+
+    def fetch(query):
+        results = tool.invoke({"query": query})
+        if len(tool.queries) > 1:
+            refreshed.set()
+        return results
+
+    cached = CachedSearch(SearchCache(ttl_s=60, stale_s=30, clock=clock))
+    first = cached.search("agent memory", fetch)
+    assert cached.search("Agent memory?", fetch) == first
+    assert len(tool.queries) == 1
+
+    hits_before = cache_requests.value(result=STALE)
+    clock.now += 70
+    assert cached.search("agent memory", fetch) == first  # served stale, refreshed behind
+    assert refreshed.wait(5)
+    assert cache_requests.value(result=STALE) == hits_before + 1
+
+    clock.now += 200
+    cached.search("agent memory", fetch)
+    assert len(tool.queries) == 3
+
+
+
+def test_async_search_refreshes_stale_entries_in_a_task() -> None:
+    clock = Clock()
+    tool = FakeSearchTool()
+    cached = CachedSearch(SearchCache(ttl_s=60, stale_s=30, clock=clock))
+
+    async def afetch(query):
+        return await tool.ainvoke({"query": query})
+
+    async def run():
+        first = await cached.asearch("agent memory", afetch)
+        clock.now += 70
+        assert await cached.asearch("agent memory", afetch) == first
+        assert len(tool.queries) == 1
+        await asyncio.gather(*cached._tasks)
+        assert len(tool.queries) == 2
+
+    asyncio.run(run())
+
+def test_lru_bound_and_sqlite_persistence(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite")
+    cache = SearchCache(max_entries=2, sqlite_path=path)
+    for q in ("a", "b", "c"):
+        cache.put(q, [{"content": q}])
+    assert len(cache) == 2
+
+    reopened = SearchCache(max_entries=2, sqlite_path=path)
+    assert reopened.get("a") == ([{"content": "a"}], "hit")
+    assert SearchCache().get("a") == (None, MISS)
+
+
+def test_graph_loop_searches_once_per_question(fake_backends) -> None:
+    from graph.nodes import web_search
+
+    for _ in range(3):
+        web_search({"question": "how to make pizza", "documents": []})
+    assert fake_backends.queries == ["how to make pizza"]
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import pytest
+
+from graph.fakes import FakeSearchProvider
+from graph.search.client import WebSearchClient, WebSearchTimeout, hedges_sent
+
+
+class ScriptedProvider:
+    def __init__(self, name, latencies, fail=False):
+        self.name = name
+        self.latencies = list(latencies)
+        self.fail = fail
+        self.calls = 0
+
+    async def asearch(self, query, k):
+        latency = self.latencies[min(self.calls, len(self.latencies) - 1)]
+        self.calls += 1
+        await asyncio.sleep(latency)
+        if self.fail:
+            raise ConnectionError(self.name)
+        return [{"url": f"https://{self.name}/{i}", "content": query} for i in range(k)]
+
+
+def test_deadline_is_enforced() -> None:
+    client = WebSearchClient([ScriptedProvider("slow", [5.0])], timeout_s=0.05)
+    start = time.perf_counter()
+    with pytest.raises(WebSearchTimeout):
+        client.search("agent memory")
+    assert time.perf_counter() - start < 1.0
+
+
+def test_slow_call_is_hedged_after_warmup() -> None:
+    provider = ScriptedProvider("p", [0.01] * 20 + [2.0, 0.01])
+    client = WebSearchClient([provider], hedge_quantile=0.9, hedge_min_samples=20)
+
+    async def run():
+        for _ in range(20):
+            await client.asearch("warmup")
+        start = time.perf_counter()
+        await client.asearch("agent memory")
+        return time.perf_counter() - start
+
+    before = hedges_sent.value(provider="p")
+    assert asyncio.run(run()) < 0.5
+    assert hedges_sent.value(provider="p") == before + 1
+
+
+def test_first_mode_takes_fastest_healthy_provider() -> None:
+    client = WebSearchClient(
+        [
+            ScriptedProvider("broken", [0.0], fail=True),
+            ScriptedProvider("slow", [1.0]),
+            ScriptedProvider("fast", [0.01]),
+        ]
+    )
+    results = client.search("agent memory", k=2)
+    assert [r["url"] for r in results] == ["https://fast/0", "https://fast/1"]
+
+
+def test_merge_mode_interleaves_and_dedups() -> None:
+    client = WebSearchClient(
+        [FakeSearchProvider("a"), FakeSearchProvider("b"), ScriptedProvider("c", [0.0])],
+        mode="merge",
+    )
+    results = client.search("agent memory", k=2)
+    urls = [r["url"] for r in results]
+    assert len(urls) == len(set(urls)) == 4
+    assert urls[1] == "https://c/0"
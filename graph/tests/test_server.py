@@ -0,0 +1,129 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+import httpx
+import pytest
+
+from graph.builder import build_graph
+from graph.chains.llm import get_llm
+from graph.consts import SELF_RAG
+from graph.server import GraphService
+
+
+def parse_events(text: str) -> List[Tuple[str, Dict[str, Any]]]:
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+def service(fake_backends):
+    return GraphService(graph=build_graph(SELF_RAG), variant=SELF_RAG, request_timeout_s=5)
+
+
+def request(service: GraphService, method: str, path: str, **kwargs) -> httpx.Response:
+    async def send() -> httpx.Response:
+        transport = httpx.ASGITransport(app=service)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, path, **kwargs)
+
+    return asyncio.run(send())
+
+
+def test_invoke_keeps_state_per_thread(service) -> None:
+    response = request(service, "POST", "/invoke", json={"question": "agent memory"})
+    assert response.status_code == 200
+    body = response.json()
+    assert "fake answer" in body["generation"] and body["thread_id"]
+
+    request(service, "POST", "/invoke", json={"question": "prompt chain", "thread_id": "t1"})
+    state = service.graph.get_state({"configurable": {"thread_id": "t1"}}).values
+    assert state["question"] == "prompt chain"
+
+
+def test_stream_sends_node_updates_then_tokens_then_end(service) -> None:
+    response = request(service, "POST", "/stream", json={"question": "agent memory"})
+    assert response.headers["content-type"] == "text/event-stream"
+    events = parse_events(response.text)
+
+    nodes = [data["node"] for name, data in events if name == "update"]
+    assert nodes == ["retrieve", "grade_documents", "generate"]
+    tokens = "".join(data["text"] for name, data in events if name == "token")
+    assert tokens == get_llm().answer
+    name, data = events[-1]
+    assert name == "end" and data["generation"] == get_llm().answer
+
+
+def test_timeouts(service) -> None:
+    get_llm().latency_s = 0.2
+    service.request_timeout_s = 0.1
+
+    response = request(service, "POST", "/invoke", json={"question": "agent memory"})
+    assert response.status_code == 504
+    events = parse_events(request(service, "POST", "/stream", json={"question": "q"}).text)
+    assert events[-1][0] == "error" and "timed out" in events[-1][1]["error"]
+
+
+def test_client_disconnect_cancels_the_run(service) -> None:
+    get_llm().latency_s = 1.0
+
+    async def disconnecting_client() -> Tuple[float, List[Dict[str, Any]]]:
+        messages = [{"type": "http.request", "body": b'{"question": "agent memory"}'}]
+        sent = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.sleep(0.05)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        start = time.perf_counter()
+        scope = {"type": "http", "path": "/invoke", "method": "POST"}
+        await service(scope, receive, send)
+        return time.perf_counter() - start, sent
+
+    elapsed, sent = asyncio.run(disconnecting_client())
+    assert elapsed < 0.5 and sent == []
+
+
+def test_bad_requests_health_and_metrics(service) -> None:
+    assert request(service, "POST", "/invoke", content=b"{").status_code == 400
+    assert request(service, "POST", "/invoke", json={"question": " "}).status_code == 400
+    assert request(service, "GET", "/invoke").status_code == 405
+    assert request(service, "GET", "/nope").status_code == 404
+
+    health = request(service, "GET", "/healthz").json()
+    assert health == {"status": "ok", "variant": SELF_RAG, "loaded": True}
+    metrics = request(service, "GET", "/metrics").text
+    assert 'http_requests_total{path="/invoke",status="400"}' in metrics
+
+
+def test_graph_is_built_once_at_startup(fake_backends) -> None:
+    service = GraphService(variant=SELF_RAG)
+
+    async def lifespan() -> List[Dict[str, Any]]:
+        messages = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message)
+
+        await service({"type": "lifespan"}, receive, send)
+        return sent
+
+    sent = asyncio.run(lifespan())
+    assert [m["type"] for m in sent] == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    graph = service.graph
+    assert graph is not None
+    request(service, "POST", "/invoke", json={"question": "agent memory"})
+    assert service.graph is graph
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from graph.builder import build_graph
+from graph.chains import reset_chains
+from graph.chains.llm import get_llm
+from graph.config import get_settings
+from graph.consts import SELF_RAG
+from graph.server import GraphService
+from graph.singleflight import CoalescedGraph, SingleFlight, SingleFlightTimeout
+
+N = 20
+
+
+@pytest.fixture
+def slow_llm(fake_backends):
+    llm = get_llm()
+    llm.latency_s = 0.05
+    return llm
+
+
+def calls_for_one_run(llm) -> int:
+    before = len(llm.calls)
+    build_graph(SELF_RAG).invoke({"question": "agent memory"}, {"configurable": {"thread_id": "x"}})
+    return len(llm.calls) - before
+
+
+def test_identical_concurrent_runs_make_one_set_of_llm_calls(slow_llm) -> None:
+    expected = calls_for_one_run(slow_llm)
+    app = CoalescedGraph(build_graph(SELF_RAG))
+    questions = ["agent memory", "Agent  memory?"] * (N // 2)
+
+    async def run_all():
+        return await asyncio.gather(*(app.ainvoke({"question": q}) for q in questions))
+
+    before = len(slow_llm.calls)
+    results = asyncio.run(run_all())
+    assert len(slow_llm.calls) - before == expected
+    assert len({r["generation"] for r in results}) == 1
+
+    def run(i: int):
+        return app.invoke({"question": "agent memory"}, {"configurable": {"thread_id": "s"}})
+
+    before = len(slow_llm.calls)
+    with ThreadPoolExecutor(max_workers=N) as pool:
+        list(pool.map(run, range(N)))
+    assert len(slow_llm.calls) - before == expected
+
+
+def test_runs_on_different_threads_are_not_coalesced(slow_llm) -> None:
+    expected = calls_for_one_run(slow_llm)
+    app = CoalescedGraph(build_graph(SELF_RAG))
+    configs = [{"configurable": {"thread_id": f"a{i}"}} for i in range(4)]
+
+    async def run_all():
+        await asyncio.gather(*(app.ainvoke({"question": "agent memory"}, c) for c in configs))
+
+    before = len(slow_llm.calls)
+    asyncio.run(run_all())
+    assert len(slow_llm.calls) - before == 4 * expected
+    # Every thread has its own checkpointed answer to continue from.
+    assert all(app.get_state(c).values["generation"] for c in configs)
+
+
+def test_errors_reach_every_follower_and_are_not_cached() -> None:
+    flight = SingleFlight("test")
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        calls_ = (flight.ado("k", fail) for _ in range(5))
+        return await asyncio.gather(*calls_, return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert len(calls) == 1 and all(isinstance(e, ValueError) for e in errors)
+    asyncio.run(main())
+    assert len(calls) == 2
+
+    started = threading.Event()
+
+    def fail_sync():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        raise ValueError("boom")
+
+    def follow():
+        started.wait()
+        return flight.do("k", fail_sync)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "k", fail_sync)
+        followers = [pool.submit(follow) for _ in range(3)]
+        for future in [leader, *followers]:
+            with pytest.raises(ValueError):
+                future.result()
+    assert len(calls) == 3
+
+
+def test_follower_timeout_and_leader_cancellation() -> None:
+    flight = SingleFlight("test", timeout_s=0.02)
+    runs = []
+
+    async def slow():
+        runs.append(1)
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.ado("k", slow))
+        await asyncio.sleep(0)
+        with pytest.raises(SingleFlightTimeout):
+            await flight.ado("k", slow)
+        # The leader goes away; a follower that is still waiting gets the result.
+        follower = asyncio.ensure_future(flight.ado("k", slow, timeout_s=1))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "done"
+
+        # With every caller gone the call itself is cancelled.
+        alone = asyncio.ensure_future(flight.ado("j", slow))
+        await asyncio.sleep(0.01)
+        alone.cancel()
+        await asyncio.sleep(0.01)
+        assert flight.in_flight() == 0
+
+    asyncio.run(main())
+    assert len(runs) == 2
+
+
+def test_chain_coalescing_shares_grader_calls_only(slow_llm, monkeypatch) -> None:
+    expected = calls_for_one_run(slow_llm)
+    monkeypatch.setenv("RAG_SINGLEFLIGHT_CHAINS", "true")
+    get_settings.cache_clear()
+    reset_chains()
+    llm = get_llm()
+    llm.latency_s = 0.05
+    app = build_graph(SELF_RAG)
+
+    async def run_all():
+        await asyncio.gather(
+            *(
+                app.ainvoke({"question": "agent memory"}, {"configurable": {"thread_id": f"c{i}"}})
+                for i in range(N)
+            )
+        )
+
+    asyncio.run(run_all())
+    kinds = [kind for kind, _ in llm.calls]
+    # Generation is never coalesced (its tokens are streamed per request).
+    assert kinds.count("generate") == N
+    assert len(kinds) == expected - 1 + N
+
+
+def test_server_coalesces_requests_without_a_thread(slow_llm, monkeypatch) -> None:
+    expected = calls_for_one_run(slow_llm)
+    monkeypatch.setenv("RAG_SINGLEFLIGHT", "true")
+    get_settings.cache_clear()
+    service = GraphService(graph=build_graph(SELF_RAG), variant=SELF_RAG)
+
+    async def post_all(bodies):
+        transport = httpx.ASGITransport(app=service)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post("/invoke", json=b) for b in bodies))
+
+    before = len(slow_llm.calls)
+    responses = asyncio.run(post_all([{"question": "agent memory"}] * N))
+    assert all(r.status_code == 200 for r in responses)
+    assert len(slow_llm.calls) - before == expected
+
+    before = len(slow_llm.calls)
+    asyncio.run(post_all([{"question": "agent memory", "thread_id": f"t{i}"} for i in range(4)]))
+    assert len(slow_llm.calls) - before == 4 * expected
@@ -0,0 +1,87 @@
+import pickle
+
+import pytest
+from langchain_core.documents import Document
+
+from graph.builder import build_graph
+from graph.chains.answer_grader import GradeAnswer
+from graph.chains.llm import get_llm
+from graph.config import get_settings
+from graph.consts import SELF_RAG
+from graph.docstore import load_documents
+from graph.fakes import default_structured_response, lorem
+from graph.state import ReplaceDocuments, document_token_budget, merge_documents
+from graph.tokens import count_tokens
+
+
+def test_merge_documents_dedupes_caps_and_never_mutates(monkeypatch) -> None:
+    monkeypatch.setenv("RAG_STATE_MAX_DOCUMENTS", "3")
+    get_settings.cache_clear()
+    try:
+        docs = [Document(page_content=f"doc {i}") for i in range(5)]
+        current = docs[:2]
+        merged = merge_documents(current, [Document(page_content="doc 1"), docs[2]])
+        assert [d.page_content for d in load_documents(merged)] == ["doc 0", "doc 1", "doc 2"]
+        assert current == docs[:2]
+
+        merged = merge_documents(merged, docs[3:])
+        assert [d.page_content for d in load_documents(merged)] == ["doc 2", "doc 3", "doc 4"]
+        assert load_documents(merge_documents(merged, ReplaceDocuments(docs[:1]))) == docs[:1]
+    finally:
+        get_settings.cache_clear()
+
+
+def run_not_useful_loops(loops: int):
+    """Self-RAG run whose first ``loops`` answers are graded "not useful"."""
+    llm = get_llm()
+    graded = []
+
+    def responder(schema, prompt):
+        if schema is GradeAnswer:
+            graded.append(prompt)
+            return GradeAnswer(binary_score=len(graded) > loops)
+        return default_structured_response(schema, prompt)
+
+    llm.structured_responder = responder
+    llm.calls.clear()
+    config = {
+        "configurable": {"thread_id": f"loops-{loops}"},
+        "recursion_limit": 10 * loops + 20,
+    }
+    result = build_graph(SELF_RAG).invoke({"question": "agent memory"}, config)
+    prompts = [text for kind, text in llm.calls if kind == "generate"]
+    assert len(prompts) == loops + 1
+    return result, count_tokens(prompts[-1])
+
+
+@pytest.mark.parametrize("fresh_results", [False, True])
+def test_documents_stay_bounded_across_self_rag_loops(
+    fake_backends, monkeypatch, fresh_results
+) -> None:
+    if fresh_results:
+        # Every search returns new pages, so only the caps keep the state bounded.
+        searches = iter(range(10_000))
+        monkeypatch.setattr(
+            fake_backends,
+            "results",
+            lambda query: [
+                {"url": f"https://example.com/{n}", "content": lorem(300, seed=n)}
+                for n in [next(searches)]
+            ],
+        )
+        monkeypatch.setenv("RAG_WEB_SEARCH_CACHE_TTL_S", "0")
+        monkeypatch.setenv("RAG_WEB_SEARCH_CACHE_STALE_S", "0")
+        get_settings.cache_clear()
+
+    short, short_prompt = run_not_useful_loops(5)
+    long, long_prompt = run_not_useful_loops(40)
+
+    settings = get_settings()
+    documents = load_documents(long["documents"])
+    assert len(documents) <= settings.state_max_documents
+    assert len({d.page_content for d in documents}) == len(documents)
+    tokens = sum(count_tokens(d.page_content) for d in documents)
+    assert tokens <= document_token_budget()
+    size = len(pickle.dumps(documents))
+    assert size == pytest.approx(len(pickle.dumps(load_documents(short["documents"]))), rel=0.05)
+    assert long_prompt == pytest.approx(short_prompt, rel=0.05)
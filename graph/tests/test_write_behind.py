@@ -0,0 +1,86 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from graph.builder import build_workflow, get_options
+from graph.checkpointers import connect_sqlite
+from graph.consts import GENERATE, SELF_RAG
+from graph.write_behind import WriteBehindSaver, flush_after_runs, write_batches
+
+
+def test_interrupt_and_resume_through_write_behind(fake_backends, tmp_path) -> None:
+    path = str(tmp_path / "checkpoints.sqlite")
+    saver = WriteBehindSaver(SqliteSaver(connect_sqlite(path)), max_queue=4, batch_size=16)
+    # A slow disk: commits lag well behind the run.
+    write = saver._write
+    saver._write = lambda ops: (time.sleep(0.05), write(ops))
+    app = flush_after_runs(
+        build_workflow(get_options(SELF_RAG)).compile(
+            checkpointer=saver, interrupt_before=[GENERATE]
+        )
+    )
+    config = {"configurable": {"thread_id": "interrupted"}}
+
+    app.invoke({"question": "agent memory"}, config)
+    # The interrupted checkpoint is on disk for any other process, before
+    # anything reads through the saver (which would flush).
+    with sqlite3.connect(path) as other:
+        on_disk = other.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? "
+            "ORDER BY checkpoint_id DESC LIMIT 1",
+            ("interrupted",),
+        ).fetchone()[0]
+    state = app.get_state(config)
+    assert state.next == (GENERATE,)
+    assert on_disk == state.config["configurable"]["checkpoint_id"]
+
+    app.update_state(config, {"question": "agent memory, briefly"})
+    result = app.invoke(None, config)
+    assert result["question"] == "agent memory, briefly"
+    assert "fake answer" in result["generation"]
+
+
+def test_writes_are_batched_into_transactions(fake_backends, tmp_path) -> None:
+    saver = WriteBehindSaver(SqliteSaver(connect_sqlite(str(tmp_path / "c.sqlite"))))
+    app = build_workflow(get_options(SELF_RAG)).compile(checkpointer=saver)
+    before = write_batches.value()
+
+    for i in range(10):
+        app.invoke({"question": "agent memory"}, {"configurable": {"thread_id": f"t{i}"}})
+    saver.flush()
+
+    committed = saver.inner.conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+    assert committed == sum(
+        len(list(saver.list({"configurable": {"thread_id": f"t{i}"}}))) for i in range(10)
+    )
+    assert write_batches.value() - before < committed
+    saver.close()
+
+
+def test_async_writes_wait_for_room_off_the_event_loop(tmp_path) -> None:
+    saver = WriteBehindSaver(SqliteSaver(connect_sqlite(str(tmp_path / "c.sqlite"))), max_queue=1)
+    config = {"configurable": {"thread_id": "t", "checkpoint_ns": "", "checkpoint_id": "1"}}
+    # Hold the writer on the first write so the second fills the queue.
+    release = threading.Event()
+    threading.Timer(1.0, release.set).start()  # a blocked event loop still ends
+    saver._write = lambda ops: release.wait()
+    saver.put_writes(config, [("question", "q")], "task")
+    while not saver._queue.empty():
+        time.sleep(0.001)
+    saver.put_writes(config, [("question", "q")], "task")
+
+    async def main():
+        write = asyncio.ensure_future(saver.aput_writes(config, [("question", "q")], "task"))
+        ticks = 0
+        while not write.done() and ticks < 5:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        release.set()
+        await write
+        return ticks
+
+    assert asyncio.run(main()) == 5
+    saver.close()
@@ -0,0 +1,30 @@
+"""
+Token counting shared by ingestion, ranking and generation budgets.
+
+Uses the tiktoken encoding of the chat model when it is available and falls
+back to a characters-per-token estimate when the encoding cannot be loaded
+(tiktoken downloads its vocabularies on first use, which fails offline).
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+ENCODING_NAME = "cl100k_base"
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = ENCODING_NAME) -> Optional[object]:
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
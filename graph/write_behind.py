@@ -0,0 +1,285 @@
+"""
+Write-behind checkpointing: graph steps enqueue checkpoint writes and a
+background thread commits them, many per transaction.
+
+Reads (``get_tuple`` / ``list``, and so ``get_state``, ``update_state`` and
+resuming a thread) flush the queue first, so a process always reads its own
+writes. Graphs from ``flush_after_runs`` (graph.builder uses it) also flush
+when a run returns, interrupted or not, so an ``interrupt_before`` checkpoint
+is on disk for other processes once ``invoke`` returns. Writes not yet
+flushed are lost if the process dies; the window is normally one batch (see
+``checkpoint_write_lag_seconds``) and ``flush()`` closes it on demand. The
+queue is bounded, so a writer that falls behind slows the graph down instead
+of growing memory; async callers wait for room off the event loop.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from graph.metrics import counter, histogram
+
+write_batches = counter(
+    "checkpoint_write_batches_total", "Transactions committed by the write-behind checkpointer"
+)
+writes_behind = counter(
+    "checkpoint_writes_behind_total", "Checkpoint operations written behind, by kind"
+)
+write_lag = histogram(
+    "checkpoint_write_lag_seconds",
+    "Time from enqueueing a checkpoint write to its commit (the durability window)",
+)
+
+_STOP = object()
+
+
+def _saved_config(config: RunnableConfig, checkpoint: Checkpoint) -> RunnableConfig:
+    return {
+        "configurable": {
+            "thread_id": config["configurable"]["thread_id"],
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+            "checkpoint_id": checkpoint["id"],
+        }
+    }
+
+
+class WriteBehindSaver(BaseCheckpointSaver):
+    def __init__(
+        self,
+        inner: BaseCheckpointSaver,
+        max_queue: int = 1024,
+        batch_size: int = 64,
+    ):
+        super().__init__(serde=inner.serde)
+        self.inner = inner
+        self.batch_size = batch_size
+        self.max_lag_s = 0.0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._run, name="checkpoint-writer", daemon=True
+        )
+        self._writer.start()
+
+    @property
+    def config_specs(self):
+        return self.inner.config_specs
+
+    # writes
+
+    def _check_open(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("checkpoint writer failed") from self._error
+        if self._closed:
+            raise RuntimeError("write-behind checkpointer is closed")
+
+    def _enqueue(self, op: Tuple) -> None:
+        self._check_open()
+        # Blocks while the queue is full: backpressure on the graph.
+        self._queue.put((time.perf_counter(), op))
+
+    async def _aenqueue(self, op: Tuple) -> None:
+        self._check_open()
+        item = (time.perf_counter(), op)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Backpressure on this run only, not on the event loop.
+            await asyncio.to_thread(self._queue.put, item)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        self._enqueue(("put", config, checkpoint, metadata, new_versions))
+        return _saved_config(config, checkpoint)
+
+    def put_writes(
+        self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str
+    ) -> None:
+        self._enqueue(("writes", config, list(writes), task_id))
+
+    def get_next_version(self, current: Optional[str], channel) -> str:
+        return self.inner.get_next_version(current, channel)
+
+    # reads see every write made so far
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        self.flush()
+        return self.inner.get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        self.flush()
+        return self.inner.list(config, filter=filter, before=before, limit=limit)
+
+    # async callers share the same queue; reads wait for it off the event loop
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        await self._aenqueue(("put", config, checkpoint, metadata, new_versions))
+        return _saved_config(config, checkpoint)
+
+    async def aput_writes(self, config, writes, task_id) -> None:
+        await self._aenqueue(("writes", config, list(writes), task_id))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator:
+        tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in tuples:
+            yield item
+
+    # writer
+
+    def flush(self) -> None:
+        """Block until every write enqueued so far is committed."""
+        self._queue.join()
+        if self._error is not None:
+            raise RuntimeError("checkpoint writer failed") from self._error
+
+    def close(self) -> None:
+        """Flush, then stop the writer; a failed flush still stops it and re-raises."""
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._closed = True
+            self._queue.put((0.0, _STOP))
+            self._writer.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            ops = [op for _, op in batch if op is not _STOP]
+            try:
+                if ops and self._error is None:
+                    self._write(ops)
+                    done = time.perf_counter()
+                    for enqueued, op in batch:
+                        if op is not _STOP:
+                            write_lag.observe(done - enqueued)
+                            self.max_lag_s = max(self.max_lag_s, done - enqueued)
+                            writes_behind.inc(kind=op[0])
+                    write_batches.inc()
+            except BaseException as e:  # surfaced by the next put or flush
+                self._error = e
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if any(op is _STOP for _, op in batch):
+                return
+
+    def _write(self, ops: List[Tuple]) -> None:
+        if isinstance(self.inner, SqliteSaver):
+            self._write_sqlite(ops)
+            return
+        for op in ops:
+            if op[0] == "put":
+                self.inner.put(*op[1:])
+            else:
+                self.inner.put_writes(*op[1:])
+
+    def _write_sqlite(self, ops: List[Tuple]) -> None:
+        """Same rows as SqliteSaver.put / put_writes, in one transaction."""
+        saver = self.inner
+        with saver.cursor() as cur:
+            for op in ops:
+                configurable = op[1]["configurable"]
+                thread_id = str(configurable["thread_id"])
+                checkpoint_ns = str(configurable.get("checkpoint_ns", ""))
+                if op[0] == "put":
+                    _, _, checkpoint, metadata, _ = op
+                    cur.execute(
+                        "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, "
+                        "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            thread_id,
+                            checkpoint_ns,
+                            checkpoint["id"],
+                            configurable.get("checkpoint_id"),
+                            *saver.serde.dumps_typed(checkpoint),
+                            saver.jsonplus_serde.dumps(metadata),
+                        ),
+                    )
+                    continue
+                _, _, writes, task_id = op
+                verb = "REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "IGNORE"
+                cur.executemany(
+                    f"INSERT OR {verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, "
+                    "task_id, idx, channel, type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            thread_id,
+                            checkpoint_ns,
+                            str(configurable["checkpoint_id"]),
+                            task_id,
+                            WRITES_IDX_MAP.get(channel, idx),
+                            channel,
+                            *saver.serde.dumps_typed(value),
+                        )
+                        for idx, (channel, value) in enumerate(writes)
+                    ],
+                )
+
+
+class _FlushAfterRuns(BaseCallbackHandler):
+    """Flushes the saver when a graph run (not one of its nodes) ends."""
+
+    def __init__(self, saver: WriteBehindSaver):
+        self.saver = saver
+        self._runs: Dict[UUID, bool] = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, metadata=None, **kwargs) -> None:
+        # Node runs, and everything below them, carry the node's name.
+        if "langgraph_node" not in (metadata or {}):
+            self._runs[run_id] = True
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs) -> None:
+        if self._runs.pop(run_id, False):
+            self.saver.flush()
+
+    def on_chain_error(self, error, *, run_id: UUID, **kwargs) -> None:
+        if self._runs.pop(run_id, False):
+            self.saver.flush()
+
+
+def flush_after_runs(app: Any) -> Any:
+    """``app`` (a compiled graph) flushing its write-behind checkpointer after every run."""
+    if not isinstance(app.checkpointer, WriteBehindSaver):
+        return app
+    return app.with_config(callbacks=[_FlushAfterRuns(app.checkpointer)])
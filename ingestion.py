@@ -1,8 +1,9 @@
+from functools import lru_cache
+
 from dotenv import load_dotenv
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import WebBaseLoader
-from langchain_openai import OpenAIEmbeddings
+
+from graph.clients import openai_client_kwargs
+from graph.config import get_settings
 
 load_dotenv()
 
@@ -12,13 +13,27 @@ urls = [
     "https://lilianweng.github.io/posts/2023-10-25-adv-attack-llm/",
 ]
 
-docs = [WebBaseLoader(url).load() for url in urls]
-docs_list = [item for sublist in docs for item in sublist]
+# Everything below is built on first use: the tiktoken splitter downloads its
+# vocabulary and the Chroma / OpenAI clients are slow to import, so importing
+# this module (as graph.nodes.retrieve does) must stay cheap and offline.
+
+
+@lru_cache(maxsize=None)
+def get_text_splitter():
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=250, chunk_overlap=0
+    )
+
+
+def load_web_documents():
+    from langchain_community.document_loaders import WebBaseLoader
+
+    docs = [WebBaseLoader(url).load() for url in urls]
+    docs_list = [item for sublist in docs for item in sublist]
+    return get_text_splitter().split_documents(docs_list)
 
-text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-    chunk_size=250, chunk_overlap=0
-)
-doc_splits = text_splitter.split_documents(docs_list)
 
 # vectorstore = Chroma.from_documents(
 #     documents=doc_splits,
@@ -27,12 +42,34 @@ doc_splits = text_splitter.split_documents(docs_list)
 #     persist_directory="./.chroma",
 # )
 
+
+@lru_cache(maxsize=None)
+def get_vectorstore():
+    from langchain_chroma import Chroma
+    from langchain_openai import OpenAIEmbeddings
+
+    settings = get_settings()
+    return Chroma(
+        collection_name=settings.chroma_collection,
+        persist_directory=settings.chroma_persist_directory,
+        embedding_function=OpenAIEmbeddings(**openai_client_kwargs()),
+    )
+
+
 # We defined the retriever settings here...
-retriever = Chroma(
-    collection_name="rag-chroma",
-    persist_directory="./.chroma",
-    embedding_function=OpenAIEmbeddings(),
-).as_retriever()
+@lru_cache(maxsize=None)
+def get_retriever():
+    return get_vectorstore().as_retriever()
+
+
+def __getattr__(name):
+    # Kept for `from ingestion import retriever`; built on first access.
+    if name == "retriever":
+        return get_retriever()
+    if name == "text_splitter":
+        return get_text_splitter()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Example explanation code:
 # The retriever is a LangChain Runnable object that can be:
@@ -55,4 +92,33 @@ retriever = Chroma(
 #     | StrOutputParser()
 #)
 
-# Objects like Retriever are RUNNABLE OBJECTs -> 
+# Objects like Retriever are RUNNABLE OBJECTs ->
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from graph.loaders import MANIFEST_NAME, ingest_directory
+
+    parser = argparse.ArgumentParser(description="Index documents into the Chroma store")
+    parser.add_argument("--dir", help="ingest PDF/HTML/Markdown files under this directory")
+    parser.add_argument("--workers", type=int, default=None, help="parsing processes")
+    args = parser.parse_args()
+
+    vectorstore = get_vectorstore()
+    if args.dir:
+        stats = ingest_directory(
+            args.dir,
+            vectorstore,
+            get_text_splitter(),
+            manifest_path=f"{get_settings().chroma_persist_directory}/{MANIFEST_NAME}",
+            max_workers=args.workers,
+        )
+        print(stats.summary())
+    else:
+        from graph.docstore import document_id
+
+        # Content-hash ids: re-running upserts the same chunks instead of
+        # adding them again (and repeated chunks are indexed once).
+        splits = {document_id(doc): doc for doc in load_web_documents()}
+        vectorstore.add_documents(list(splits.values()), ids=list(splits))
@@ -1,3 +1,8 @@
+# Fine for a toy database. For a real checkpoint file use the paged,
+# read-only inspector instead, e.g.
+#   python -m graph.checkpoint_inspect --path data/checkpoints.sqlite threads
+#   python -m graph.checkpoint_inspect --path data/checkpoints.sqlite largest --channel documents
+
 # #  Imports
 # import sqlite3
 
@@ -45,6 +45,12 @@ conn = sqlite3.connect(
     # can put address of remote sqlite location
     check_same_thread=False
 )
+# Tune for many small checkpoint writes: WAL lets readers run alongside the
+# writer, NORMAL sync skips an fsync per commit, and busy_timeout waits for
+# a lock instead of failing with "database is locked".
+conn.executescript(
+    "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA busy_timeout=5000;"
+)
 
 # Hypothetical path if remote sql location:
 # conn = sqlite3.connect(
@@ -10,110 +10,17 @@ Flow of Self-RAG:
 """
 
 from dotenv import load_dotenv
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.checkpoint.sqlite import SqliteSaver
-from langgraph.graph import END, StateGraph
 
-from graph.chains.answer_grader import answer_grader
-from graph.chains.hallucination_grader import hallucination_grader
-from graph.chains.router import question_router, RouteQuery
-from graph.consts import GENERATE, GRADE_DOCUMENTS, RETRIEVE, WEBSEARCH
-from graph.nodes import generate, grade_documents, retrieve, web_search
-from graph.state import GraphState
+from graph.builder import get_app
+from graph.consts import SELF_RAG
 
 load_dotenv()
-memory = SqliteSaver.from_conn_string(":memory:")
-memory = MemorySaver()
 
 
-def decide_to_generate(state):
-    print("---ASSESS GRADED DOCUMENTS---")
-
-    if state["web_search"]:
-        print(
-            "---DECISION: NOT ALL DOCUMENTS ARE NOT RELEVANT TO QUESTION, INCLUDE WEB SEARCH---"
-        )
-        return WEBSEARCH
-    else:
-        print("---DECISION: GENERATE---")
-        return GENERATE
-
-
-def grade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
-    print("---CHECK HALLUCINATIONS---")
-    question = state["question"]
-    documents = state["documents"]
-    generation = state["generation"]
-
-    score = hallucination_grader.invoke(
-        {"documents": documents, "generation": generation}
-    )
-
-    if hallucination_grade := score.binary_score:
-        print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
-        print("---GRADE GENERATION vs QUESTION---")
-        score = answer_grader.invoke({"question": question, "generation": generation})
-        if answer_grade := score.binary_score:
-            print("---DECISION: GENERATION ADDRESSES QUESTION---")
-            return "useful"
-        else:
-            print("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
-            return "not useful"
-    else:
-        print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---")
-        return "not supported"
-
-
-# def route_question(state: GraphState) -> str:
-#     print("---ROUTE QUESTION---")
-#     question = state["question"]
-#     source: RouteQuery = question_router.invoke({"question": question})
-#     if source.datasource == WEBSEARCH:
-#         print("---ROUTE QUESTION TO WEB SEARCH---")
-#         return WEBSEARCH
-#     elif source.datasource == "vectorstore":
-#         print("---ROUTE QUESTION TO RAG---")
-#         return RETRIEVE
-
-
-workflow = StateGraph(GraphState)
-workflow.add_node(RETRIEVE, retrieve)
-workflow.add_node(GRADE_DOCUMENTS, grade_documents)
-workflow.add_node(GENERATE, generate)
-workflow.add_node(WEBSEARCH, web_search)
-
-# Set entry point:
-workflow.set_entry_point(RETRIEVE)
-
-# workflow.set_conditional_entry_point(
-#     route_question,
-#     {
-#         WEBSEARCH: WEBSEARCH,
-#         RETRIEVE: RETRIEVE,
-#     },
-# )
-workflow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
-workflow.add_conditional_edges(
-    GRADE_DOCUMENTS,
-    decide_to_generate,
-    {
-        WEBSEARCH: WEBSEARCH,
-        GENERATE: GENERATE,
-    },
-)
-workflow.add_edge(WEBSEARCH, GENERATE)
-workflow.add_conditional_edges(
-    GENERATE,
-    grade_generation_grounded_in_documents_and_question,
-    {
-        "not supported": GENERATE,
-        "useful": END,
-        "not useful": WEBSEARCH,
-    },
-)
-
-# Compile graph
-app = workflow.compile(checkpointer=memory)
-
-# Export mermaid diagram
-app.get_graph().draw_mermaid_png(output_file_path="self-rag-graph.png")
+def __getattr__(name):
+    # Same nodes and edges as graph/graph.py with retrieval as the fixed entry
+    # point; built by graph.builder and compiled on first access.
+    # Render the diagram with `python -m graph.render --variant self_rag`.
+    if name == "app":
+        return get_app(SELF_RAG)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")